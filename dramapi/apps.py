@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DramapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dramapi'
+
+    def ready(self):
+        # Connect signal handlers and register system checks.
+        from . import checks, signals  # pylint: disable=import-outside-toplevel,unused-import
@@ -0,0 +1,145 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from dramapi.metrics import cache_fill
+from dramapi.reference import SharedVersion
+
+
+class TokenCache:
+    '''Bounded, least-recently-used cache of authenticated tokens, each kept
+    for a limited time.
+
+    Each process keeps its own cache. Each user's cached tokens carry the
+    version of that user in Django's cache, which logging out, deleting
+    the user and changing their password, active status or permissions
+    bump; a token is only used while its user's version is unchanged, so
+    one user's change leaves everyone else's tokens cached. Only processes
+    sharing Django's default cache see the versions, so with several
+    workers it must be a shared cache, see CACHE_URL; otherwise a revoked
+    token keeps working in the other workers for up to `ttl` seconds.
+
+    Attributes:
+        max_size (int): most tokens kept; the least recently used go first.
+        ttl (float): seconds a token is kept before it's checked again.
+        hits (int): lookups answered from the cache.
+        misses (int): lookups that had to query the database.
+    '''
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        # Token keys, and their Token, expiry time and user version.
+        self._tokens = OrderedDict()
+
+    def user_version(self, user_id):
+        '''Returns the version of a user's cached tokens.'''
+        return SharedVersion(f'dramapi:token_cache_version:{user_id}')
+
+    def get(self, key):
+        '''Returns the cached Token with a key, or None.'''
+        cached = self._lookup(key)
+        if cached is None:
+            return None
+        return self._check(key, cached, self.user_version(cached[0].user_id).get())
+
+    async def aget(self, key):
+        '''Async version of get().'''
+        cached = self._lookup(key)
+        if cached is None:
+            return None
+        return self._check(key, cached, await self.user_version(cached[0].user_id).aget())
+
+    def _lookup(self, key):
+        # Returns the unexpired cache entry of a token, or None.
+        now = time.monotonic()
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached is None or cached[1] < now:
+                self._tokens.pop(key, None)
+                self.misses += 1
+                return None
+            return cached
+
+    def _check(self, key, cached, version):
+        # Returns the token if its user hasn't changed since it was cached.
+        with self._lock:
+            if cached[2] != version:
+                if self._tokens.get(key) is cached:
+                    del self._tokens[key]
+                self.misses += 1
+                return None
+            if key in self._tokens:
+                self._tokens.move_to_end(key)
+            self.hits += 1
+            return cached[0]
+
+    def set(self, key, token):
+        '''Caches a Token, along with its user.'''
+        version = self.user_version(token.user_id).get()
+        with self._lock:
+            self._tokens[key] = (token, time.monotonic() + self.ttl, version)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        '''Makes every process sharing the version check a user's tokens
+        against the database again.'''
+        self.user_version(user_id).bump()
+
+    def invalidate(self):
+        '''Empties this process's cache.'''
+        with self._lock:
+            self._tokens.clear()
+
+    def stats(self):
+        '''Returns how well the cache is doing in this process.
+
+        Returns: dict
+        '''
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._tokens),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else None,
+        }
+
+
+token_cache = TokenCache(
+    max_size=getattr(settings, 'DRAM_TOKEN_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'DRAM_TOKEN_CACHE_TTL', 300))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    '''Token authentication that remembers recently used tokens, so most
+    requests skip the Token and User query.'''
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            # Look the token up and check its user as usual.
+            with cache_fill():
+                user, token = super().authenticate_credentials(key)
+            token_cache.set(key, token)
+        return (token.user, token)
+
+    async def aauthenticate(self, request):
+        '''Async version of authenticate(), which only leaves the event
+        loop to query the database when the token isn't cached.'''
+        auth = get_authorization_header(request).split()
+        if len(auth) == 2 and auth[0].lower() == self.keyword.lower().encode():
+            try:
+                token = await token_cache.aget(auth[1].decode())
+            except UnicodeError:
+                token = None
+            if token is not None:
+                return (token.user, token)
+        return await sync_to_async(self.authenticate)(request)
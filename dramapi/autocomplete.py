@@ -0,0 +1,190 @@
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+from threading import RLock
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count
+from dramapi.metrics import cache_fill
+from dramapi.models import Entry
+from dramapi.reference import SharedVersion
+
+# Most changes a process catches up on from the change log, rather than
+# rebuilding its index, and how many seconds each change is kept.
+MAX_CHANGES = 1000
+CHANGE_TIMEOUT = 3600
+
+
+def normalize(name):
+    '''Returns the form of a whiskey name used for matching.'''
+    return ' '.join(name.split()).casefold()
+
+
+class WhiskeyName:
+    '''Everything the index knows about one whiskey name.
+
+    Attributes:
+        count (int): number of entries with the name.
+        spellings (Counter): how often each spelling of the name is used.
+        types (Counter): how often each whiskey type id is used.
+        countries (Counter): how often each country is used.
+    '''
+
+    __slots__ = ['count', 'spellings', 'types', 'countries']
+
+    def __init__(self):
+        self.count = 0
+        self.spellings = Counter()
+        self.types = Counter()
+        self.countries = Counter()
+
+    def add(self, spelling, type_id, country, count=1):
+        self.count += count
+        self.spellings[spelling] += count
+        self.types[type_id] += count
+        self.countries[country] += count
+
+    def remove(self, spelling, type_id, country):
+        self.count -= 1
+        for counter, key in ((self.spellings, spelling), (self.types, type_id), (self.countries, country)):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+
+
+class WhiskeyNameIndex:
+    '''In-memory prefix index of the whiskey names used in entries.
+
+    Names are kept in a sorted list, so the names starting with a prefix
+    are found by binary search. Saved and deleted entries bump a shared
+    version and log the change in the cache under that version, and every
+    process, this one included, applies the changes since its own version
+    on its next lookup. A process only rebuilds its index from the
+    database if it's missing a change, e.g. after a bulk insert or once it
+    has fallen more than MAX_CHANGES behind. The version and the log must
+    be in a cache every process shares, see CACHE_URL.
+    '''
+
+    def __init__(self):
+        self.shared_version = SharedVersion('dramapi:whiskey_names_version')
+        self._lock = RLock()
+        self._version = None
+        self._names = {}
+        self._keys = []
+
+    def change_key(self, version):
+        '''Returns the cache key of the change that moved to a version.'''
+        return f'{self.shared_version.key}:change:{version}'
+
+    def load(self):
+        '''Brings the index up to date with the changes made by every
+        process, from the change log or else from the database.'''
+        version = self.shared_version.get()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            if not self.catch_up(version):
+                self.rebuild(version)
+
+    def catch_up(self, version):
+        '''Applies the logged changes up to a version.
+
+        Returns: False if a change is missing from the log, and the index
+            has to be rebuilt
+        '''
+        if self._version is None or not 0 < version - self._version <= MAX_CHANGES:
+            return False
+        keys = [self.change_key(number) for number in range(self._version + 1, version + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys):
+            return False
+        for key in keys:
+            old, new = changes[key]
+            if old:
+                self.remove(*old)
+            if new:
+                self.add(*new)
+        self._version = version
+        return True
+
+    def rebuild(self, version):
+        '''Builds the index from the database.'''
+        names = {}
+        # Read from the primary, so a lagging replica can't be cached
+        # under the new version.
+        rows = Entry.objects.using(DEFAULT_DB_ALIAS).order_by().values(
+            'whiskey', 'whiskey_type_id', 'country').annotate(count=Count('id'))
+        with cache_fill():
+            rows = list(rows)
+        for row in rows:
+            key = normalize(row['whiskey'])
+            if key:
+                names.setdefault(key, WhiskeyName()).add(
+                    row['whiskey'], row['whiskey_type_id'], row['country'], row['count'])
+        self._names = names
+        self._keys = sorted(names)
+        self._version = version
+
+    def add(self, whiskey, type_id, country):
+        '''Adds an entry's whiskey name to the index.'''
+        key = normalize(whiskey)
+        if not key:
+            return
+        with self._lock:
+            if key not in self._names:
+                self._names[key] = WhiskeyName()
+                insort(self._keys, key)
+            self._names[key].add(whiskey, type_id, country)
+
+    def remove(self, whiskey, type_id, country):
+        '''Removes an entry's whiskey name from the index.'''
+        key = normalize(whiskey)
+        with self._lock:
+            name = self._names.get(key)
+            if name is None:
+                return
+            name.remove(whiskey, type_id, country)
+            if name.count <= 0:
+                del self._names[key]
+                del self._keys[bisect_left(self._keys, key)]
+
+    def change(self, old=None, new=None):
+        '''Logs a change to one entry, for every process to apply on its
+        next lookup.
+
+        Parameters:
+        old (tuple): the entry's (whiskey, type id, country) before the
+            change, or None if it was created.
+        new (tuple): the entry's (whiskey, type id, country) after the
+            change, or None if it was deleted.
+        '''
+        version = self.shared_version.bump()
+        cache.set(self.change_key(version), (old, new), timeout=CHANGE_TIMEOUT)
+
+    def invalidate(self):
+        '''Makes every process rebuild the index, e.g. after a bulk insert.'''
+        self._version = None
+        self.shared_version.bump()
+
+    def complete(self, prefix, limit=10):
+        '''Finds the most used whiskey names starting with a prefix.
+
+        Parameters:
+        prefix (str): start of the whiskey name.
+        limit (int): maximum number of names.
+
+        Returns: list of (spelling, WhiskeyName) tuples, most used first
+        '''
+        self.load()
+        prefix = normalize(prefix)
+        with self._lock:
+            start = bisect_left(self._keys, prefix)
+            end = bisect_left(self._keys, prefix + '\U0010ffff', lo=start)
+            keys = heapq.nlargest(
+                limit, self._keys[start:end], key=lambda key: self._names[key].count)
+            return [(self._names[key].spellings.most_common(1)[0][0], self._names[key]) for key in keys]
+
+
+whiskey_name_index = WhiskeyNameIndex()
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class TokenModelBackend(ModelBackend):
+    '''Authenticates by username and password like ModelBackend, but loads
+    the user's auth token in the same query, so logging in costs a single
+    query.'''
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.select_related('auth_token').get(
+                **{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # Run the hasher anyway, so unknown usernames take as long as
+            # wrong passwords.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.utils.module_loading import import_string
+from dramapi.throttling import MemoryBucketStore
+
+# Backends shared between processes, with atomic increments for SharedVersion.
+SHARED_CACHE_BACKENDS = {
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+}
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    '''Fails when more than one worker process would each use their own
+    cache, and so never see each other's cache invalidations.'''
+    workers = getattr(settings, 'DRAM_WORKERS', 1)
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if workers > 1 and backend not in SHARED_CACHE_BACKENDS:
+        return [Error(
+            f"{workers} worker processes can't share the {backend} cache.",
+            hint="Set CACHE_URL to a Redis or Memcached server, e.g. redis://localhost:6379/0.",
+            id='dramapi.E001',
+        )]
+    return []
+
+
+@register()
+def check_rate_limit_store(app_configs, **kwargs):
+    '''Warns when more than one worker process would each keep their own
+    rate limits, letting clients through that many times as often.'''
+    workers = getattr(settings, 'DRAM_WORKERS', 1)
+    path = getattr(settings, 'DRAM_RATE_LIMIT_STORE', 'dramapi.throttling.MemoryBucketStore')
+    if workers > 1 and issubclass(import_string(path), MemoryBucketStore):
+        return [Warning(
+            f"{workers} worker processes each keep their own rate limits in {path}.",
+            hint="Set DRAM_RATE_LIMIT_STORE to 'dramapi.throttling.CacheBucketStore'.",
+            id='dramapi.W001',
+        )]
+    return []
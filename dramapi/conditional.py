@@ -0,0 +1,55 @@
+import hashlib
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    '''Builds a strong ETag from the values a response depends on.
+
+    Parameters:
+    *parts: values that change whenever the response body changes.
+
+    Returns: quoted ETag string
+    '''
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def is_not_modified(request, etag):
+    '''Checks the request's If-None-Match against the current ETag.
+
+    Parameters:
+    request (obj): an instance of Django class HttpRequest,
+    representing the incoming HTTP request.
+    etag (str): current ETag of the resource.
+
+    Returns: bool
+    '''
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        return if_none_match.strip() == '*' or etag in parse_etags(if_none_match)
+    return False
+
+
+def add_validators(response, etag):
+    '''Adds an ETag header to a per-user response, and makes clients
+    revalidate it before reusing it.
+
+    Parameters:
+    response (obj): the Response to send.
+    etag (str): current ETag of the resource.
+
+    Returns: the response
+    '''
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def not_modified_response(etag):
+    '''Returns a 304 response carrying the current ETag.'''
+    return add_validators(
+        Response(status=status.HTTP_304_NOT_MODIFIED), etag)
@@ -0,0 +1,78 @@
+import csv
+from itertools import islice
+from asgiref.sync import sync_to_async
+from rest_framework.utils.encoders import JSONEncoder
+
+# Columns of CSV exports, in the format dramapi.importer reads back.
+CSV_COLUMNS = ['whiskey', 'whiskey_type', 'country', 'part_of_country', 'age_in_years', 'proof', 'color',
+               'mash_bill', 'maturation_details', 'nose', 'palate', 'finish', 'rating', 'notes', 'publication_date']
+
+
+class Echo:
+    # File-like object whose write() returns what was written,
+    # so csv.writer can produce one line at a time.
+
+    def write(self, value):
+        return value
+
+
+def jsonl_lines(entries):
+    '''Writes serialized entries as JSON Lines.
+
+    Parameters:
+    entries (iterable): serialized entries.
+
+    Returns: iterator of lines
+    '''
+    encoder = JSONEncoder(ensure_ascii=False)
+    for entry in entries:
+        yield encoder.encode(entry) + '\n'
+
+
+def csv_lines(entries):
+    '''Writes serialized entries as CSV with a header row. Types, colors
+    and ratings are written as their labels.
+
+    Parameters:
+    entries (iterable): serialized entries.
+
+    Returns: iterator of lines
+    '''
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for entry in entries:
+        yield writer.writerow([
+            entry[column]['label'] if isinstance(entry[column], dict)
+            else '' if entry[column] is None else entry[column]
+            for column in CSV_COLUMNS
+        ])
+
+
+async def aiter_lines(lines, batch_size=100):
+    '''Async version of an iterator of lines, for StreamingHttpResponse
+    under ASGI, which would otherwise read a sync iterator into a list
+    before sending any of it. Batches of lines are read with
+    sync_to_async, in the thread that holds the request's database
+    connection.
+
+    Parameters:
+    lines (iterator): lines from one of the writers.
+    batch_size (int): lines read, and sent, at a time.
+
+    Returns: async iterator of strings
+    '''
+    def read_batch():
+        return ''.join(islice(lines, batch_size))
+
+    while True:
+        batch = await sync_to_async(read_batch)()
+        if not batch:
+            return
+        yield batch
+
+
+# Content types and writers of each export format.
+EXPORT_FORMATS = {
+    'jsonl': ('application/x-ndjson', jsonl_lines),
+    'csv': ('text/csv', csv_lines),
+}
@@ -0,0 +1,151 @@
+from decimal import Decimal, InvalidOperation
+from django.db.models import CharField, Count, Max, Min, Q, Value
+from django.db.models.functions import Cast
+from rest_framework import serializers
+from dramapi.models import Entry, Type, Color, Rating
+from dramapi.reference import reference_cache
+
+
+# Largest id a 64-bit integer column holds.
+MAX_ID = 2 ** 63 - 1
+
+
+class InvalidFilter(Exception):
+    # Raised when a filter in the query params has an invalid value.
+    pass
+
+
+class EntryFilters:
+    '''Filters for the entries feed, read from the query params, and the
+    facet counts the client shows beside the filtered entries.
+
+    A field can be filtered by several values by repeating its query param,
+    e.g. ?country=USA&country=Scotland.
+    '''
+
+    # Query params matching one of the values of an Entry field.
+    choice_filters = {
+        'whiskey_type': 'whiskey_type_id',
+        'country': 'country',
+        'part_of_country': 'part_of_country',
+        'rating': 'rating_id',
+        'color': 'color_id',
+    }
+    # Lookup tables of the choice filters given by id.
+    reference_models = {'whiskey_type': Type, 'rating': Rating, 'color': Color}
+    # Query params bounding a number field, as (field, lookup).
+    range_filters = {
+        'min_proof': ('proof', 'gte'),
+        'max_proof': ('proof', 'lte'),
+        'min_age': ('age_in_years', 'gte'),
+        'max_age': ('age_in_years', 'lte'),
+    }
+
+    def __init__(self, query_params):
+        '''Reads the filters from the query params.
+
+        Parameters:
+        query_params (obj): the request's QueryDict.
+
+        Raises: InvalidFilter if a value is invalid.
+        '''
+        self.choices = {}
+        for param in self.choice_filters:
+            values = query_params.getlist(param)
+            if not values:
+                continue
+            if param in self.reference_models:
+                try:
+                    values = [int(value) for value in values]
+                except ValueError as error:
+                    raise InvalidFilter(f"Invalid {param}") from error
+                # The database can't compare ids outside its integer range.
+                if any(not -MAX_ID - 1 <= value <= MAX_ID for value in values):
+                    raise InvalidFilter(f"Invalid {param}")
+            self.choices[param] = values
+
+        self.ranges = {}
+        for param, (field, lookup) in self.range_filters.items():
+            value = query_params.get(param)
+            if value is None:
+                continue
+            try:
+                value = Decimal(value)
+            except InvalidOperation as error:
+                raise InvalidFilter(f"Invalid {param}") from error
+            if not value.is_finite():
+                raise InvalidFilter(f"Invalid {param}")
+            self.ranges[f'{field}__{lookup}'] = value
+
+    def conditions(self, exclude=None, ranges=True):
+        '''Builds the filter matching every choice and range.
+
+        Parameters:
+        exclude (str): query param of a choice filter to leave out.
+        ranges (bool): whether to include the range filters.
+
+        Returns: Q object
+        '''
+        condition = Q()
+        for param, values in self.choices.items():
+            if param != exclude:
+                condition &= Q(
+                    **{f'{self.choice_filters[param]}__in': values})
+        if ranges:
+            condition &= Q(**self.ranges)
+        return condition
+
+    def apply(self, queryset):
+        '''Returns the entries in a queryset that match the filters.'''
+        return queryset.filter(self.conditions())
+
+    def facet_counts(self, queryset):
+        '''Counts the entries having each value of each choice filter in one
+        query, and finds the range of each number field in another.
+
+        The counts for a field apply every filter except that field's own,
+        so the client can show how many entries each other value would add.
+
+        Parameters:
+        queryset (obj): QuerySet of the entries before filtering.
+
+        Returns: dict
+        '''
+        queryset = queryset.order_by()
+        facets = {param: [] for param in self.choice_filters}
+
+        # Group each field's values with its own filters, and send the
+        # groups as one UNION ALL, with the values as text.
+        counts = [
+            queryset.filter(self.conditions(exclude=param)).values(
+                facet=Value(param, output_field=CharField()),
+                value=Cast(field, CharField())).annotate(count=Count('id'))
+            for param, field in self.choice_filters.items()
+        ]
+        for row in counts[0].union(*counts[1:], all=True):
+            if row['value'] is None:
+                continue
+            model = self.reference_models.get(row['facet'])
+            if model:
+                pk = int(row['value'])
+                facets[row['facet']].append(
+                    {'id': pk, 'label': reference_cache.get(model, pk).label, 'count': row['count']})
+            else:
+                facets[row['facet']].append({'value': row['value'], 'count': row['count']})
+        for values in facets.values():
+            values.sort(key=lambda value: (-value['count'], value.get('id', value.get('value'))))
+
+        ranges = queryset.filter(self.conditions(ranges=False)).aggregate(
+            min_proof=Min('proof'), max_proof=Max('proof'),
+            min_age=Min('age_in_years'), max_age=Max('age_in_years'))
+        for field, prefix in (('proof', 'proof'), ('age_in_years', 'age')):
+            model_field = Entry._meta.get_field(field)
+            decimal = serializers.DecimalField(
+                max_digits=model_field.max_digits, decimal_places=model_field.decimal_places)
+            facets[field] = {
+                bound: None if ranges[f'{bound}_{prefix}'] is None
+                else decimal.to_representation(ranges[f'{bound}_{prefix}'])
+                for bound in ('min', 'max')
+            }
+
+        return facets
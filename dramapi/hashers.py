@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    '''Django's PBKDF2 hasher with its iteration count taken from the
+    DRAM_PASSWORD_ITERATIONS setting, so the CPU spent on each login can be
+    tuned for the hardware.
+
+    Hashes stored with a different count still verify, and are rehashed
+    with the configured count the next time their user logs in.
+    '''
+
+    @property
+    def iterations(self):
+        return (getattr(settings, 'DRAM_PASSWORD_ITERATIONS', None)
+                or hashers.PBKDF2PasswordHasher.iterations)
@@ -0,0 +1,177 @@
+import csv
+import io
+import json
+from collections.abc import Mapping
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+from dramapi.autocomplete import whiskey_name_index
+from dramapi.models import Entry, Type, Color, Rating
+from dramapi.reference import reference_cache
+from dramapi.versions import entries_changed
+
+
+class InvalidImportFile(Exception):
+    # Raised when an import file can't be read at all.
+    pass
+
+
+class ImportEntrySerializer(serializers.Serializer):
+    '''Validates one imported entry.
+
+    The whiskey's type, color and rating can each be given either by id
+    (type_id, color_id, rating_id) or by label (whiskey_type, color,
+    rating), and are checked against the reference cache rather than the
+    database.
+    '''
+
+    whiskey = serializers.CharField(max_length=155)
+    country = serializers.CharField(max_length=155)
+    part_of_country = serializers.CharField(
+        max_length=155, required=False, allow_null=True, allow_blank=True)
+    age_in_years = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False, allow_null=True)
+    proof = serializers.DecimalField(max_digits=6, decimal_places=2)
+    mash_bill = serializers.CharField(
+        max_length=155, required=False, allow_null=True, allow_blank=True)
+    maturation_details = serializers.CharField(
+        max_length=300, required=False, allow_null=True, allow_blank=True)
+    nose = serializers.CharField(max_length=300)
+    palate = serializers.CharField(max_length=300)
+    finish = serializers.CharField(
+        max_length=300, required=False, allow_null=True, allow_blank=True)
+    notes = serializers.CharField(
+        max_length=1000, required=False, allow_null=True, allow_blank=True)
+
+    # Lookup fields, as {field name: (model, id key, label key, required)}.
+    references = {
+        'whiskey_type': (Type, 'type_id', 'whiskey_type', True),
+        'color': (Color, 'color_id', 'color', False),
+        'rating': (Rating, 'rating_id', 'rating', True),
+    }
+
+    def to_internal_value(self, data):
+        # A list of entries may hold anything, not just objects.
+        if not isinstance(data, Mapping):
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f"Expected an object, but got {type(data).__name__}."],
+            })
+        # Spreadsheets leave optional cells empty rather than null.
+        data = {key: (None if value == '' else value)
+                for key, value in data.items()}
+        values = super().to_internal_value(data)
+
+        errors = {}
+        for field, (model, id_key, label_key, required) in self.references.items():
+            try:
+                values[field] = self.find_reference(
+                    model, data.get(id_key), data.get(label_key))
+            except model.DoesNotExist:
+                errors[field] = [f"Unknown {field}."]
+                continue
+            if values[field] is None and required:
+                errors[field] = [f"Either {id_key} or {label_key} is required."]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return values
+
+    def find_reference(self, model, pk, label):
+        '''Finds a lookup row by id or, failing that, by label.
+
+        Returns: instance of model, or None if neither is given.
+
+        Raises: model.DoesNotExist if no row matches.
+        '''
+        if pk is not None:
+            try:
+                return reference_cache.get(model, pk)
+            except ValidationError as error:
+                raise model.DoesNotExist() from error
+        if label is not None:
+            label = str(label).strip().casefold()
+            for row in reference_cache.all(model):
+                if row.label.casefold() == label:
+                    return row
+            raise model.DoesNotExist()
+        return None
+
+
+def read_rows(file, file_format):
+    '''Reads entries from a CSV file with a header row, or a JSON Lines
+    file with one object per line.
+
+    Parameters:
+    file (obj): binary or text file.
+    file_format (str): 'csv' or 'jsonl'.
+
+    Returns: iterator of dicts
+
+    Raises: InvalidImportFile if the format is unknown, the file isn't
+        UTF-8 or valid CSV, or a line isn't an object.
+    '''
+    if isinstance(file.read(0), bytes):
+        file = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+
+    try:
+        yield from parse_rows(file, file_format)
+    except UnicodeDecodeError as error:
+        raise InvalidImportFile("The file is not UTF-8 text.") from error
+    except csv.Error as error:
+        raise InvalidImportFile(f"The file is not valid CSV: {error}") from error
+
+
+def parse_rows(file, file_format):
+    '''Reads entries from a text file for read_rows().'''
+    if file_format == 'csv':
+        yield from csv.DictReader(file)
+    elif file_format == 'jsonl':
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                raise InvalidImportFile(f"Line {number} is not valid JSON.") from error
+            if not isinstance(row, dict):
+                raise InvalidImportFile(f"Line {number} is not a JSON object.")
+            yield row
+    else:
+        raise InvalidImportFile(f"Unknown format '{file_format}'; use csv or jsonl.")
+
+
+def import_entries(user, rows, partial=False, batch_size=500):
+    '''Validates entries and inserts them for a user in batches, in one
+    transaction.
+
+    Parameters:
+    user (obj): the User the entries belong to.
+    rows (iterable): dicts of entry fields.
+    partial (bool): whether to import the valid rows when others are
+        invalid. Otherwise nothing is imported if any row is invalid.
+    batch_size (int): number of entries per INSERT.
+
+    Returns: tuple of (number of entries created, list of errors for each
+        invalid row, as {'row': row number, 'errors': {field: messages}})
+    '''
+    entries = []
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        serializer = ImportEntrySerializer(data=row)
+        if serializer.is_valid():
+            entries.append(Entry(user=user, **serializer.validated_data))
+        else:
+            errors.append({'row': number, 'errors': serializer.errors})
+
+    if errors and not partial:
+        return 0, errors
+
+    with transaction.atomic():
+        Entry.objects.bulk_create(entries, batch_size=batch_size)
+        # bulk_create doesn't send signals, so rebuild the name index and
+        # change the entry lists' ETags here.
+        transaction.on_commit(whiskey_name_index.invalidate)
+        entries_changed((user.id, entry.id) for entry in entries)
+
+    return len(entries), errors
@@ -0,0 +1,221 @@
+import json
+import math
+import platform
+import random
+import statistics
+import subprocess
+import time
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from dramapi.metrics import metrics_registry
+from dramapi.models import Color, Entry, Rating, Type
+from dramapi.synthetic import generate, make_entry
+
+PASSWORD = 'benchmark password'
+
+
+def percentile(values, percent):
+    '''Returns the nearest-rank percentile of sorted values.'''
+    return values[max(0, min(len(values) - 1, math.ceil(percent / 100 * len(values)) - 1))]
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the main read and write endpoints through the test client, against '
+            'synthetic data that is rolled back afterwards. Reports latency percentiles, '
+            'queries per request and throughput, and can save them as JSON to compare '
+            'with a run on another commit.')
+
+    scenarios = ['entries', 'bookmarks', 'login', 'create_entry', 'update_entry']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200,
+                            help='Number of synthetic users.')
+        parser.add_argument('--entries', type=int, default=5000,
+                            help='Number of synthetic entries.')
+        parser.add_argument('--bookmarks', type=int, default=20000,
+                            help='Number of synthetic bookmarks.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed of the data and of the requests made.')
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Number of requests timed for each scenario.')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='Number of untimed requests made before each scenario.')
+        parser.add_argument('--page-size', type=int, default=20,
+                            help='Page size of the list requests.')
+        parser.add_argument('--scenarios', nargs='+', choices=self.scenarios, default=self.scenarios,
+                            help='Scenarios to run.')
+        parser.add_argument('--output', help='Path to save the results to, as JSON.')
+        parser.add_argument('--compare', help='Path of saved results to compare these with.')
+
+    def handle(self, *args, **options):
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as file:
+                    previous = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Can't read {options['compare']}: {error}") from error
+
+        self.rng = random.Random(options['seed'])
+        self.page_size = options['page_size']
+        self.client = APIClient()
+        # The test client sends requests to the 'testserver' host, and rate
+        # limits would turn most of the requests into 429s.
+        with override_settings(ROOT_URLCONF='dramproject.urls', ALLOWED_HOSTS=['testserver'],
+                               DRAM_RATE_LIMITS={}), transaction.atomic():
+            try:
+                users = generate(options['users'], options['entries'], options['bookmarks'],
+                                 seed=options['seed'], prefix='benchmark_api', password=PASSWORD)
+            except ValueError as error:
+                raise CommandError(str(error)) from error
+            self.users = users
+            self.tokens = dict(Token.objects.filter(user__in=users).values_list('user_id', 'key'))
+            self.entries = list(Entry.objects.filter(user__in=users).values_list('id', 'user_id'))
+            self.reference = [list(model.objects.values_list('id', flat=True))
+                              for model in (Type, Color, Rating)]
+
+            results = {}
+            for name in options['scenarios']:
+                results[name] = self.run(name, options['requests'], options['warmup'])
+                self.report(name, results[name], (previous or {}).get('scenarios', {}).get(name))
+            transaction.set_rollback(True)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({
+                    'commit': self.commit(),
+                    'created': timezone.now().isoformat(),
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'database': connection.vendor,
+                    'options': {key: options[key] for key in (
+                        'users', 'entries', 'bookmarks', 'seed', 'requests', 'warmup', 'page_size')},
+                    'scenarios': results,
+                }, file, indent=2)
+            self.stdout.write(f"Saved results to {options['output']}.")
+
+    def commit(self):
+        '''Returns the checked out git commit, or None outside a checkout.'''
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def login_as(self, user_id):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.tokens[user_id]}")
+
+    def request(self, name):
+        '''Makes one request of a scenario, as a random user.
+
+        Returns: tuple of the response and the status code expected
+        '''
+        user = self.rng.choice(self.users)
+        if name == 'entries':
+            self.login_as(user.id)
+            return self.client.get(f"/entries?page_size={self.page_size}"), 200
+        if name == 'bookmarks':
+            self.login_as(user.id)
+            return self.client.get(
+                f"/bookmarks?expand=entry&username={user.username}&page_size={self.page_size}"), 200
+        if name == 'login':
+            self.client.credentials()
+            return self.client.post(
+                "/login", {'username': user.username, 'password': PASSWORD}, format='json'), 200
+
+        entry = make_entry(self.rng, user.id, *self.reference)
+        body = {
+            'whiskey': entry.whiskey,
+            'country': entry.country,
+            'part_of_country': entry.part_of_country,
+            'age_in_years': entry.age_in_years,
+            'proof': entry.proof,
+            'color_id': entry.color_id,
+            'mash_bill': None,
+            'maturation_details': None,
+            'nose': entry.nose,
+            'palate': entry.palate,
+            'finish': entry.finish,
+            'notes': entry.notes,
+        }
+        if name == 'create_entry':
+            self.login_as(user.id)
+            body.update(type_id=entry.whiskey_type_id, rating_id=entry.rating_id)
+            return self.client.post("/entries", body, format='json'), 201
+        # Update an entry as its author.
+        entry_id, author_id = self.rng.choice(self.entries)
+        self.login_as(author_id)
+        body.update(whiskey_type=entry.whiskey_type_id, color=entry.color_id, rating=entry.rating_id)
+        return self.client.put(f"/entries/{entry_id}", body, format='json'), 202
+
+    def run(self, name, requests, warmup):
+        '''Times a scenario's requests, and gets their query counts from the
+        metrics recorded by dramapi.metrics.MetricsMiddleware.
+
+        Returns: dict of the scenario's results
+        '''
+        for _ in range(warmup):
+            self.request(name)
+        metrics_registry.reset()
+
+        latencies = []
+        errors = 0
+        start = time.perf_counter()
+        for _ in range(requests):
+            request_start = time.perf_counter()
+            response, expected_status = self.request(name)
+            latencies.append(time.perf_counter() - request_start)
+            if response.status_code != expected_status:
+                errors += 1
+        elapsed = time.perf_counter() - start
+
+        endpoints = metrics_registry.snapshot().values()
+        queries = sum(endpoint['queries']['sum'] for endpoint in endpoints)
+        latencies = sorted(latency * 1000 for latency in latencies)
+        return {
+            'requests': requests,
+            'errors': errors,
+            'throughput': round(requests / elapsed, 1) if elapsed else None,
+            'latency_ms': {
+                'mean': round(statistics.fmean(latencies), 2) if latencies else None,
+                **{f'p{percent}': round(percentile(latencies, percent), 2) if latencies else None
+                   for percent in (50, 95, 99)},
+                'max': round(latencies[-1], 2) if latencies else None,
+            },
+            'queries_per_request': round(queries / requests, 2) if requests else None,
+            'max_queries': max((endpoint['queries']['max'] for endpoint in endpoints), default=0),
+            'db_ms_per_request': round(
+                sum(endpoint['db_ms']['sum'] for endpoint in endpoints) / requests, 2) if requests else None,
+        }
+
+    def report(self, name, result, previous=None):
+        latency = result['latency_ms']
+        line = (f"{name:<13} {result['throughput'] or 0:8.1f} req/s, "
+                f"p50 {latency['p50'] or 0:7.2f} ms, p95 {latency['p95'] or 0:7.2f} ms, "
+                f"p99 {latency['p99'] or 0:7.2f} ms, "
+                f"{result['queries_per_request'] or 0:5.1f} queries/request")
+        if result['errors']:
+            line += f", {result['errors']} unexpected responses"
+        self.stdout.write(line)
+        if previous:
+            self.stdout.write(' ' * 14 + ', '.join(
+                f"{label} {self.change(before, after)}" for label, before, after in [
+                    ('req/s', previous['throughput'], result['throughput']),
+                    ('p50', previous['latency_ms']['p50'], latency['p50']),
+                    ('p95', previous['latency_ms']['p95'], latency['p95']),
+                    ('p99', previous['latency_ms']['p99'], latency['p99']),
+                    ('queries', previous['queries_per_request'], result['queries_per_request']),
+                ]))
+
+    def change(self, before, after):
+        '''Formats the change from a previous result as a percentage.'''
+        if not before or after is None:
+            return 'n/a'
+        return f"{(after - before) / before * 100:+.1f}%"
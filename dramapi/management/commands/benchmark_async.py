@@ -0,0 +1,117 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from dramapi.models import Color, Entry, Rating, Type
+
+
+class Command(BaseCommand):
+    help = ('Load tests a read endpoint with concurrent requests, comparing the sync '
+            'views behind WSGI and ASGI with the async views behind ASGI. Requests run '
+            'in-process, so the numbers leave out the server and the network.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=200,
+                            help='Number of entries to create for the benchmark.')
+        parser.add_argument('--requests', type=int, default=400,
+                            help='Number of requests sent to each path.')
+        parser.add_argument('--concurrency', type=int, default=20,
+                            help='Number of requests in flight at once.')
+        parser.add_argument('--url', default='/entries?page_size=20',
+                            help='Endpoint to request.')
+
+    def handle(self, *args, **options):
+        # The async views query from another thread, so commit the data
+        # rather than rolling back a transaction, and delete it afterwards.
+        user = User.objects.create_user(username='benchmark_async')
+        try:
+            token = Token.objects.create(user=user)
+            whiskey_type = Type.objects.first()
+            color = Color.objects.first()
+            rating = Rating.objects.first()
+            Entry.objects.bulk_create([
+                Entry(
+                    user=user,
+                    whiskey=f"Benchmark Whiskey {i}",
+                    whiskey_type=whiskey_type,
+                    country="Scotland",
+                    proof=92.4,
+                    color=color,
+                    rating=rating,
+                )
+                for i in range(options['entries'])
+            ])
+            headers = {'Authorization': f"Token {token.key}"}
+
+            # The test clients send requests to the 'testserver' host.
+            with override_settings(ROOT_URLCONF='dramproject.urls', ALLOWED_HOSTS=['testserver']):
+                self.report('WSGI, sync views', self.run_wsgi(headers, **options))
+            # Under ASGI, sync views all run in one thread.
+            with override_settings(ROOT_URLCONF='dramproject.urls', ALLOWED_HOSTS=['testserver']):
+                self.report('ASGI, sync views', asyncio.run(self.run_asgi(headers, **options)))
+            with override_settings(ROOT_URLCONF='dramproject.async_urls', ALLOWED_HOSTS=['testserver']):
+                self.report('ASGI, async views', asyncio.run(self.run_asgi(headers, **options)))
+        finally:
+            user.delete()
+
+    def run_wsgi(self, headers, **options):
+        '''Sends the requests from a pool of threads, each with a client.
+
+        Returns: tuple of the total seconds and each request's seconds
+        '''
+        def worker(count):
+            client = Client(headers=headers)
+            latencies = []
+            for _ in range(count):
+                start = time.perf_counter()
+                response = client.get(options['url'])
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.status_code
+            connection.close()
+            return latencies
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = executor.map(worker, self.split(options['requests'], options['concurrency']))
+            latencies = [latency for result in results for latency in result]
+        return time.perf_counter() - start, latencies
+
+    async def run_asgi(self, headers, **options):
+        '''Sends the requests from concurrent tasks on one event loop.
+
+        Returns: tuple of the total seconds and each request's seconds
+        '''
+        async def worker(count):
+            client = AsyncClient()
+            latencies = []
+            for _ in range(count):
+                start = time.perf_counter()
+                response = await client.get(options['url'], headers=headers)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.status_code
+            return latencies
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            worker(count) for count in self.split(options['requests'], options['concurrency'])])
+        latencies = [latency for result in results for latency in result]
+        return time.perf_counter() - start, latencies
+
+    def split(self, total, parts):
+        '''Splits a number of requests as evenly as possible between workers.'''
+        return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+    def report(self, label, result):
+        elapsed, latencies = result
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"{label:<18} {len(latencies) / elapsed:8.1f} req/s, "
+            f"p50 {statistics.median(latencies) * 1000:7.1f} ms, "
+            f"p95 {p95 * 1000:7.1f} ms")
@@ -0,0 +1,45 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+from dramapi.views import UserViewSet
+
+
+class Command(BaseCommand):
+    help = 'Measures login throughput for one or more PBKDF2 iteration counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, nargs='+',
+                            help='PBKDF2 iteration counts to compare; defaults to the configured one.')
+        parser.add_argument('--logins', type=int, default=20,
+                            help='Number of logins timed for each iteration count.')
+
+    def handle(self, *args, **options):
+        iteration_counts = options['iterations'] or [None]
+        login = UserViewSet.as_view({'post': 'user_login'})
+        factory = APIRequestFactory()
+        credentials = {'username': 'benchmark_login', 'password': 'benchmark password'}
+
+        for iterations in iteration_counts:
+            # Create the user inside a transaction that's rolled back afterwards.
+            with override_settings(DRAM_PASSWORD_ITERATIONS=iterations), transaction.atomic():
+                user = User.objects.create_user(**credentials)
+                Token.objects.create(user=user)
+
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    for _ in range(options['logins']):
+                        response = login(factory.post('/login', credentials, format='json'))
+                        assert response.status_code == 200, response.data
+                    elapsed = time.perf_counter() - start
+
+                transaction.set_rollback(True)
+
+            label = iterations or 'default'
+            self.stdout.write(
+                f"{label:>10} iterations: {elapsed / options['logins'] * 1000:7.1f} ms/login, "
+                f"{options['logins'] / elapsed:7.1f} logins/s, "
+                f"{len(queries) / options['logins']:.0f} queries/login")
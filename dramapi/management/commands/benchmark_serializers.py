@@ -0,0 +1,73 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from dramapi.models import Color, Entry, Rating, Type
+from dramapi.views.entries import EntrySerializer, FastEntrySerializer
+
+
+class Command(BaseCommand):
+    help = 'Compares how long EntrySerializer and FastEntrySerializer take to serialize a list of entries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=1000,
+                            help='Number of entries to serialize.')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Number of times to serialize them; the best run is reported.')
+
+    def handle(self, *args, **options):
+        # Create the entries inside a transaction that's rolled back afterwards.
+        with transaction.atomic():
+            user = User.objects.create_user(username='benchmark_serializers')
+            whiskey_type = Type.objects.first()
+            color = Color.objects.first()
+            rating = Rating.objects.first()
+            Entry.objects.bulk_create([
+                Entry(
+                    user=user,
+                    whiskey=f"Benchmark Whiskey {i}",
+                    whiskey_type=whiskey_type,
+                    country="Scotland",
+                    age_in_years=12,
+                    proof=92.4,
+                    color=color,
+                    nose="honey, heather",
+                    palate="malt, orange peel",
+                    rating=rating,
+                )
+                for i in range(options['entries'])
+            ])
+
+            request = APIRequestFactory().get('/entries')
+            request.user = user
+            context = {'request': request}
+            entries = Entry.objects.with_related(user).filter(user=user).order_by(
+                '-publication_date', '-id')
+
+            slow = self.best_of(options['repeat'], lambda: EntrySerializer(
+                entries.all(), many=True, context=context).data)
+            fast = self.best_of(options['repeat'], lambda: FastEntrySerializer(
+                FastEntrySerializer.values(entries.all()), many=True, context=context).data)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"EntrySerializer:     {slow * 1000:.1f} ms")
+        self.stdout.write(f"FastEntrySerializer: {fast * 1000:.1f} ms")
+        self.stdout.write(f"Speedup:             {slow / fast:.1f}x")
+
+    def best_of(self, repeat, serialize):
+        '''Returns the shortest time, in seconds, taken to query, serialize
+        and render the entries.
+
+        Parameters:
+        repeat (int): number of runs.
+        serialize (function): returns the serialized entries.
+        '''
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            JSONRenderer().render(serialize())
+            times.append(time.perf_counter() - start)
+        return min(times)
@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from dramapi.sqlite import pragma_statements
+
+
+class Command(BaseCommand):
+    help = ('Measures reads made while another thread writes continuously, with '
+            "SQLite's defaults and with the DRAM_SQLITE_PRAGMAS setting, on a scratch database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5,
+                            help='How long to run each profile for.')
+        parser.add_argument('--readers', type=int, default=4,
+                            help='Number of reading threads.')
+        parser.add_argument('--rows-per-write', type=int, default=200,
+                            help='Rows inserted by each write transaction.')
+
+    def handle(self, *args, **options):
+        profiles = [
+            ('default', {}),
+            ('DRAM_SQLITE_PRAGMAS', getattr(settings, 'DRAM_SQLITE_PRAGMAS', {})),
+        ]
+        for label, pragmas in profiles:
+            with tempfile.TemporaryDirectory() as directory:
+                result = self.run(os.path.join(directory, 'benchmark.sqlite3'), pragmas, **options)
+            self.report(label, options['seconds'], **result)
+
+    def connect(self, path, pragmas):
+        '''Opens a connection in autocommit mode, like Django's, with the
+        pragmas applied.'''
+        connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        for statement in pragma_statements(pragmas):
+            connection.execute(statement)
+        return connection
+
+    def run(self, path, pragmas, **options):
+        '''Runs one writer and several readers against a new database.
+
+        Returns: dict of read latencies, writes made and errors hit
+        '''
+        setup = self.connect(path, pragmas)
+        setup.execute('CREATE TABLE entry (id INTEGER PRIMARY KEY, whiskey TEXT, notes TEXT)')
+        setup.executemany('INSERT INTO entry (whiskey, notes) VALUES (?, ?)',
+                          [(f"Whiskey {i}", 'honey, heather, ' * 20) for i in range(10000)])
+        setup.close()
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        result = {'latencies': [], 'writes': 0, 'errors': 0}
+
+        def write():
+            connection = self.connect(path, pragmas)
+            rows = [(f"New whiskey {i}", 'malt, orange peel, ' * 20)
+                    for i in range(options['rows_per_write'])]
+            while not stop.is_set():
+                try:
+                    connection.execute('BEGIN IMMEDIATE')
+                    connection.executemany('INSERT INTO entry (whiskey, notes) VALUES (?, ?)', rows)
+                    connection.execute('COMMIT')
+                    with lock:
+                        result['writes'] += 1
+                except sqlite3.OperationalError:
+                    if connection.in_transaction:
+                        connection.execute('ROLLBACK')
+                    with lock:
+                        result['errors'] += 1
+            connection.close()
+
+        def read():
+            connection = self.connect(path, pragmas)
+            latencies = []
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    connection.execute(
+                        'SELECT id, whiskey, notes FROM entry ORDER BY id DESC LIMIT 20').fetchall()
+                    latencies.append(time.perf_counter() - start)
+                except sqlite3.OperationalError:
+                    with lock:
+                        result['errors'] += 1
+            connection.close()
+            with lock:
+                result['latencies'] += latencies
+
+        threads = [threading.Thread(target=write)] + [
+            threading.Thread(target=read) for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return result
+
+    def report(self, label, seconds, latencies, writes, errors):
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0
+        self.stdout.write(
+            f"{label:<20} {len(latencies) / seconds:9.0f} reads/s, "
+            f"p50 {statistics.median(latencies or [0]) * 1000:6.2f} ms, "
+            f"p99 {p99 * 1000:7.2f} ms, "
+            f"max {(latencies[-1] if latencies else 0) * 1000:7.1f} ms, "
+            f"{writes / seconds:6.1f} writes/s, {errors} locked errors")
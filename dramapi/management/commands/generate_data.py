@@ -0,0 +1,50 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from dramapi.models import Bookmark, Entry
+from dramapi.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = ('Creates synthetic users, entries and bookmarks for load testing: entries per '
+            'user follow a power law and a few entries collect most bookmarks.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Number of users to create.')
+        parser.add_argument('--entries', type=int, default=20000,
+                            help='Number of entries to create.')
+        parser.add_argument('--bookmarks', type=int, default=50000,
+                            help='Number of bookmarks to create.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed of the random numbers; the same seed creates the same data.')
+        parser.add_argument('--prefix', default='synthetic',
+                            help='Start of the generated usernames.')
+        parser.add_argument('--password', default='synthetic password',
+                            help='Password of every generated user.')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete users with the prefix, and their data, first.')
+
+    def handle(self, *args, **options):
+        existing = User.objects.filter(username__startswith=f"{options['prefix']}_")
+        start = time.perf_counter()
+        with transaction.atomic():
+            if options['clear']:
+                existing.delete()
+            elif existing.exists():
+                raise CommandError(
+                    f"Users named {options['prefix']}_* already exist. Use --clear, or another --prefix.")
+            try:
+                users = generate(
+                    options['users'], options['entries'], options['bookmarks'], seed=options['seed'],
+                    prefix=options['prefix'], password=options['password'])
+            except ValueError as error:
+                raise CommandError(str(error)) from error
+
+        user_ids = [user.id for user in users]
+        self.stdout.write(
+            f"Created {len(users)} users, "
+            f"{Entry.objects.filter(user_id__in=user_ids).count()} entries and "
+            f"{Bookmark.objects.filter(user_id__in=user_ids).count()} bookmarks "
+            f"in {time.perf_counter() - start:.1f}s.")
@@ -0,0 +1,42 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from dramapi.importer import InvalidImportFile, import_entries, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Imports a CSV or JSON Lines file of entries for a user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Username of the entries\' author.')
+        parser.add_argument('path', help='Path of the file to import.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='File format; by default, the file extension.')
+        parser.add_argument('--partial', action='store_true',
+                            help='Import the valid rows even if others are invalid.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of entries per INSERT.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist as error:
+            raise CommandError(f"No user named {options['username']}.") from error
+
+        file_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        start = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as file:
+                created, errors = import_entries(
+                    user, read_rows(file, file_format),
+                    partial=options['partial'], batch_size=options['batch_size'])
+        except (OSError, InvalidImportFile) as error:
+            raise CommandError(str(error)) from error
+
+        for error in errors:
+            self.stderr.write(f"Row {error['row']}: {dict(error['errors'])}")
+        if errors and not created:
+            raise CommandError(
+                f"Nothing imported: {len(errors)} invalid rows. Fix them, or use --partial.")
+        self.stdout.write(
+            f"Imported {created} entries in {time.perf_counter() - start:.2f}s; skipped {len(errors)} invalid rows.")
@@ -0,0 +1,266 @@
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+# Metrics of the request being handled, if any.
+current_metrics = ContextVar('dramapi_current_metrics', default=None)
+# Whether queries run now are filling a cache; see cache_fill().
+filling_cache = ContextVar('dramapi_filling_cache', default=False)
+
+
+class QueryBudgetExceeded(Exception):
+    # Raised when an endpoint runs more queries than its budget allows,
+    # if DRAM_QUERY_BUDGET_STRICT is on.
+    pass
+
+
+class RequestMetrics:
+    '''What one request spent its time on.
+
+    Attributes:
+        queries (int): SQL queries run.
+        cache_fill_queries (int): those of them run to fill a cache, which
+            don't count against the endpoint's query budget.
+        db_time (float): seconds spent running them.
+        serialize_time (float): seconds spent rendering the response body.
+        start (float): when the request started, from time.perf_counter().
+    '''
+
+    def __init__(self):
+        self.queries = 0
+        self.cache_fill_queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.start = time.perf_counter()
+
+    @property
+    def budgeted_queries(self):
+        '''Queries that count against the endpoint's query budget.'''
+        return self.queries - self.cache_fill_queries
+
+    def server_timing(self, total):
+        '''Returns the metrics as a Server-Timing header value.
+
+        Parameters:
+        total (float): seconds the whole request took.
+        '''
+        return (f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries", '
+                f'serialize;dur={self.serialize_time * 1000:.1f}, '
+                f'total;dur={total * 1000:.1f}')
+
+
+def record_query(execute, sql, params, many, context):
+    '''Database execute wrapper that counts and times queries for the
+    current request. Installed on every connection by signals.py.'''
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        if filling_cache.get():
+            metrics.cache_fill_queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+@contextmanager
+def cache_fill():
+    '''Leaves the queries run inside out of the current request's query
+    budget. For one-off loads of process-wide caches, which whichever
+    request finds the cache cold pays for.'''
+    token = filling_cache.set(True)
+    try:
+        yield
+    finally:
+        filling_cache.reset(token)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    '''Adds record_query to each new connection. Connected to Django's
+    connection_created signal.'''
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Histogram:
+    '''Counts of values falling under each of a list of bounds.
+
+    Attributes:
+        bounds (tuple): upper bounds of the buckets, ascending; values
+            above the last bound go in a final '+Inf' bucket.
+    '''
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def snapshot(self):
+        labels = [str(bound) for bound in self.bounds] + ['+Inf']
+        return {
+            'sum': round(self.total, 3),
+            'max': round(self.max, 3),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class EndpointMetrics:
+    '''Histograms of one endpoint's requests.'''
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.histograms = {
+            'duration_ms': Histogram((5, 10, 25, 50, 100, 250, 500, 1000, 2500)),
+            'db_ms': Histogram((1, 5, 10, 25, 50, 100, 250, 500, 1000)),
+            'serialize_ms': Histogram((1, 5, 10, 25, 50, 100, 250, 500, 1000)),
+            'queries': Histogram((0, 1, 2, 3, 5, 10, 20, 50, 100)),
+            'response_bytes': Histogram((1000, 10000, 100000, 1000000, 10000000)),
+        }
+
+    def add(self, metrics, total, size, status_code):
+        self.count += 1
+        if status_code >= 500:
+            self.errors += 1
+        self.histograms['duration_ms'].add(total * 1000)
+        self.histograms['db_ms'].add(metrics.db_time * 1000)
+        self.histograms['serialize_ms'].add(metrics.serialize_time * 1000)
+        self.histograms['queries'].add(metrics.queries)
+        if size is not None:
+            self.histograms['response_bytes'].add(size)
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            **{name: histogram.snapshot() for name, histogram in self.histograms.items()},
+        }
+
+
+class MetricsRegistry:
+    '''Per-endpoint metrics aggregated since the process started, or since
+    they were last reset.'''
+
+    def __init__(self):
+        self._lock = Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, metrics, total, size, status_code):
+        '''Adds a request's metrics to its endpoint's histograms.
+
+        Parameters:
+        endpoint (str): e.g. 'GET entry-list'.
+        metrics (obj): the request's RequestMetrics.
+        total (float): seconds the whole request took.
+        size (int): bytes in the response body, or None if it was streamed.
+        status_code (int): the response's status code.
+        '''
+        with self._lock:
+            self._endpoints.setdefault(endpoint, EndpointMetrics()).add(
+                metrics, total, size, status_code)
+
+    def snapshot(self):
+        '''Returns every endpoint's metrics.
+
+        Returns: dict of {endpoint: dict}
+        '''
+        with self._lock:
+            return {endpoint: metrics.snapshot()
+                    for endpoint, metrics in sorted(self._endpoints.items())}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+metrics_registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    '''Records each request's query count, database time, serialization
+    time and response size.
+
+    The numbers are added to metrics_registry, sent back in a Server-Timing
+    header if DRAM_SERVER_TIMING is on, and checked against the endpoint's
+    budget in DRAM_QUERY_BUDGETS. Should come first in MIDDLEWARE, so every
+    query is counted.
+    '''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.start
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+        size = None if response.streaming else len(response.content)
+        metrics_registry.record(
+            f'{request.method} {view_name}', metrics, total, size, response.status_code)
+
+        if getattr(settings, 'DRAM_SERVER_TIMING', True):
+            response['Server-Timing'] = metrics.server_timing(total)
+
+        budget = getattr(settings, 'DRAM_QUERY_BUDGETS', {}).get(view_name)
+        if budget is not None and metrics.budgeted_queries > budget:
+            message = (f'{request.method} {request.get_full_path()} ran '
+                       f'{metrics.budgeted_queries} queries, over the budget of {budget} '
+                       f'for {view_name}')
+            if getattr(settings, 'DRAM_QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class TimedJSONRenderer(JSONRenderer):
+    '''JSONRenderer that adds the time it takes to the current request's
+    serialization time.'''
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics = current_metrics.get()
+            if metrics is not None:
+                metrics.serialize_time += time.perf_counter() - start
+
@@ -0,0 +1,49 @@
+# Generated by Django 5.0 on 2026-10-18 14:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_bookmarks(apps, schema_editor):
+    # Keep the oldest bookmark for each (user, entry) pair so the
+    # unique constraint can be added.
+    Bookmark = apps.get_model('dramapi', 'Bookmark')
+    keep = Bookmark.objects.values('user', 'entry').annotate(
+        keep_id=Min('id')).values('keep_id')
+    Bookmark.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dramapi', '0008_bookmark'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['-publication_date', '-id'], name='entry_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['user', '-publication_date', '-id'], name='entry_user_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('published', True)), fields=['-publication_date', '-id'], name='entry_published_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_bookmarks,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bookmark',
+            constraint=models.UniqueConstraint(fields=('user', 'entry'), name='bookmark_user_entry_unique'),
+        ),
+        migrations.AlterField(
+            model_name='bookmark',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='bookmarks', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0 on 2026-10-18 15:00
+
+from django.db import migrations
+
+FIELDS = 'whiskey, mash_bill, nose, palate, finish, notes'
+NEW_VALUES = 'new.whiskey, new.mash_bill, new.nose, new.palate, new.finish, new.notes'
+OLD_VALUES = 'old.whiskey, old.mash_bill, old.nose, old.palate, old.finish, old.notes'
+
+
+def create_search_index(apps, schema_editor):
+    # Only SQLite has FTS5; PostgreSQL uses the index from migration 0012.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in [
+        # External content table: the text stays in dramapi_entry only.
+        f"CREATE VIRTUAL TABLE dramapi_entry_fts USING fts5({FIELDS}, content='dramapi_entry', content_rowid='id', tokenize='porter unicode61')",
+        f"""CREATE TRIGGER dramapi_entry_fts_insert AFTER INSERT ON dramapi_entry BEGIN
+            INSERT INTO dramapi_entry_fts(rowid, {FIELDS}) VALUES (new.id, {NEW_VALUES});
+        END""",
+        f"""CREATE TRIGGER dramapi_entry_fts_delete AFTER DELETE ON dramapi_entry BEGIN
+            INSERT INTO dramapi_entry_fts(dramapi_entry_fts, rowid, {FIELDS}) VALUES ('delete', old.id, {OLD_VALUES});
+        END""",
+        f"""CREATE TRIGGER dramapi_entry_fts_update AFTER UPDATE ON dramapi_entry BEGIN
+            INSERT INTO dramapi_entry_fts(dramapi_entry_fts, rowid, {FIELDS}) VALUES ('delete', old.id, {OLD_VALUES});
+            INSERT INTO dramapi_entry_fts(rowid, {FIELDS}) VALUES (new.id, {NEW_VALUES});
+        END""",
+        # Index the existing entries.
+        "INSERT INTO dramapi_entry_fts(dramapi_entry_fts) VALUES ('rebuild')",
+    ]:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in [
+        "DROP TRIGGER IF EXISTS dramapi_entry_fts_insert",
+        "DROP TRIGGER IF EXISTS dramapi_entry_fts_delete",
+        "DROP TRIGGER IF EXISTS dramapi_entry_fts_update",
+        "DROP TABLE IF EXISTS dramapi_entry_fts",
+    ]:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dramapi', '0009_entry_indexes_bookmark_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 16:00
+
+from django.db import migrations
+
+# Must match PostgresFTSBackend.document for the index to be used.
+DOCUMENT = ("to_tsvector('english', coalesce(whiskey, '') || ' ' || coalesce(mash_bill, '') || ' ' || "
+            "coalesce(nose, '') || ' ' || coalesce(palate, '') || ' ' || coalesce(finish, '') || ' ' || "
+            "coalesce(notes, ''))")
+
+
+def create_search_index(apps, schema_editor):
+    # SQLite searches the FTS5 table from migration 0011 instead.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f"CREATE INDEX entry_search_idx ON dramapi_entry USING GIN ({DOCUMENT})")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS entry_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dramapi', '0011_entry_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
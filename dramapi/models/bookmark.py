@@ -5,5 +5,14 @@ from django.contrib.auth.models import User
 class Bookmark(models.Model):
     entry = models.ForeignKey(
         "Entry", on_delete=models.CASCADE, related_name='bookmarks')
+    # Lookups by user are served by the unique (user, entry) index below.
     user = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name='bookmarks')
+        User, on_delete=models.CASCADE, related_name='bookmarks', db_index=False)
+
+    class Meta:
+        constraints = [
+            # A user can bookmark an entry only once. The index behind this
+            # constraint also serves looking up a user's bookmarks.
+            models.UniqueConstraint(fields=['user', 'entry'],
+                                    name='bookmark_user_entry_unique'),
+        ]
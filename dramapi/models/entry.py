@@ -1,5 +1,36 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .bookmark import Bookmark
+
+
+class EntryQuerySet(models.QuerySet):
+    # QuerySet for the Entry model.
+
+    def with_related(self, user=None):
+        '''Loads each entry's author in the same query, so serializing the
+        entries doesn't cost one query per row. Types, colors and ratings
+        are served from the reference cache.
+
+        Also annotates each entry with `bookmark_count`, how many bookmarks
+        it has, and `is_bookmarked_by_me`, whether the user bookmarked it,
+        as subqueries that use the bookmark indexes.
+
+            Parameters:
+            user (obj): the request user, or None.
+
+            Returns: QuerySet
+        '''
+        bookmarks = Bookmark.objects.filter(entry=OuterRef('pk'))
+        bookmark_count = bookmarks.order_by().values('entry').annotate(
+            count=Count('id')).values('count')
+        return self.select_related('user').annotate(
+            bookmark_count=Coalesce(
+                Subquery(bookmark_count, output_field=models.IntegerField()), 0),
+            is_bookmarked_by_me=Exists(
+                bookmarks.filter(user_id=getattr(user, 'id', None))),
+        )
 
 
 class Entry(models.Model):
@@ -27,3 +58,19 @@ class Entry(models.Model):
     publication_date = models.DateField(auto_now_add=True)
     image_url = models.CharField(max_length=300, blank=True, null=True)
     published = models.BooleanField(default=False)
+
+    objects = EntryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # The feed, newest first.
+            models.Index(fields=['-publication_date', '-id'],
+                         name='entry_pub_date_idx'),
+            # A user's entries, newest first.
+            models.Index(fields=['user', '-publication_date', '-id'],
+                         name='entry_user_pub_date_idx'),
+            # Published entries, newest first.
+            models.Index(fields=['-publication_date', '-id'],
+                         condition=models.Q(published=True),
+                         name='entry_published_idx'),
+        ]
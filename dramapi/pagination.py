@@ -0,0 +1,146 @@
+import base64
+import json
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class InvalidCursor(Exception):
+    # Raised when a client sends a cursor that can't be decoded.
+    pass
+
+
+class KeysetPagination:
+    '''Opt-in cursor pagination over a descending ordering.
+
+    Pages are selected by filtering on the ordering fields of the last
+    row of the previous page rather than by OFFSET, so every page costs
+    the same to fetch no matter how deep into the list it is.
+
+    Attributes:
+        ordering (tuple): model field names to order by, in descending order.
+            The last field must be unique, e.g. 'id'.
+        default_page_size (int): page size used when none is requested.
+        max_page_size (int): upper bound on a requested page size.
+    '''
+
+    def __init__(self, ordering, default_page_size=None, max_page_size=None):
+        self.ordering = ordering
+        self.default_page_size = default_page_size or getattr(
+            settings, 'DRAM_PAGE_SIZE', 20)
+        self.max_page_size = max_page_size or getattr(
+            settings, 'DRAM_MAX_PAGE_SIZE', 100)
+        self.page_size = None
+        self.next_cursor = None
+
+    def is_requested(self, request):
+        '''Returns whether the client opted in to pagination.
+
+        Parameters:
+        request (obj): an instance of Django class HttpRequest,
+        representing the incoming HTTP request.
+
+        Returns: bool
+        '''
+        return 'cursor' in request.query_params or 'page_size' in request.query_params
+
+    def order(self, queryset):
+        '''Returns the queryset in this paginator's ordering.'''
+        return queryset.order_by(*[f'-{field}' for field in self.ordering])
+
+    def paginate_queryset(self, queryset, request):
+        '''Returns one page of the queryset as a list.
+
+        Parameters:
+        queryset (obj): QuerySet to paginate.
+        request (obj): an instance of Django class HttpRequest,
+        representing the incoming HTTP request.
+
+        Returns: list of model instances
+
+        Raises: InvalidCursor if the cursor or page size is malformed.
+        '''
+        return self.get_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        '''Async version of paginate_queryset().'''
+        return self.get_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        '''Returns the queryset narrowed to the requested page plus one row,
+        which tells whether there's another page.'''
+        self.page_size = self.get_page_size(request)
+        queryset = self.order(queryset)
+
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            queryset = queryset.filter(
+                self.after(self.decode_cursor(cursor, queryset.model)))
+
+        return queryset[:self.page_size + 1]
+
+    def get_page(self, rows):
+        '''Returns the rows fetched for a page without the extra row, and
+        remembers the cursor of the next page if there is one.'''
+        page = rows[:self.page_size]
+        self.next_cursor = None
+        if len(rows) > self.page_size:
+            self.next_cursor = self.encode_cursor(page[-1])
+        return page
+
+    def get_paginated_data(self, data):
+        '''Wraps a serialized page with the cursor for the next page.'''
+        return {'results': data, 'next': self.next_cursor}
+
+    def get_paginated_response(self, data):
+        '''Returns a response with a serialized page and the cursor for the next page.'''
+        return Response(self.get_paginated_data(data))
+
+    def get_invalid_cursor_response(self):
+        '''Returns the response sent for a malformed cursor or page size.'''
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get('page_size')
+        if page_size is None:
+            return self.default_page_size
+        try:
+            page_size = int(page_size)
+        except ValueError as error:
+            raise InvalidCursor() from error
+        if page_size < 1:
+            raise InvalidCursor()
+        return min(page_size, self.max_page_size)
+
+    def after(self, values):
+        '''Builds a filter matching the rows that come after `values`
+        in descending order, e.g. for ('publication_date', 'id'):
+        publication_date < d OR (publication_date = d AND id < i)
+        '''
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            ties = {name: values[name] for name in self.ordering[:index]}
+            condition |= Q(**ties, **{f'{field}__lt': values[field]})
+        return condition
+
+    def encode_cursor(self, instance):
+        # Rows from `.values()` querysets are dicts.
+        if isinstance(instance, dict):
+            values = [str(instance[field]) for field in self.ordering]
+        else:
+            values = [str(getattr(instance, field)) for field in self.ordering]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.ordering):
+                raise InvalidCursor()
+            return {
+                field: model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            }
+        except (ValueError, TypeError, ValidationError) as error:
+            raise InvalidCursor() from error
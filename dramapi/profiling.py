@@ -0,0 +1,390 @@
+import concurrent.futures.thread
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from dramapi.metrics import current_metrics
+
+# Profile of the request being handled, if it's being profiled.
+current_profile = ContextVar('dramapi_current_profile', default=None)
+
+# Most SQL statements and stacks kept in one profile.
+MAX_STATEMENTS = 500
+MAX_STACKS = 100
+
+# Innermost functions of a thread waiting for work, rather than doing it.
+IDLE_CODE = {
+    concurrent.futures.thread._worker.__code__,
+    threading.Condition.wait.__code__,
+}
+
+
+class RequestProfile:
+    '''What is collected while profiling one request.
+
+    Attributes:
+        statements (list): dicts of each SQL statement run and its duration.
+        stacks (Counter): number of samples of each stack, if stack sampling.
+    '''
+
+    def __init__(self):
+        self.statements = []
+        self.stacks = Counter()
+
+
+def record_statement(execute, sql, params, many, context):
+    '''Database execute wrapper that keeps the SQL of the current request's
+    statements, if it's being profiled. Installed on every connection by
+    signals.py. Parameters aren't kept, as they may hold passwords.'''
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if len(profile.statements) < MAX_STATEMENTS:
+            profile.statements.append({
+                'sql': sql,
+                'many': many,
+                'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+
+def install_statement_recorder(sender, connection, **kwargs):
+    '''Adds record_statement to each new connection. Connected to Django's
+    connection_created signal.'''
+    if record_statement not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_statement)
+
+
+def collapse_stack(frame, limit=100):
+    '''Returns a frame's stack, outermost call first, in the collapsed
+    format flame graph tools read: "func (file:line);func (file:line)".'''
+    calls = []
+    while frame is not None and len(calls) < limit:
+        code = frame.f_code
+        calls.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(calls))
+
+
+class StackSampler:
+    '''Samples the stacks of the threads handling profiled requests from a
+    background thread, every DRAM_PROFILE_INTERVAL_MS.
+
+    Unlike cProfile, this costs the request next to nothing, so it can run
+    on every request to catch the ones over DRAM_PROFILE_SLOW_MS.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        # Thread ids, and the profiles to count their stacks in.
+        self._profiles = {}
+
+    def start(self, profile, thread_id=None, skip_idle=False):
+        '''Starts sampling a thread into a RequestProfile.
+
+        Parameters:
+        profile (obj): RequestProfile to count the stacks in.
+        thread_id (int): thread to sample; the current thread by default.
+        skip_idle (bool): whether to leave out samples of the thread waiting
+            for work, for threads that only run part of the request.
+        '''
+        with self._lock:
+            self._profiles[thread_id or threading.get_ident()] = (profile, skip_idle)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='dramapi-stack-sampler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, thread_id=None, profile=None):
+        '''Stops sampling a thread, the current thread by default. With a
+        profile, only stops if the thread is still sampled into it.'''
+        thread_id = thread_id or threading.get_ident()
+        with self._lock:
+            if profile is None or self._profiles.get(thread_id, (None,))[0] is profile:
+                self._profiles.pop(thread_id, None)
+
+    def sample(self):
+        '''Counts the current stack of each sampled thread once.'''
+        frames = sys._current_frames()
+        with self._lock:
+            for thread_id, (profile, skip_idle) in self._profiles.items():
+                frame = frames.get(thread_id)
+                if frame is None or (skip_idle and frame.f_code in IDLE_CODE):
+                    continue
+                profile.stacks[collapse_stack(frame)] += 1
+
+    def _run(self):
+        while True:
+            with self._lock:
+                idle = not self._profiles
+                if idle:
+                    self._wake.clear()
+            if idle:
+                self._wake.wait()
+                continue
+            time.sleep(getattr(settings, 'DRAM_PROFILE_INTERVAL_MS', 5) / 1000)
+            self.sample()
+
+
+stack_sampler = StackSampler()
+
+
+class ProfileStore:
+    '''Keeps the slowest profiles as JSON files in a directory, dropping the
+    fastest once there are more than `keep`.
+
+    Files are named after the request's duration, so finding the fastest
+    doesn't mean reading them. Processes may share the directory.
+
+    Attributes:
+        directory (str): where the profiles are saved.
+        keep (int): most profiles kept.
+    '''
+
+    ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+    NAME_PATTERN = re.compile(r'(\d{12})-([0-9a-f]{32})\.json')
+
+    def __init__(self, directory, keep):
+        self.directory = str(directory)
+        self.keep = keep
+
+    def files(self):
+        '''Returns tuples of the duration in microseconds, id and path of
+        each saved profile, slowest first.'''
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        files = []
+        for name in names:
+            match = self.NAME_PATTERN.fullmatch(name)
+            if match:
+                files.append((int(match[1]), match[2], os.path.join(self.directory, name)))
+        return sorted(files, reverse=True)
+
+    def save(self, profile):
+        '''Saves a profile, unless the store is full of slower ones.
+
+        Parameters:
+        profile (dict): must have an 'id' and a 'duration_ms'.
+
+        Returns: True if the profile was saved
+        '''
+        duration = min(int(profile['duration_ms'] * 1000), 10 ** 12 - 1)
+        files = self.files()
+        if len(files) >= self.keep and duration <= files[self.keep - 1][0]:
+            return False
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{duration:012d}-{profile['id']}.json")
+        # Write to a temporary file first, so readers never see half a profile.
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(profile, file)
+        os.replace(temporary, path)
+
+        for _, _, old_path in self.files()[self.keep:]:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                # Another process removed it first.
+                pass
+        return True
+
+    def path(self, profile_id):
+        if not self.ID_PATTERN.fullmatch(str(profile_id)):
+            return None
+        for _, file_id, path in self.files():
+            if file_id == profile_id:
+                return path
+        return None
+
+    def get(self, profile_id):
+        '''Returns a saved profile, or None if there's no such profile.'''
+        path = self.path(profile_id)
+        if path is None:
+            return None
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def all(self):
+        '''Returns every saved profile, slowest first.'''
+        profiles = []
+        for _, _, path in self.files():
+            try:
+                with open(path, encoding='utf-8') as file:
+                    profiles.append(json.load(file))
+            except FileNotFoundError:
+                pass
+        return profiles
+
+    def delete(self, profile_id):
+        '''Deletes a saved profile.
+
+        Returns: True if there was such a profile
+        '''
+        path = self.path(profile_id)
+        if path is None:
+            return False
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+
+def get_profile_store():
+    '''Returns the store set by DRAM_PROFILE_DIR and DRAM_PROFILE_KEEP.'''
+    directory = getattr(settings, 'DRAM_PROFILE_DIR', None) or os.path.join(
+        tempfile.gettempdir(), 'dramapi-profiles')
+    return ProfileStore(directory, getattr(settings, 'DRAM_PROFILE_KEEP', 20))
+
+
+class ProfilingMiddleware:
+    '''Profiles a sample of requests, and any request slower than a
+    threshold, and saves the slowest profiles to get_profile_store().
+
+    A DRAM_PROFILE_SAMPLE_RATE fraction of requests run under cProfile.
+    With DRAM_PROFILE_SLOW_MS set, the other requests have their stacks
+    sampled, and are saved if they take that long. Both are off by default.
+
+    Each profile has the request's SQL and the database and serialization
+    time measured by MetricsMiddleware, which should come before this.
+
+    Under ASGI, cProfile can't follow a request between threads, so every
+    profiled request has its stacks sampled instead. The samples come from
+    the thread that runs the request's sync code, such as sync views and
+    the sync parts of the middleware; time spent on the event loop, in async
+    views, only shows in the SQL and durations, as the loop's thread is
+    shared with other requests.
+    '''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def choose(self):
+        '''Returns whether to profile the next request under cProfile, and
+        the DRAM_PROFILE_SLOW_MS threshold.'''
+        sample_rate = getattr(settings, 'DRAM_PROFILE_SAMPLE_RATE', 0)
+        sampled = bool(sample_rate) and random.random() < sample_rate
+        return sampled, getattr(settings, 'DRAM_PROFILE_SLOW_MS', None)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        sampled, slow_ms = self.choose()
+        if not sampled and slow_ms is None:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        profiler = cProfile.Profile() if sampled else None
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Another profiler is running in this thread.
+                    profiler = None
+            if profiler is None:
+                stack_sampler.start(profile)
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                else:
+                    stack_sampler.stop()
+        finally:
+            current_profile.reset(token)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if sampled or duration_ms >= slow_ms:
+            get_profile_store().save(self.build(
+                request, response, profile, profiler, duration_ms,
+                'sampled' if sampled else 'slow'))
+        return response
+
+    async def __acall__(self, request):
+        sampled, slow_ms = self.choose()
+        if not sampled and slow_ms is None:
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            # The thread sync_to_async runs this request's sync code in.
+            thread_id = await sync_to_async(threading.get_ident)()
+            stack_sampler.start(profile, thread_id, skip_idle=True)
+            try:
+                response = await self.get_response(request)
+            finally:
+                stack_sampler.stop(thread_id, profile)
+        finally:
+            current_profile.reset(token)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if sampled or duration_ms >= slow_ms:
+            await sync_to_async(get_profile_store().save)(self.build(
+                request, response, profile, None, duration_ms,
+                'sampled' if sampled else 'slow'))
+        return response
+
+    def build(self, request, response, profile, profiler, duration_ms, reason):
+        '''Returns a profile as a JSON-serializable dict.'''
+        metrics = current_metrics.get()
+        data = {
+            'id': uuid.uuid4().hex,
+            'created': timezone.now().isoformat(),
+            'reason': reason,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view_name': request.resolver_match.view_name if request.resolver_match else None,
+            'status_code': response.status_code,
+            'duration_ms': round(duration_ms, 3),
+            'db_ms': round(sum(statement['duration_ms'] for statement in profile.statements), 3),
+            'serialize_ms': round(metrics.serialize_time * 1000, 3) if metrics else None,
+            'queries': profile.statements,
+        }
+        if profiler is not None:
+            output = io.StringIO()
+            stats = pstats.Stats(profiler, stream=output)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(
+                getattr(settings, 'DRAM_PROFILE_FUNCTIONS', 50))
+            data['profile'] = output.getvalue()
+        else:
+            data['stacks'] = [
+                {'stack': stack, 'samples': count}
+                for stack, count in profile.stacks.most_common(MAX_STACKS)
+            ]
+        return data
@@ -0,0 +1,158 @@
+import time
+from contextvars import ContextVar
+from asgiref.sync import sync_to_async
+from threading import Lock
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from dramapi.metrics import cache_fill
+from dramapi.models import Type, Color, Rating
+
+# Reference data version read once by an async request, so its lookups
+# don't query the cache from the event loop; see ReferenceCache.aversion().
+request_version = ContextVar('dramapi_reference_version', default=None)
+
+
+class SharedVersion:
+    '''A version number kept in Django's cache, so every process can tell
+    when data it has copied into memory has changed. Processes only see
+    each other's changes through a shared cache, such as Redis.
+
+    Attributes:
+        key (str): cache key of the version.
+    '''
+
+    def __init__(self, key):
+        self.key = key
+
+    def get(self):
+        '''Returns the current version.
+
+        Returns: int
+        '''
+        version = cache.get(self.key)
+        if version is None:
+            # Start from the clock so a lost key never repeats an old version.
+            cache.add(self.key, time.time_ns(), timeout=None)
+            version = cache.get(self.key)
+        return version
+
+    async def aget(self):
+        '''Async version of get().'''
+        version = await cache.aget(self.key)
+        if version is None:
+            await cache.aadd(self.key, time.time_ns(), timeout=None)
+            version = await cache.aget(self.key)
+        return version
+
+    def bump(self):
+        '''Moves to a new version.
+
+        Returns: the new version
+        '''
+        try:
+            return cache.incr(self.key)
+        except ValueError:
+            return self.get()
+
+
+class ReferenceCache:
+    '''In-memory copy of the Type, Color and Rating lookup tables.
+
+    Each process keeps its own copy along with the version it was loaded
+    at. The current version lives in Django's cache and is bumped whenever
+    a lookup row is saved or deleted, which makes every process reload its
+    copy on its next lookup. That takes a cache shared by every process,
+    set with CACHE_URL; see dramapi/checks.py.
+    '''
+
+    models = (Type, Color, Rating)
+
+    def __init__(self):
+        self.shared_version = SharedVersion('dramapi:reference_version')
+        self._lock = Lock()
+        self._version = None
+        self._tables = {}
+
+    def version(self):
+        '''Returns the current version of the reference data, or the one
+        the current async request read.
+
+        Returns: int
+        '''
+        version = request_version.get()
+        if version is None:
+            version = self.shared_version.get()
+        return version
+
+    async def aversion(self):
+        '''Async version of version(). Async views keep the version they
+        read in request_version, so later lookups in the request use it.'''
+        version = request_version.get()
+        if version is None:
+            version = await self.shared_version.aget()
+        return version
+
+    def tables(self):
+        '''Returns the cached rows of every lookup table, reloading them
+        if they have changed since they were last loaded.
+
+        Returns: dict of {model: {pk: instance}}
+        '''
+        version = self.version()
+        if request_version.get() is not None and self._version is not None and self._version > version:
+            # Another request loaded newer data since this one read the version.
+            return self._tables
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    # Read from the primary, so a lagging replica can't be
+                    # cached under the new version.
+                    with cache_fill():
+                        self._tables = {
+                            model: {row.pk: row for row in model.objects.using(DEFAULT_DB_ALIAS).order_by('pk')}
+                            for model in self.models
+                        }
+                    self._version = version
+        return self._tables
+
+    async def atables(self):
+        '''Async version of tables(), which only leaves the event loop when
+        the tables need reloading.'''
+        if await self.aversion() == self._version:
+            return self._tables
+        return await sync_to_async(self.tables)()
+
+    def get(self, model, pk):
+        '''Get a single row of a lookup table.
+
+        Parameters:
+        model (class): Type, Color or Rating.
+        pk (int or str): primary key of the row.
+
+        Returns: instance of model
+
+        Raises: model.DoesNotExist if there is no row with that pk.
+        '''
+        try:
+            return self.tables()[model][model._meta.pk.to_python(pk)]
+        except KeyError as error:
+            raise model.DoesNotExist(
+                f"{model.__name__} matching query does not exist.") from error
+
+    def all(self, model):
+        '''Lists every row of a lookup table, in order by pk.
+
+        Parameters:
+        model (class): Type, Color or Rating.
+
+        Returns: list of instances of model
+        '''
+        return list(self.tables()[model].values())
+
+    def invalidate(self):
+        '''Makes every process reload the lookup tables on its next lookup.'''
+        self._version = None
+        self.shared_version.bump()
+
+
+reference_cache = ReferenceCache()
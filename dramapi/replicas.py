@@ -0,0 +1,207 @@
+import time
+from contextvars import ContextVar
+from threading import Lock
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, router
+from rest_framework.permissions import SAFE_METHODS
+
+# Alias of the replica the current request reads from, or None to read from
+# the primary. One replica serves the whole request, so its reads agree
+# with each other however far behind each replica is.
+replica_reads = ContextVar('dramapi_replica_reads', default=None)
+
+
+def pin_key(user):
+    return f'dramapi:primary_pin:{user.id}'
+
+
+def pin_to_primary(user):
+    '''Sends a user's reads to the primary database for the next
+    DRAM_REPLICA_PIN_SECONDS, so they see their own writes while the
+    replicas catch up. The pin is kept in Django's default cache, which
+    every process must share; see CACHE_URL.'''
+    cache.set(pin_key(user), True, timeout=getattr(settings, 'DRAM_REPLICA_PIN_SECONDS', 5))
+
+
+def is_pinned(user):
+    '''Returns whether a user wrote recently enough to read from the primary.'''
+    return bool(user and user.is_authenticated and cache.get(pin_key(user)))
+
+
+async def ais_pinned(user):
+    '''Async version of is_pinned().'''
+    return bool(user and user.is_authenticated and await cache.aget(pin_key(user)))
+
+
+def use_replicas(request):
+    '''Returns whether a request may read from the replicas: it must be a
+    read, and its user mustn't have written recently.'''
+    return request.method in SAFE_METHODS and not is_pinned(request.user)
+
+
+async def ause_replicas(request):
+    '''Async version of use_replicas().'''
+    return request.method in SAFE_METHODS and not await ais_pinned(request.user)
+
+
+class ReplicaRouter:
+    '''Sends reads to the replica chosen for the request in replica_reads,
+    and everything else to the primary.
+
+    choose() picks the DRAM_READ_REPLICAS database aliases in turn. A
+    replica that can't be connected to is left out for
+    DRAM_REPLICA_RETRY_SECONDS before being tried again. When no replica
+    is available, reads go to the primary.
+    '''
+
+    def __init__(self):
+        self._lock = Lock()
+        self._next = 0
+        # Aliases of ejected replicas, and when to try them again.
+        self._ejected = {}
+
+    def replicas(self):
+        return getattr(settings, 'DRAM_READ_REPLICAS', [])
+
+    def choose(self):
+        '''Returns the next available replica, or None if none is.'''
+        replicas = self.replicas()
+        for _ in range(len(replicas)):
+            with self._lock:
+                alias = replicas[self._next % len(replicas)]
+                self._next += 1
+            if self.is_available(alias):
+                return alias
+        return None
+
+    def db_for_read(self, model, **hints):
+        return replica_reads.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every database holds the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        if db in self.replicas():
+            return False
+        return None
+
+    def is_available(self, alias):
+        '''Returns whether a replica can be read from, ejecting it if it
+        can't be connected to.'''
+        retry_at = self._ejected.get(alias)
+        if retry_at is not None and time.monotonic() < retry_at:
+            return False
+        try:
+            self.check_connection(alias)
+        except DatabaseError:
+            self._ejected[alias] = time.monotonic() + getattr(
+                settings, 'DRAM_REPLICA_RETRY_SECONDS', 30)
+            return False
+        self._ejected.pop(alias, None)
+        return True
+
+    def check_connection(self, alias):
+        '''Connects to a replica if this thread isn't connected already.
+
+        Raises: DatabaseError if the replica can't be reached.
+        '''
+        connections[alias].ensure_connection()
+
+
+def choose_replica(request):
+    '''Returns the replica a request reads from, or None if it must read
+    from the primary: it must be a read, its user mustn't have written
+    recently, and a replica must be available.'''
+    if not use_replicas(request):
+        return None
+    for database_router in router.routers:
+        if isinstance(database_router, ReplicaRouter):
+            return database_router.choose()
+    return None
+
+
+async def achoose_replica(request):
+    '''Async version of choose_replica(). Replicas are checked from the
+    thread the async ORM queries from.'''
+    if not await ause_replicas(request):
+        return None
+    for database_router in router.routers:
+        if isinstance(database_router, ReplicaRouter):
+            return await sync_to_async(database_router.choose)()
+    return None
+
+
+class ReplicaPinMiddleware:
+    '''Pins the request's user to the primary after any successful request
+    with an unsafe method, whichever view handled it. Views that sign a
+    user in, like login, pin that user themselves, as the request had none.
+
+    Must come after AuthenticationMiddleware. DRF views set the user they
+    authenticate on the request, so token users are pinned too.
+    '''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.is_write(request, response):
+            self.pin(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.is_write(request, response):
+            # Writes are handled by sync views anyway, and a session user
+            # may still need loading from the database.
+            await sync_to_async(self.pin)(request)
+        return response
+
+    def is_write(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
+
+    def pin(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user)
+
+
+class ReplicaReadsMixin:
+    '''Lets a ViewSet's read-only actions query a replica, unless the user
+    was pinned to the primary by ReplicaPinMiddleware.
+
+    Attributes:
+        replica_actions (tuple): names of the actions that may read from
+            the replicas.
+    '''
+
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        # Restore the previous value afterwards, e.g. for nested requests.
+        token = replica_reads.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            replica_reads.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        # Authenticate against the primary, then pick one replica for every
+        # read of the action.
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            replica_reads.set(choose_replica(request))
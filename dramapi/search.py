@@ -0,0 +1,153 @@
+import re
+from functools import reduce
+from operator import and_, or_
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+# Entry fields that are searched.
+SEARCH_FIELDS = ['whiskey', 'mash_bill', 'nose', 'palate', 'finish', 'notes']
+
+
+def parse_terms(query):
+    '''Splits a search query into words. A word ending in '*' matches
+    every word starting with it, e.g. 'smok*' matches 'smoky'.
+
+    Parameters:
+    query (str): the search query.
+
+    Returns: list of (word, is_prefix) tuples
+    '''
+    return [(match.group(1), bool(match.group(2)))
+            for match in re.finditer(r'(\w+)(\*?)', query)]
+
+
+class SearchBackend:
+    '''Base class for entry search backends.'''
+
+    def search(self, queryset, query, limit):
+        '''Finds the entries in a queryset that contain every word in a query.
+
+        Parameters:
+        queryset (obj): QuerySet of Entry instances to search.
+        query (str): the search query.
+        limit (int): maximum number of results.
+
+        Returns: list of entry ids, best match first
+        '''
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    '''Searches the SQLite FTS5 index created by migration 0011, which
+    triggers keep in sync with the entry table. Results are ranked by BM25.'''
+
+    table = 'dramapi_entry_fts'
+
+    def search(self, queryset, query, limit):
+        terms = parse_terms(query)
+        if not terms:
+            return []
+        match = ' '.join(f'"{word}"*' if is_prefix else f'"{word}"'
+                         for word, is_prefix in terms)
+
+        sql = f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s'
+        params = [match]
+        # Only search the queryset's entries, if it's filtered.
+        if queryset.query.where:
+            ids_sql, ids_params = queryset.order_by().values(
+                'id').query.sql_with_params()
+            sql += f' AND rowid IN ({ids_sql})'
+            params += ids_params
+        sql += ' ORDER BY rank LIMIT %s'
+        params.append(limit)
+
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresFTSBackend(SearchBackend):
+    '''Searches with PostgreSQL full-text search over the GIN index created
+    by migration 0012, whose expression `document` must match. Words are
+    stemmed like SQLite's porter tokenizer does, and results are ranked by
+    ts_rank.'''
+
+    document = "to_tsvector('english', {})".format(
+        " || ' ' || ".join(f"coalesce({field}, '')" for field in SEARCH_FIELDS))
+
+    def search(self, queryset, query, limit):
+        terms = parse_terms(query)
+        if not terms:
+            return []
+        # Words only contain letters, digits and underscores, so they can't
+        # carry tsquery operators.
+        tsquery = ' & '.join(f'{word}:*' if is_prefix else word
+                             for word, is_prefix in terms)
+
+        sql = f"SELECT id FROM dramapi_entry WHERE {self.document} @@ to_tsquery('english', %s)"
+        params = [tsquery]
+        # Only search the queryset's entries, if it's filtered.
+        if queryset.query.where:
+            ids_sql, ids_params = queryset.order_by().values(
+                'id').query.sql_with_params()
+            sql += f' AND id IN ({ids_sql})'
+            params += ids_params
+        sql += f" ORDER BY ts_rank({self.document}, to_tsquery('english', %s)) DESC, id DESC LIMIT %s"
+        params += [tsquery, limit]
+
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class LikeSearchBackend(SearchBackend):
+    '''Searches with LIKE on databases without a full-text index.
+    Results are in order by publication date, newest first.'''
+
+    def search(self, queryset, query, limit):
+        terms = parse_terms(query)
+        if not terms:
+            return []
+        condition = reduce(and_, [
+            reduce(or_, [Q(**{f'{field}__icontains': word})
+                   for field in SEARCH_FIELDS])
+            for word, _ in terms
+        ])
+        return list(queryset.filter(condition).order_by(
+            '-publication_date', '-id').values_list('id', flat=True)[:limit])
+
+
+def get_search_backend(using='default'):
+    '''Returns the search backend set by DRAM_SEARCH_BACKEND, or by default
+    the full-text backend for SQLite or PostgreSQL and the LIKE backend
+    elsewhere.
+
+    Parameters:
+    using (str): alias of the database being searched.
+
+    Returns: SearchBackend instance
+    '''
+    backend = getattr(settings, 'DRAM_SEARCH_BACKEND', None)
+    if backend:
+        return import_string(backend)()
+    vendor = connections[using].vendor
+    if vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    if vendor == 'postgresql':
+        return PostgresFTSBackend()
+    return LikeSearchBackend()
+
+
+def order_by_rank(rows, ids):
+    '''Sorts entries into the order of a list of search results.
+
+    Parameters:
+    rows (iterable): Entry instances or `.values()` dicts.
+    ids (list): entry ids, best match first.
+
+    Returns: list
+    '''
+    rank = {entry_id: index for index, entry_id in enumerate(ids)}
+    return sorted(rows, key=lambda row: rank[row['id'] if isinstance(row, dict) else row.id])
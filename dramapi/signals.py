@@ -0,0 +1,154 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete
+from rest_framework.authtoken.models import Token
+from dramapi.authentication import token_cache
+from dramapi.autocomplete import whiskey_name_index
+from dramapi.metrics import install_query_recorder
+from dramapi.models import Bookmark, Entry, Type, Color, Rating
+from dramapi.profiling import install_statement_recorder
+from dramapi.reference import reference_cache
+from dramapi.sqlite import apply_pragmas
+from dramapi.versions import bookmarks_changed, entries_changed
+
+
+def invalidate_reference_cache(sender, **kwargs):
+    '''Invalidates the reference cache when a Type, Color or Rating changes.
+
+    Invalidates again once the transaction commits, so no process keeps
+    rows it read before the change was visible.
+    '''
+    reference_cache.invalidate()
+    transaction.on_commit(reference_cache.invalidate)
+
+
+for model in (Type, Color, Rating):
+    post_save.connect(invalidate_reference_cache, sender=model)
+    post_delete.connect(invalidate_reference_cache, sender=model)
+
+
+def autocomplete_values(entry):
+    '''Returns the fields of an entry kept in the whiskey name index.'''
+    return (entry.whiskey, entry.whiskey_type_id, entry.country)
+
+
+def remember_indexed_values(sender, instance, raw=False, **kwargs):
+    '''Reads an entry's indexed fields as they are before it's updated.'''
+    instance._indexed_values = None
+    if not instance._state.adding and not raw:
+        row = Entry.objects.filter(pk=instance.pk).values_list(
+            'whiskey', 'whiskey_type_id', 'country').first()
+        instance._indexed_values = row
+
+
+def update_whiskey_name_index(sender, instance, **kwargs):
+    '''Updates the whiskey name index once a saved entry is committed.'''
+    old = getattr(instance, '_indexed_values', None)
+    new = autocomplete_values(instance)
+    if old != new:
+        transaction.on_commit(lambda: whiskey_name_index.change(old, new))
+
+
+def remove_from_whiskey_name_index(sender, instance, **kwargs):
+    '''Updates the whiskey name index once a deleted entry is committed.'''
+    old = autocomplete_values(instance)
+    transaction.on_commit(lambda: whiskey_name_index.change(old, None))
+
+
+pre_save.connect(remember_indexed_values, sender=Entry)
+post_save.connect(update_whiskey_name_index, sender=Entry)
+post_delete.connect(remove_from_whiskey_name_index, sender=Entry)
+
+
+def change_entry_etags(sender, instance, **kwargs):
+    '''Changes the ETags of an entry, and of the lists that show it, when
+    it's saved or deleted.'''
+    entries_changed([(instance.user_id, instance.pk)])
+
+
+def change_author_etags(sender, instance, created=False, update_fields=None, **kwargs):
+    '''Changes the ETags of a user's entries, which show their name, when
+    the user is changed or deleted. New users have no entries yet, and
+    logging in only updates `last_login`.'''
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    entry_ids = Entry.objects.filter(user_id=instance.pk).values_list('id', flat=True)
+    entries_changed([(instance.pk, None), *((instance.pk, entry_id) for entry_id in entry_ids)])
+
+
+def change_bookmark_etags(sender, instance, **kwargs):
+    '''Changes the ETags of bookmark lists, and of the lists and entry that
+    show the bookmark, when a bookmark is saved or deleted.'''
+    bookmarks_changed([(instance.user_id, instance.entry_id)])
+
+
+post_save.connect(change_entry_etags, sender=Entry)
+post_delete.connect(change_entry_etags, sender=Entry)
+post_save.connect(change_author_etags, sender=User)
+post_delete.connect(change_author_etags, sender=User)
+post_save.connect(change_bookmark_etags, sender=Bookmark)
+post_delete.connect(change_bookmark_etags, sender=Bookmark)
+
+
+# User fields that decide whether, and with which permissions, a cached
+# token authenticates.
+TOKEN_USER_FIELDS = ('password', 'is_active', 'is_staff', 'is_superuser')
+
+
+def check_token_user_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    '''Notes whether a user's save changes any of TOKEN_USER_FIELDS, for
+    invalidate_user_tokens_on_save. Loading fixtures may overwrite any user,
+    so it always counts as a change.'''
+    if raw:
+        instance._changes_tokens = True
+    elif instance._state.adding:
+        instance._changes_tokens = False
+    elif update_fields is not None:
+        instance._changes_tokens = not set(update_fields).isdisjoint(TOKEN_USER_FIELDS)
+    else:
+        saved = User.objects.filter(pk=instance.pk).values(*TOKEN_USER_FIELDS).first()
+        instance._changes_tokens = saved is not None and any(
+            saved[field] != getattr(instance, field) for field in TOKEN_USER_FIELDS)
+
+
+def invalidate_user_tokens(user_id):
+    '''Drops a user's cached tokens in every process now, and again once
+    the transaction commits, so no process keeps a copy read before the
+    change was visible.'''
+    token_cache.invalidate_user(user_id)
+    transaction.on_commit(lambda: token_cache.invalidate_user(user_id))
+
+
+def invalidate_token_on_delete(sender, instance, **kwargs):
+    '''Drops the user's cached tokens when a token is deleted, e.g. on
+    logout.'''
+    invalidate_user_tokens(instance.user_id)
+
+
+def invalidate_user_tokens_on_delete(sender, instance, **kwargs):
+    '''Drops a deleted user's cached tokens.'''
+    invalidate_user_tokens(instance.pk)
+
+
+def invalidate_user_tokens_on_save(sender, instance, **kwargs):
+    '''Drops a user's cached tokens when they're saved with a new password,
+    active status or permissions. Other changes, like registering or
+    editing a profile, leave them alone; the cached copy of the user shows
+    them once its token expires from the cache.'''
+    if instance._changes_tokens:
+        invalidate_user_tokens(instance.pk)
+
+
+post_delete.connect(invalidate_token_on_delete, sender=Token)
+pre_save.connect(check_token_user_fields, sender=User)
+post_save.connect(invalidate_user_tokens_on_save, sender=User)
+post_delete.connect(invalidate_user_tokens_on_delete, sender=User)
+
+
+# Tune each new SQLite connection with settings.DRAM_SQLITE_PRAGMAS.
+connection_created.connect(apply_pragmas)
+# Count and time each request's queries; see dramapi/metrics.py.
+connection_created.connect(install_query_recorder)
+# Keep the SQL of profiled requests; see dramapi/profiling.py.
+connection_created.connect(install_statement_recorder)
@@ -0,0 +1,22 @@
+from django.conf import settings
+
+
+def pragma_statements(pragmas):
+    '''Builds the PRAGMA statements for a dict of SQLite settings.
+
+    Parameters:
+    pragmas (dict): pragma names and values, e.g. {'journal_mode': 'wal'}.
+
+    Returns: list of SQL strings
+    '''
+    return [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    '''Applies the DRAM_SQLITE_PRAGMAS setting to each new SQLite
+    connection. Connected to Django's connection_created signal.'''
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(getattr(settings, 'DRAM_SQLITE_PRAGMAS', {})):
+            cursor.execute(statement)
@@ -0,0 +1,167 @@
+import random
+from itertools import accumulate
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+from dramapi.models import Bookmark, Color, Entry, Rating, Type
+from dramapi.versions import bookmarks_changed, entries_changed
+
+COUNTRIES = [
+    # (country, regions), weighted towards the most reviewed.
+    ('Scotland', ['Speyside', 'Islay', 'Highlands', 'Lowlands', 'Campbeltown']),
+    ('Scotland', ['Speyside', 'Islay', 'Highlands']),
+    ('United States', ['Kentucky', 'Tennessee', 'Texas', 'New York']),
+    ('United States', ['Kentucky']),
+    ('Ireland', ['Cork', 'Antrim', 'Dublin']),
+    ('Japan', ['Hokkaido', 'Osaka', 'Yamanashi']),
+    ('Canada', ['Ontario', 'Alberta']),
+    ('Taiwan', ['Yilan']),
+    ('India', ['Goa', 'Bangalore']),
+]
+DISTILLERIES = ['Glen Arran', 'Ardmore Bay', 'Old Kettle', 'Copper Fox', 'Black Heron',
+                'Stillwater', 'Rye Ridge', 'Kinloch', 'Tall Pines', 'Saltmarsh']
+EXPRESSIONS = ['Single Cask', 'Cask Strength', 'Small Batch', 'Sherry Finish',
+               'Port Wood', 'Peated', 'Bottled in Bond', 'Reserve', 'Distillers Edition']
+NOTES = ['honey', 'heather', 'vanilla', 'caramel', 'smoke', 'peat', 'brine', 'orange peel',
+         'dried fruit', 'cinnamon', 'oak', 'toffee', 'pepper', 'apple', 'leather', 'dark chocolate']
+
+
+def power_law_counts(total, parts, rng, alpha=1.2):
+    '''Splits a total between parts with a power-law distribution, so a few
+    parts get most of it and most get a small share.
+
+    Parameters:
+    total (int): number to split.
+    parts (int): number of parts.
+    rng (obj): random.Random to draw from.
+    alpha (float): shape of the Pareto distribution; lower is more skewed.
+
+    Returns: list of ints adding up to total
+    '''
+    weights = [rng.paretovariate(alpha) for _ in range(parts)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    # Hand out what rounding down left over, to the heaviest parts first.
+    by_weight = sorted(range(parts), key=weights.__getitem__, reverse=True)
+    for i in range(total - sum(counts)):
+        counts[by_weight[i % parts]] += 1
+    return counts
+
+
+def zipf_weights(count, exponent=1.1):
+    '''Returns cumulative weights making the item at rank r about r ** exponent
+    times less likely than the first, for random.choices().'''
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def tasting_notes(rng, count):
+    return ', '.join(rng.sample(NOTES, count))
+
+
+def make_entry(rng, user_id, types, colors, ratings):
+    '''Returns an unsaved Entry with plausible values.'''
+    country, regions = rng.choice(COUNTRIES)
+    age = rng.choice([None, None, 8, 10, 12, 12, 15, 18, 21, 25])
+    return Entry(
+        user_id=user_id,
+        whiskey=' '.join(filter(None, [
+            rng.choice(DISTILLERIES), age and f'{age} Year', rng.choice(EXPRESSIONS)])),
+        whiskey_type_id=rng.choice(types),
+        country=country,
+        part_of_country=rng.choice(regions),
+        age_in_years=age,
+        proof=round(rng.uniform(80, 130), 1),
+        color_id=rng.choice(colors),
+        nose=tasting_notes(rng, 3),
+        palate=tasting_notes(rng, 3),
+        finish=tasting_notes(rng, 2),
+        # Reviews skew towards the good end of the scale.
+        rating_id=rng.choices(ratings, weights=range(1, len(ratings) + 1))[0],
+        notes=tasting_notes(rng, 4) if rng.random() < 0.3 else None,
+        published=rng.random() < 0.8,
+    )
+
+
+def generate(users, entries, bookmarks, seed=0, prefix='synthetic', password='synthetic password',
+             batch_size=1000):
+    '''Creates users with tokens, entries and bookmarks with realistic skew:
+    entries per user follow a power law, and a few popular entries collect
+    most of the bookmarks. The same arguments always create the same data.
+
+    Types, colors and ratings must already be loaded.
+
+    Parameters:
+    users (int): number of users, named f'{prefix}_<n>'.
+    entries (int): number of entries.
+    bookmarks (int): number of bookmarks; fewer are made if users can't
+        bookmark that many distinct entries.
+    seed (int): seed of the random numbers.
+    prefix (str): start of the usernames.
+    password (str): password of every user.
+    batch_size (int): rows inserted per query.
+
+    Returns: list of the created users
+
+    Raises: ValueError if there are no users, a count is negative, or the
+        lookup tables are empty.
+    '''
+    # Check the counts before touching the database; entries are split
+    # between the users, so there must be at least one.
+    if users < 1:
+        raise ValueError('There must be at least 1 user.')
+    if entries < 0 or bookmarks < 0:
+        raise ValueError("The numbers of entries and bookmarks can't be negative.")
+
+    rng = random.Random(seed)
+    types = sorted(Type.objects.values_list('id', flat=True))
+    colors = sorted(Color.objects.values_list('id', flat=True))
+    ratings = list(Rating.objects.order_by('number_rating').values_list('id', flat=True))
+    if not (types and colors and ratings):
+        raise ValueError('Load the types, colors and ratings fixtures first.')
+
+    # Hash the password once; hashing it for every user would take minutes.
+    hashed = make_password(password)
+    created_users = User.objects.bulk_create([
+        User(username=f'{prefix}_{i}', password=hashed, email=f'{prefix}_{i}@example.com',
+             first_name='Synthetic', last_name=f'User {i}')
+        for i in range(users)
+    ], batch_size=batch_size)
+    # SQLite and PostgreSQL set the ids of bulk created rows; fetch them
+    # anywhere else.
+    if created_users and created_users[0].id is None:
+        created_users = list(User.objects.filter(
+            username__in=[user.username for user in created_users]).order_by('id'))
+    Token.objects.bulk_create(
+        [Token(user=user, key=Token.generate_key()) for user in created_users],
+        batch_size=batch_size)
+
+    user_ids = [user.id for user in created_users]
+    Entry.objects.bulk_create([
+        make_entry(rng, user_id, types, colors, ratings)
+        for user_id, count in zip(user_ids, power_law_counts(entries, users, rng))
+        for _ in range(count)
+    ], batch_size=batch_size)
+
+    # Rank entries by popularity in a random order, then draw bookmarks
+    # from a Zipf distribution over the ranks.
+    entry_ids = list(Entry.objects.filter(
+        user_id__in=user_ids).order_by('id').values_list('id', flat=True))
+    rng.shuffle(entry_ids)
+    pairs = set()
+    if entry_ids:
+        bookmarks = min(bookmarks, users * len(entry_ids))
+        weights = zipf_weights(len(entry_ids))
+        # Duplicate pairs are dropped, so draw again for the shortfall, a
+        # bounded number of times in case the popular entries are saturated.
+        for _ in range(20):
+            if len(pairs) >= bookmarks:
+                break
+            for entry_id in rng.choices(entry_ids, cum_weights=weights, k=bookmarks - len(pairs)):
+                pairs.add((rng.choice(user_ids), entry_id))
+    Bookmark.objects.bulk_create(
+        [Bookmark(user_id=user_id, entry_id=entry_id) for user_id, entry_id in sorted(pairs)],
+        batch_size=batch_size)
+    # bulk_create doesn't send signals, so change the ETags here.
+    entries_changed((user_id, None) for user_id in user_ids)
+    bookmarks_changed(pairs)
+    return created_users
@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    '''Test runner that makes requests over their endpoint's query budget
+    in DRAM_QUERY_BUDGETS fail, by raising QueryBudgetExceeded.'''
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.DRAM_QUERY_BUDGET_STRICT = True
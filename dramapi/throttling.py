@@ -0,0 +1,161 @@
+import math
+import time
+from collections import OrderedDict
+from threading import Lock
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+from dramapi.reference import SharedVersion
+
+
+def parse_rate(rate):
+    '''Parses a rate such as '10/min' into a bucket's size and refill rate.
+
+    Parameters:
+    rate (str): requests per second, minute, hour or day, e.g. '10/min'.
+
+    Returns: tuple of the bucket's capacity and the tokens added per second.
+    '''
+    try:
+        count, period = rate.split('/')
+        seconds = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+        count = int(count)
+    except (ValueError, KeyError, IndexError):
+        raise ImproperlyConfigured(f"Invalid rate limit {rate!r}")
+    return count, count / seconds
+
+
+def refill(tokens, updated, now, capacity, refill_rate):
+    '''Takes a token from a bucket, after topping it up for the time passed.
+
+    Returns: tuple of the tokens left, and 0 if the request is allowed or
+    else the seconds until a token is available.
+    '''
+    tokens = min(capacity, tokens + (now - updated) * refill_rate)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / refill_rate
+
+
+class BucketStore:
+    '''Where token buckets are kept.'''
+
+    def take(self, key, capacity, refill_rate):
+        '''Takes a token from a bucket, which starts full.
+
+        Parameters:
+        key (str): identifies the bucket, e.g. 'login:ip:127.0.0.1'.
+        capacity (int): most tokens the bucket holds.
+        refill_rate (float): tokens added per second.
+
+        Returns: tuple of whether the request is allowed and, if not, the
+        seconds until it would be.
+        '''
+        raise NotImplementedError
+
+    def clear(self):
+        '''Refills every bucket.'''
+        raise NotImplementedError
+
+
+class MemoryBucketStore(BucketStore):
+    '''Keeps buckets in this process's memory, so each process enforces its
+    own limits.
+
+    At most `max_buckets` are kept; the least recently used go first, and
+    start full again if they come back.'''
+
+    max_buckets = 10000
+
+    def __init__(self):
+        self._lock = Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key, capacity, refill_rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens, wait = refill(tokens, updated, now, capacity, refill_rate)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return not wait, wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore(BucketStore):
+    '''Keeps buckets in Django's cache, so processes sharing a cache such as
+    Redis or Memcached share their limits. Concurrent requests for the same
+    bucket may occasionally both take its last token.
+
+    Bucket keys carry a shared version, so clearing the store moves to new
+    keys rather than clearing the rest of the cache.'''
+
+    prefix = 'dramapi:bucket:'
+
+    def __init__(self):
+        self.version = SharedVersion('dramapi:bucket_version')
+
+    def take(self, key, capacity, refill_rate):
+        now = time.time()
+        version = self.version.get()
+        tokens, updated = cache.get(self.prefix + key, (capacity, now), version=version)
+        tokens, wait = refill(tokens, updated, now, capacity, refill_rate)
+        # Expire the bucket once it would have refilled completely.
+        cache.set(self.prefix + key, (tokens, now),
+                  timeout=math.ceil(capacity / refill_rate), version=version)
+        return not wait, wait
+
+    def clear(self):
+        # The old buckets expire on their own.
+        self.version.bump()
+
+
+_stores = {}
+
+
+def get_bucket_store():
+    '''Returns this process's instance of the store set by
+    DRAM_RATE_LIMIT_STORE.
+
+    Returns: BucketStore instance
+    '''
+    path = getattr(settings, 'DRAM_RATE_LIMIT_STORE', 'dramapi.throttling.MemoryBucketStore')
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    '''Limits how often each user, or each IP address for anonymous
+    requests, can call a view's actions.
+
+    Views opt in with `throttle_scopes`, mapping action names to keys of
+    the DRAM_RATE_LIMITS setting, e.g. {'create': 'entry_create'}. Requests
+    over the limit get a 429 with a Retry-After header.
+    '''
+
+    def allow_request(self, request, view):
+        self._wait = None
+        scope = getattr(view, 'throttle_scopes', {}).get(getattr(view, 'action', None))
+        rate = getattr(settings, 'DRAM_RATE_LIMITS', {}).get(scope)
+        if rate is None:
+            return True
+
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        allowed, self._wait = get_bucket_store().take(
+            f"{scope}:{ident}", *parse_rate(rate))
+        return allowed
+
+    def wait(self):
+        # Round up, so clients retrying after Retry-After find a token.
+        return math.ceil(self._wait) if self._wait else None
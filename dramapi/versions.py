@@ -0,0 +1,178 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from dramapi.conditional import make_etag
+from dramapi.reference import SharedVersion
+
+# Versions of the data the entry and bookmark ETags are built from. They are
+# bumped whenever the data changes (see signals.py), so building an ETag
+# reads the cache rather than scanning the tables.
+entries_version = SharedVersion('dramapi:entries_version')
+bookmarks_version = SharedVersion('dramapi:bookmarks_version')
+
+
+def entry_version(entry_id):
+    '''Returns the version of one entry, which its ETag is built from.'''
+    return SharedVersion(f'dramapi:entry_version:{entry_id}')
+
+
+def user_entries_version(user_id):
+    '''Returns the version of one user's entries, which the list of their
+    entries is built from.'''
+    return SharedVersion(f'dramapi:user_entries_version:{user_id}')
+
+
+def entry_bookmarks_version(entry_id):
+    '''Returns the version of one entry's bookmarks, which its bookmark
+    count comes from.'''
+    return SharedVersion(f'dramapi:entry_bookmarks_version:{entry_id}')
+
+
+def user_bookmarks_version(user_id):
+    '''Returns the version of one user's bookmarks, which their bookmark
+    list and the `is_bookmarked_by_me` of the entries they see come from.'''
+    return SharedVersion(f'dramapi:user_bookmarks_version:{user_id}')
+
+
+class LaggingVersion:
+    '''A version that follows a SharedVersion, but moves at most once every
+    so many seconds. It's kept in the cache as the value it last moved to
+    and when, and only moves when it's read after the source has changed.
+
+    Attributes:
+        key (str): cache key of the version.
+        source (obj): SharedVersion it follows.
+        max_age_setting (str): setting with the seconds it may lag by.
+    '''
+
+    def __init__(self, key, source, max_age_setting):
+        self.key = key
+        self.source = source
+        self.max_age_setting = max_age_setting
+
+    def follow(self, current, published):
+        '''Returns the value of the version, and what to save in the cache
+        if it moves, or None.
+
+        Parameters:
+        current (int): the source's current value.
+        published (tuple): the value the version last moved to and when,
+            or None if it hasn't been set.
+        '''
+        now = time.time()
+        if published is not None and (
+                published[0] == current or now - published[1] < getattr(settings, self.max_age_setting, 60)):
+            return published[0], None
+        return current, (current, now)
+
+
+# Version of every entry's bookmark count. Lists build their ETags from it
+# rather than from bookmarks_version, so a bookmark doesn't change every
+# list's ETag at once, and the bookmark counts of a list that isn't sent
+# again lag by at most DRAM_BOOKMARK_COUNT_MAX_AGE.
+bookmark_counts_version = LaggingVersion(
+    'dramapi:bookmark_counts_version', bookmarks_version, 'DRAM_BOOKMARK_COUNT_MAX_AGE')
+
+
+def version_keys(parts):
+    # Cache keys of the versions among an ETag's parts.
+    keys = []
+    for part in parts:
+        if isinstance(part, SharedVersion):
+            keys.append(part.key)
+        elif isinstance(part, LaggingVersion):
+            keys += [part.source.key, part.key]
+    return keys
+
+
+def unset_versions(parts, found):
+    # SharedVersions among an ETag's parts that aren't in the cache yet.
+    versions = [part.source if isinstance(part, LaggingVersion) else part for part in parts
+                if isinstance(part, (SharedVersion, LaggingVersion))]
+    return [version for version in versions
+            if isinstance(version, SharedVersion) and version.key not in found]
+
+
+def resolve(parts, found):
+    '''Puts the values of the versions in place of the versions among an
+    ETag's parts.
+
+    Returns: tuple of the values, and a dict of the LaggingVersions that
+        moved, to save in the cache
+    '''
+    values = []
+    moved = {}
+    for part in parts:
+        if isinstance(part, SharedVersion):
+            values.append(found[part.key])
+        elif isinstance(part, LaggingVersion):
+            value, published = part.follow(found[part.source.key], found.get(part.key))
+            if published is not None:
+                moved[part.key] = published
+            values.append(value)
+        else:
+            values.append(part)
+    return values, moved
+
+
+def make_versioned_etag(*parts):
+    '''Builds an ETag like conditional.make_etag(), reading the value of
+    any SharedVersion or LaggingVersion among the parts from the cache in
+    one call.'''
+    found = cache.get_many(version_keys(parts))
+    for version in unset_versions(parts, found):
+        found[version.key] = version.get()
+    values, moved = resolve(parts, found)
+    if moved:
+        cache.set_many(moved, timeout=None)
+    return make_etag(*values)
+
+
+async def amake_versioned_etag(*parts):
+    '''Async version of make_versioned_etag().'''
+    found = await cache.aget_many(version_keys(parts))
+    for version in unset_versions(parts, found):
+        found[version.key] = await version.aget()
+    values, moved = resolve(parts, found)
+    if moved:
+        await cache.aset_many(moved, timeout=None)
+    return make_etag(*values)
+
+
+def bump(*versions):
+    '''Bumps versions now, and again once the transaction commits, so no
+    ETag is built from rows read before the change was visible.'''
+    for version in versions:
+        version.bump()
+
+    def bump_again():
+        for version in versions:
+            version.bump()
+    transaction.on_commit(bump_again)
+
+
+def entries_changed(pairs):
+    '''Marks some entries, and the lists that show them, as changed.
+
+    Parameters:
+    pairs (iterable): (author id, entry id) of each entry added, changed or
+        removed. The entry id may be None for entries that were just added.
+    '''
+    pairs = set(pairs)
+    bump(entries_version,
+         *(user_entries_version(user_id) for user_id in {user_id for user_id, _ in pairs}),
+         *(entry_version(entry_id) for entry_id in {entry_id for _, entry_id in pairs}
+           if entry_id is not None))
+
+
+def bookmarks_changed(pairs):
+    '''Marks the bookmarks of some users and entries as changed.
+
+    Parameters:
+    pairs (iterable): (user id, entry id) of each bookmark added or removed.
+    '''
+    pairs = set(pairs)
+    bump(bookmarks_version,
+         *(user_bookmarks_version(user_id) for user_id in {user_id for user_id, _ in pairs}),
+         *(entry_bookmarks_version(entry_id) for entry_id in {entry_id for _, entry_id in pairs}))
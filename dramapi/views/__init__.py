@@ -5,3 +5,6 @@ from .ratings import RatingViewSet
 from .entries import EntryViewSet
 from .current_user import CurrentUserView
 from .bookmarks import BookmarkViewSet
+from .reference import ReferenceView
+from .metrics import MetricsView
+from .profiles import ProfileViewSet
@@ -0,0 +1,249 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.urls import path
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, permissions, status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from dramapi.authentication import CachedTokenAuthentication
+from dramapi.conditional import add_validators, is_not_modified, not_modified_response
+from dramapi.filters import InvalidFilter
+from dramapi.metrics import TimedJSONRenderer
+from dramapi.models import Bookmark, Entry, Type, Color, Rating
+from dramapi.pagination import KeysetPagination, InvalidCursor
+from dramapi.reference import reference_cache, request_version
+from dramapi.replicas import achoose_replica, replica_reads
+from dramapi.search import get_search_backend, order_by_rank
+from dramapi.versions import amake_versioned_etag
+from .bookmarks import (BookmarkViewSet, bookmark_list_etag_parts, bookmark_list_serializer,
+                        bookmarked_entries)
+from .entries import (EntryList, EntrySerializer, EntryViewSet, FastEntrySerializer,
+                      entry_etag_parts, entry_list_etag_parts)
+from .types import TypeSerializer, TypeViewSet
+from .colors import ColorSerializer
+from .ratings import RatingSerializer
+
+
+class AsyncReadView(View):
+    '''Base for views answering GET requests on the event loop under ASGI,
+    instead of in the single thread Django runs sync views in.
+
+    Views authenticate with the token cache, read versions with the
+    cache's async API and query with Django's async ORM, so cached
+    tokens, 304s and reference data never block the event loop. They
+    share their queries and ETags with the sync views through the helpers
+    in entries.py and bookmarks.py. HEAD requests are answered like GETs.
+    Responses are always rendered as JSON.
+
+    Attributes:
+        authentication (obj): authenticates the request's token.
+        permission_classes (list): DRF permissions the request must pass.
+    '''
+
+    http_method_names = ['get', 'head']
+    authentication = CachedTokenAuthentication()
+    permission_classes = [permissions.IsAuthenticated]
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Wrap the request like DRF does, so the serializers, filters and
+        # paginator shared with the sync views can read it.
+        request = Request(request)
+        try:
+            user_auth = await self.authentication.aauthenticate(request)
+            request.user, request.auth = user_auth or (AnonymousUser(), None)
+            for permission in self.permission_classes:
+                if not permission().has_permission(request, self):
+                    raise exceptions.NotAuthenticated()
+        except exceptions.APIException as error:
+            response = Response({'detail': error.detail}, status=error.status_code)
+            response['WWW-Authenticate'] = self.authentication.authenticate_header(request)
+            return self.render(response)
+        # Read from one replica, unless the user wrote recently. The async
+        # ORM carries the context over to the thread it queries from.
+        token = replica_reads.set(await achoose_replica(request))
+        # Read the reference data version once, for every lookup.
+        version_token = request_version.set(await reference_cache.aversion())
+        try:
+            return self.render(await super().dispatch(request, *args, **kwargs))
+        finally:
+            request_version.reset(version_token)
+            replica_reads.reset(token)
+
+    def render(self, response):
+        '''Renders a Response as JSON.'''
+        response.accepted_renderer = TimedJSONRenderer()
+        response.accepted_media_type = TimedJSONRenderer.media_type
+        response.renderer_context = {}
+        return response.render()
+
+
+class AsyncEntryListView(AsyncReadView):
+
+    async def get(self, request):
+        '''Async version of EntryViewSet.list().'''
+        username = request.query_params.get('username')
+        user = None
+        if username:
+            try:
+                user = await User.objects.aget(username=username)
+            except User.DoesNotExist:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+
+        etag = await amake_versioned_etag(*entry_list_etag_parts(request, user))
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        try:
+            entry_list = EntryList(request, user)
+        except InvalidFilter as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        error_response = entry_list.get_error_response()
+        if error_response:
+            return error_response
+        entries = FastEntrySerializer.values(entry_list.entries)
+        paginator = entry_list.paginator
+        await reference_cache.atables()
+
+        try:
+            if entry_list.query is not None:
+                limit = paginator.get_page_size(request)
+                # The search backends run raw SQL, which has no async API.
+                ids = await sync_to_async(get_search_backend(entries.db).search)(
+                    entries, entry_list.query, limit)
+                rows = order_by_rank(
+                    [row async for row in entries.filter(id__in=ids)], ids)
+            elif paginator.is_requested(request):
+                rows = await paginator.apaginate_queryset(entries, request)
+            else:
+                rows = [row async for row in entries]
+        except InvalidCursor:
+            return paginator.get_invalid_cursor_response()
+        data = FastEntrySerializer(rows, many=True, context={'request': request}).data
+
+        facets = None
+        if entry_list.wants_facets():
+            facets = await sync_to_async(entry_list.filters.facet_counts)(entry_list.unfiltered)
+
+        return add_validators(Response(entry_list.get_data(data, facets)), etag)
+
+
+class AsyncEntryDetailView(AsyncReadView):
+
+    async def get(self, request, pk):
+        '''Async version of EntryViewSet.retrieve().'''
+        etag = await amake_versioned_etag(*entry_etag_parts(request, pk))
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        try:
+            entry = await Entry.objects.with_related(request.user).aget(pk=pk)
+        except Entry.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        await reference_cache.atables()
+        serializer = EntrySerializer(entry, many=False, context={'request': request})
+        return add_validators(Response(serializer.data), etag)
+
+
+class AsyncBookmarkListView(AsyncReadView):
+    permission_classes = [permissions.AllowAny]
+
+    async def get(self, request):
+        '''Async version of BookmarkViewSet.list().'''
+        username = request.query_params.get('username')
+        expansion = request.query_params.get('expand')
+        bookmarks = Bookmark.objects.all().order_by('-id')
+        user = None
+        if username:
+            try:
+                user = await User.objects.aget(username=username)
+            except User.DoesNotExist:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            bookmarks = bookmarks.filter(user=user)
+
+        etag = await amake_versioned_etag(*bookmark_list_etag_parts(request, user, expansion))
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        paginator = KeysetPagination(ordering=('id',))
+        paginated = paginator.is_requested(request)
+        try:
+            if paginated:
+                bookmarks = await paginator.apaginate_queryset(bookmarks, request)
+        except InvalidCursor:
+            return paginator.get_invalid_cursor_response()
+        entries = bookmarked_entries(request, bookmarks)
+        if not paginated:
+            bookmarks = [bookmark async for bookmark in bookmarks]
+
+        entry_rows = None
+        if expansion == 'entry':
+            await reference_cache.atables()
+            entry_rows = [row async for row in entries]
+        data = bookmark_list_serializer(request, bookmarks, expansion, entry_rows).data
+        if paginated:
+            data = paginator.get_paginated_data(data)
+        return add_validators(Response(data, status=status.HTTP_200_OK), etag)
+
+
+class AsyncReferenceListView(AsyncReadView):
+    '''Async version of the Type, Color and Rating list actions.
+
+    Attributes:
+        model (class): Type, Color or Rating.
+        serializer_class (class): serializer for the model.
+    '''
+
+    model = None
+    serializer_class = None
+
+    async def get(self, request):
+        rows = (await reference_cache.atables())[self.model].values()
+        return Response(self.serializer_class(rows, many=True).data)
+
+
+def with_async_reads(async_view, sync_view):
+    '''Returns a view that answers GET and HEAD requests with an async view
+    and passes every other method to a sync view.
+
+    Parameters:
+    async_view (function): view from AsyncReadView.as_view().
+    sync_view (function): view from a ViewSet's as_view(), or None if the
+        endpoint only answers GET and HEAD requests.
+
+    Returns: async view function
+    '''
+    if sync_view is None:
+        return async_view
+    sync_view = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await async_view(request, *args, **kwargs)
+        return await sync_view(request, *args, **kwargs)
+
+    return csrf_exempt(view)
+
+
+# Routes that take over the read endpoints from the router; see
+# dramproject/async_urls.py.
+async_read_urlpatterns = [
+    path('entries', with_async_reads(
+        AsyncEntryListView.as_view(),
+        EntryViewSet.as_view({'post': 'create'})), name='entry-list'),
+    path('entries/<int:pk>', with_async_reads(
+        AsyncEntryDetailView.as_view(),
+        EntryViewSet.as_view({'put': 'update', 'delete': 'destroy'})), name='entry-detail'),
+    path('bookmarks', with_async_reads(
+        AsyncBookmarkListView.as_view(),
+        BookmarkViewSet.as_view({'post': 'create'})), name='bookmark-list'),
+    path('types', with_async_reads(
+        AsyncReferenceListView.as_view(model=Type, serializer_class=TypeSerializer),
+        TypeViewSet.as_view({'post': 'create'})), name='type-list'),
+    path('colors', with_async_reads(
+        AsyncReferenceListView.as_view(model=Color, serializer_class=ColorSerializer),
+        None), name='color-list'),
+    path('ratings', with_async_reads(
+        AsyncReferenceListView.as_view(model=Rating, serializer_class=RatingSerializer),
+        None), name='rating-list'),
+]
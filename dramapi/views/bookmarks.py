@@ -1,8 +1,19 @@
 from rest_framework import viewsets, status, serializers, permissions
+from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from dramapi.conditional import add_validators, is_not_modified, not_modified_response
+from dramapi.filters import MAX_ID
 from dramapi.models import Entry, Bookmark
-from .entries import EntrySerializer
+from dramapi.pagination import KeysetPagination, InvalidCursor
+from dramapi.reference import reference_cache
+from dramapi.replicas import ReplicaReadsMixin
+from dramapi.versions import (bookmark_counts_version, bookmarks_changed, bookmarks_version,
+                              entries_version, make_versioned_etag, user_bookmarks_version)
+from .entries import FastEntrySerializer
 
 
 class BookmarkSerializer(serializers.ModelSerializer):
@@ -31,7 +42,7 @@ class BookmarkSerializer(serializers.ModelSerializer):
 
         '''
 
-        return self.context['request'].user == obj.user
+        return self.context['request'].user.id == obj.user_id
 
 
 class MyBookmarksSerializer(serializers.ModelSerializer):
@@ -44,7 +55,7 @@ class MyBookmarksSerializer(serializers.ModelSerializer):
         is_owner (bool): indicates whether current user is owner of the Bookmark
         '''
 
-    entry = EntrySerializer(many=False)
+    entry = serializers.SerializerMethodField()
     is_owner = serializers.SerializerMethodField()
 
     class Meta:
@@ -52,6 +63,17 @@ class MyBookmarksSerializer(serializers.ModelSerializer):
         fields = ['id', 'entry', 'user', 'is_owner']
         read_only_fields = ['user']
 
+    def get_entry(self, obj):
+        '''Gets the bookmarked Entry from the entries serialized up front.
+
+        Parameters:
+        obj (obj): an instance of the class Bookmark
+
+        Returns: dictionary of the Entry's data, or None if the Entry was
+        deleted between the two queries
+        '''
+        return self.context['entries'].get(obj.entry_id)
+
     def get_is_owner(self, obj):
         '''Checks whether the current user is the owner of the Bookmark
 
@@ -61,12 +83,74 @@ class MyBookmarksSerializer(serializers.ModelSerializer):
         Returns: Boolean
 
         '''
-        return self.context['request'].user == obj.user
-
-
-class BookmarkViewSet(viewsets.ViewSet):
+        return self.context['request'].user.id == obj.user_id
+
+
+def bookmark_list_etag_parts(request, user, expansion):
+    '''Returns what the ETag of a bookmark list is built from, for
+    dramapi.versions.make_versioned_etag(): the versions of the listed
+    bookmarks and, if they're expanded, of the entries and the request
+    user's bookmarks, with bookmark counts lagging as in the entry lists.
+
+    Parameters:
+    request (obj): the request for the list.
+    user (obj): the User whose bookmarks are listed, or None for everyone's.
+    expansion (str): the `expand` query param.
+
+    Returns: tuple
+    '''
+    parts = ['bookmarks', request.get_full_path(), request.user.id, reference_cache.shared_version,
+             user_bookmarks_version(user.id) if user else bookmarks_version]
+    if expansion == 'entry':
+        parts += [entries_version, user_bookmarks_version(request.user.id), bookmark_counts_version]
+    return tuple(parts)
+
+
+def bookmarked_entries(request, bookmarks):
+    '''Returns a QuerySet of the rows FastEntrySerializer reads for the
+    entries of some bookmarks.
+
+    Parameters:
+    request (obj): the request for the bookmarks.
+    bookmarks (obj): a page of Bookmarks as a list, or a QuerySet of them.
+    '''
+    if isinstance(bookmarks, list):
+        entry_ids = [bookmark.entry_id for bookmark in bookmarks]
+    else:
+        entry_ids = bookmarks.values('entry_id')
+    return FastEntrySerializer.values(
+        Entry.objects.with_related(request.user).filter(id__in=entry_ids))
+
+
+def bookmark_list_serializer(request, bookmarks, expansion, entry_rows):
+    '''Returns the serializer of a bookmark list.
+
+    Parameters:
+    request (obj): the request for the list.
+    bookmarks (iterable): the Bookmarks listed.
+    expansion (str): the `expand` query param.
+    entry_rows (iterable): rows of the bookmarked entries from
+        bookmarked_entries(), only read if they're expanded.
+    '''
+    # If 'expand' was included in 'query_params', expand the designated field.
+    if expansion == 'entry':
+        # Serialize each bookmarked entry once, in a single query.
+        context = {'request': request}
+        context['entries'] = {
+            entry['id']: entry for entry in FastEntrySerializer(
+                entry_rows, many=True, context=context).iter_data()
+        }
+        # Serialize the objects, and pass request to determine owner.
+        return MyBookmarksSerializer(bookmarks, many=True, context=context)
+    # Serialize the objects, and pass request to determine owner.
+    return BookmarkSerializer(bookmarks, many=True, context={'request': request})
+
+
+class BookmarkViewSet(ReplicaReadsMixin, viewsets.ViewSet):
     # Allow any user to access, regardless of authentication.
     permission_classes = [permissions.AllowAny]
+    # Rate limit scopes in settings.DRAM_RATE_LIMITS for each action.
+    throttle_scopes = {'create': 'bookmark_create', 'toggle': 'bookmark_create'}
 
     def list(self, request):
         '''Lists Bookmark instances, 
@@ -77,7 +161,9 @@ class BookmarkViewSet(viewsets.ViewSet):
         request (obj): an instance of Django class HttpRequest, 
         representing the incoming HTTP request.
 
-        Returns: List of Bookmark dictionaries with 200 status code'''
+        Returns: List of Bookmark dictionaries with 200 status code, or a page
+        of them with the cursor for the next page if 'cursor' or 'page_size'
+        is included in 'query_params'.'''
 
         # If 'username' is included in 'query_params', assign its value to a variable.
         username = request.query_params.get('username')
@@ -97,49 +183,122 @@ class BookmarkViewSet(viewsets.ViewSet):
             bookmarks = bookmarks.filter(
                 user=user)
 
-        # If 'expand' was included in 'query_params', expand the designated field.
-        if expansion == 'entry':
-            # Serialize the objects, and pass request to determine owner.
-            serializer = MyBookmarksSerializer(
-                bookmarks, many=True, context={'request': request})
-        else:
-            # Serialize the objects, and pass request to determine owner.
-            serializer = BookmarkSerializer(
-                bookmarks, many=True, context={'request': request})
+        # If the client already has this version, don't send it again.
+        etag = make_versioned_etag(*bookmark_list_etag_parts(request, user if username else None, expansion))
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        # If the client asked for a page, get only that page.
+        paginator = KeysetPagination(ordering=('id',))
+        paginated = paginator.is_requested(request)
+        if paginated:
+            try:
+                bookmarks = paginator.paginate_queryset(bookmarks, request)
+            except InvalidCursor:
+                return paginator.get_invalid_cursor_response()
+
+        serializer = bookmark_list_serializer(
+            request, bookmarks, expansion, bookmarked_entries(request, bookmarks))
+        data = serializer.data
+        if paginated:
+            data = paginator.get_paginated_data(data)
 
         # Return the serialized data with 200 status code
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return add_validators(Response(data, status=status.HTTP_200_OK), etag)
 
     def create(self, request):
-        '''Creates a new instance of class Bookmark.
+        '''Creates a new instance of class Bookmark, unless the User has
+        already bookmarked the Entry, so retried requests don't make duplicates.
 
         Parameters:
         request (obj): an instance of Django class HttpRequest, 
         representing the incoming HTTP request.
 
-        Returns: newly created Bookmark instance with 201 status code; 
-        otherwise, Exception with 400 status code.'''
+        Returns: newly created Bookmark instance with 201 status code;
+        the existing Bookmark instance with 200 status code;
+        404 status code if the Entry doesn't exist.'''
 
-        # Assign pk of Entry being bookmarked to a variable.
-        bookmarked_entry = Entry.objects.get(pk=request.data['entryId'])
+        # Find the Entry being bookmarked.
+        try:
+            bookmarked_entry = Entry.objects.only('id').get(pk=request.data['entryId'])
+        except Entry.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
 
-        # Create a new instance of a Bookmark and assign property
-        # values from the request payload using `request.data`
-        bookmark = Bookmark()
-        bookmark.user = request.user
-        bookmark.entry = bookmarked_entry
-        bookmark.save()
+        # Get the User's Bookmark of the Entry, creating it if there isn't one.
+        # The unique constraint on (user, entry) settles concurrent requests.
+        bookmark, created = Bookmark.objects.get_or_create(
+            user=request.user, entry=bookmarked_entry)
 
-        try:
-            # Serialize the objects, and pass request as context
-            serialized = BookmarkSerializer(
-                bookmark, many=False, context={'request': request})
-            # Return the serialized data with 201 status code
-            return Response(serialized.data, status=status.HTTP_201_CREATED)
-
-        except Exception:
-            # If creation of Bookmark fails, return 400 status code.
-            return Response(None, status=status.HTTP_400_BAD_REQUEST)
+        # Serialize the object, and pass request as context
+        serialized = BookmarkSerializer(
+            bookmark, many=False, context={'request': request})
+        # Return the serialized data with 201 status code if it's new.
+        return Response(serialized.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='toggle', permission_classes=[permissions.IsAuthenticated])
+    def toggle(self, request):
+        '''Bookmarks and unbookmarks many entries at once.
+
+        Parameters:
+        request (obj): an instance of Django class HttpRequest, 
+        representing the incoming HTTP request. Its body has lists of
+        Entry primary keys to bookmark under 'add', and to unbookmark
+        under 'remove', of at most DRAM_MAX_PAGE_SIZE ids each.
+
+        Returns: how many Bookmarks were added and removed, and which of the
+        requested entries are now bookmarked, with 200 status code;
+        otherwise, 400 status code.'''
+
+        add = request.data.get('add', [])
+        remove = request.data.get('remove', [])
+        # Reject strings, which would be read one character at a time, and
+        # bools, which are ints to Python.
+        if not all(isinstance(ids, list) and all(
+                isinstance(entry_id, int) and not isinstance(entry_id, bool) for entry_id in ids)
+                for ids in (add, remove)):
+            return Response({'error': "'add' and 'remove' must be lists of entry ids"}, status=status.HTTP_400_BAD_REQUEST)
+        # Bound the IN lists and inserts one request can make, and keep ids
+        # in the database's integer range.
+        max_ids = getattr(settings, 'DRAM_MAX_PAGE_SIZE', 100)
+        if len(add) > max_ids or len(remove) > max_ids:
+            return Response({'error': f"'add' and 'remove' can have at most {max_ids} ids each"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not all(-MAX_ID - 1 <= entry_id <= MAX_ID for entry_id in add + remove):
+            return Response({'error': "Invalid entry id"}, status=status.HTTP_400_BAD_REQUEST)
+        add = set(add)
+        remove = set(remove)
+        if add & remove:
+            return Response({'error': "An entry can't be both added and removed"}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # Find the entries that exist and which of them are bookmarked
+            # already, in one query.
+            existing = dict(Entry.objects.filter(id__in=add).annotate(
+                bookmarked=Exists(Bookmark.objects.filter(user=request.user, entry=OuterRef('pk')))
+            ).values_list('id', 'bookmarked'))
+            already_bookmarked = {entry_id for entry_id, bookmarked in existing.items() if bookmarked}
+            # Another request may bookmark the same entries meanwhile, so
+            # skip duplicates rather than fail.
+            Bookmark.objects.bulk_create(
+                [Bookmark(user=request.user, entry_id=entry_id)
+                 for entry_id in existing.keys() - already_bookmarked],
+                ignore_conflicts=True)
+            removed, _ = Bookmark.objects.filter(
+                user=request.user, entry_id__in=remove).delete()
+
+        bookmarked = set(Bookmark.objects.filter(
+            user=request.user, entry_id__in=add | remove).values_list('entry_id', flat=True))
+        # Count the requested entries that are bookmarked now and weren't
+        # before, rather than the rows sent to bulk_create.
+        added = (bookmarked & add) - already_bookmarked
+        # bulk_create doesn't send signals, so change the ETags here.
+        if added:
+            bookmarks_changed((request.user.id, entry_id) for entry_id in added)
+        return Response({
+            'added': len(added),
+            'removed': removed,
+            'bookmarked': sorted(bookmarked),
+        }, status=status.HTTP_200_OK)
 
     def retrieve(self, request, pk=None):
         '''Get a single Bookmark.
@@ -2,6 +2,8 @@ from rest_framework import viewsets, status
 from rest_framework import serializers
 from rest_framework.response import Response
 from dramapi.models import Color
+from dramapi.reference import reference_cache
+from dramapi.replicas import ReplicaReadsMixin
 
 
 class ColorSerializer(serializers.ModelSerializer):
@@ -19,7 +21,7 @@ class ColorSerializer(serializers.ModelSerializer):
         fields = ['id', 'label', 'color_grade', 'hex_code', 'tailwind_name']
 
 
-class ColorViewSet(viewsets.ViewSet):
+class ColorViewSet(ReplicaReadsMixin, viewsets.ViewSet):
 
     def list(self, request):
         '''Lists Color instances.
@@ -31,7 +33,7 @@ class ColorViewSet(viewsets.ViewSet):
         Returns: List of Bookmark dictionaries with 200 status code'''
 
         # Get all colors.
-        colors = Color.objects.all()
+        colors = reference_cache.all(Color)
         # Serialize the objects.
         serializer = ColorSerializer(colors, many=True)
         # Return the serialized data with 200 status code.
@@ -50,7 +52,7 @@ class ColorViewSet(viewsets.ViewSet):
 
         try:
             # Get the requested Color.
-            color = Color.objects.get(pk=pk)
+            color = reference_cache.get(Color, pk)
             # Serialize the object.
             serializer = ColorSerializer(color)
             # Return the Color with a 200 status code.
@@ -1,10 +1,10 @@
 from rest_framework.decorators import authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from dramapi.authentication import CachedTokenAuthentication
 
 
 class CurrentUserSerializer(serializers.ModelSerializer):
@@ -28,7 +28,7 @@ class CurrentUserSerializer(serializers.ModelSerializer):
 # Authenticate requests by token.
 
 
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 # Only allow access for authenticated requests.
 @permission_classes([IsAuthenticated])
 class CurrentUserView(APIView):
@@ -1,13 +1,105 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from dramapi.autocomplete import whiskey_name_index
+from dramapi.conditional import add_validators, is_not_modified, not_modified_response
+from dramapi.exporter import EXPORT_FORMATS, aiter_lines
+from dramapi.filters import EntryFilters, InvalidFilter
+from dramapi.importer import InvalidImportFile, import_entries, read_rows
 from dramapi.models import Entry, Type, Color, Rating
+from dramapi.pagination import KeysetPagination, InvalidCursor
+from dramapi.reference import reference_cache
+from dramapi.replicas import ReplicaReadsMixin
+from dramapi.search import get_search_backend, order_by_rank
+from dramapi.versions import (bookmark_counts_version, entries_version, entry_bookmarks_version,
+                              entry_version, make_versioned_etag, user_bookmarks_version,
+                              user_entries_version)
 from .types import TypeSerializer
 from .colors import ColorSerializer
 from .ratings import RatingSerializer
 
 
+class ReferenceField(serializers.Field):
+    '''Read-only field that serializes a Type, Color or Rating foreign key
+    from the reference cache instead of the database.
+
+    The tables are read from the cache once per serializer, rather than
+    once per field of every row. to_internal_value() turns an id sent by
+    the client into its row; see read_references().
+
+    Attributes:
+        model (class): Type, Color or Rating.
+        serializer_class (class): serializer for the model.
+    '''
+
+    def __init__(self, model, serializer_class=None, **kwargs):
+        self.model = model
+        self.serializer_class = serializer_class
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def bind(self, field_name, parent):
+        # Read the foreign key's id, e.g. `whiskey_type_id`,
+        # so the related row isn't fetched.
+        if self.source is None:
+            self.source = f"{field_name}_id"
+        super().bind(field_name, parent)
+
+    def tables(self):
+        '''Returns the reference tables, read once for the whole serializer.'''
+        root = self.root
+        if getattr(root, '_reference_tables', None) is None:
+            root._reference_tables = reference_cache.tables()
+        return root._reference_tables
+
+    def to_representation(self, value):
+        try:
+            row = self.tables()[self.model][value]
+        except KeyError as error:
+            raise self.model.DoesNotExist(
+                f"{self.model.__name__} matching query does not exist.") from error
+        return self.serializer_class(row).data
+
+    def to_internal_value(self, data):
+        # Ids are whole numbers; bool is an int subclass, so turn it away.
+        if isinstance(data, bool):
+            raise serializers.ValidationError(f"Invalid {self.model.__name__.lower()} id.")
+        try:
+            return reference_cache.get(self.model, int(data))
+        except (TypeError, ValueError, self.model.DoesNotExist) as error:
+            raise serializers.ValidationError(
+                f"Invalid {self.model.__name__.lower()} id.") from error
+
+
+def read_references(data, **models):
+    '''Finds the Type, Color and Rating rows whose ids are in request data.
+
+    Parameters:
+    data (dict): the request's data.
+    **models: the model of each key to read, e.g. type_id=Type.
+
+    Returns: dict of {key: instance}
+
+    Raises: ValidationError, answered with 400 status code, if an id is
+        missing, malformed or unknown.
+    '''
+    references = {}
+    errors = {}
+    for key, model in models.items():
+        try:
+            references[key] = ReferenceField(model).to_internal_value(data.get(key))
+        except serializers.ValidationError as error:
+            errors[key] = error.detail
+    if errors:
+        raise serializers.ValidationError(errors)
+    return references
+
+
 class EntryAuthorSerializer(serializers.ModelSerializer):
     # Serializer for retrieving entry author's information.
 
@@ -35,13 +127,18 @@ class EntrySerializer (serializers.ModelSerializer):
     # Check whether the request user is the owner of the entry.
     is_owner = serializers.SerializerMethodField()
     # Get the whiskey's type data.
-    whiskey_type = TypeSerializer(many=False)
+    whiskey_type = ReferenceField(Type, TypeSerializer)
     # Get the whiskey's color data.
-    color = ColorSerializer(many=False)
+    color = ReferenceField(Color, ColorSerializer)
     # Get the whiskey's rating data.
-    rating = RatingSerializer(many=False)
+    rating = ReferenceField(Rating, RatingSerializer)
     # Get the entry's author data.
     user = EntryAuthorSerializer(many=False)
+    # Get how many bookmarks the entry has, and whether the request user
+    # bookmarked it, from Entry.objects.with_related() annotations.
+    # A newly created entry has neither.
+    bookmark_count = serializers.IntegerField(read_only=True, default=0)
+    is_bookmarked_by_me = serializers.BooleanField(read_only=True, default=False)
 
     def get_is_owner(self, obj):
         '''Returns whether the request user is the owner of the entry.
@@ -51,12 +148,136 @@ class EntrySerializer (serializers.ModelSerializer):
 
             Returns: bool
         '''
-        return self.context['request'].user == obj.user
+        return self.context['request'].user.id == obj.user_id
 
     class Meta:
         model = Entry
         fields = ['id', 'is_owner', 'user_id', 'whiskey', 'whiskey_type', 'country', 'part_of_country', 'age_in_years', 'proof', 'color',
-                  'mash_bill', 'maturation_details', 'nose', 'palate', 'finish', 'rating', 'notes', 'publication_date', 'user']
+                  'mash_bill', 'maturation_details', 'nose', 'palate', 'finish', 'rating', 'notes', 'publication_date', 'user',
+                  'bookmark_count', 'is_bookmarked_by_me']
+
+
+class FastEntrySerializer:
+    '''Read-only serializer that builds the same output as EntrySerializer
+    from `.values()` rows.
+
+    DRF runs every field of every nested serializer for each row, which
+    dominates CPU time on large lists. This serializer instead reads plain
+    dicts, formats each column with a getter compiled once from
+    EntrySerializer's fields, and reuses one serialized copy of each Type,
+    Color and Rating per reference data version.
+
+    Usage:
+        rows = FastEntrySerializer.values(entries.with_related(request.user))
+        FastEntrySerializer(rows, many=True, context={'request': request}).data
+    '''
+
+    # Author columns read alongside the entry's own columns.
+    author_columns = ['user__first_name', 'user__last_name', 'user__username']
+
+    # Getters compiled from EntrySerializer's fields, as [(name, getter)].
+    _getters = None
+    # Serialized reference data, as (version, {field name: {pk: dict}}).
+    _references = (None, {})
+
+    def __init__(self, rows, many=True, context=None):
+        self.rows = rows
+        self.many = many
+        self.context = context or {}
+
+    # Annotations added by Entry.objects.with_related().
+    annotation_columns = ['bookmark_count', 'is_bookmarked_by_me']
+
+    @classmethod
+    def values(cls, queryset):
+        '''Returns the queryset as the rows this serializer reads.
+
+            Parameters:
+            queryset (obj): QuerySet of Entry instances from
+                Entry.objects.with_related().
+
+            Returns: QuerySet of dicts
+        '''
+        columns = [field.attname for field in Entry._meta.concrete_fields]
+        return queryset.values(*columns, *cls.author_columns, *cls.annotation_columns)
+
+    @classmethod
+    def compile_getters(cls):
+        '''Builds a getter for each of EntrySerializer's fields that takes
+        a row, the serialized reference data and the request user's id,
+        and returns the field's value.
+
+            Returns: list of (name, getter) tuples
+        '''
+        if cls._getters is not None:
+            return cls._getters
+
+        getters = []
+        for name, field in EntrySerializer().fields.items():
+            if name == 'is_owner':
+                def getter(row, references, user_id):
+                    return row['user_id'] == user_id
+            elif name == 'user':
+                def getter(row, references, user_id):
+                    return {
+                        'author_name': f"{row['user__first_name']} {row['user__last_name']}",
+                        'username': row['user__username'],
+                    }
+            elif isinstance(field, ReferenceField):
+                def getter(row, references, user_id, name=name, source=field.source):
+                    return references[name].get(row[source])
+            elif isinstance(field, (serializers.CharField, serializers.IntegerField, serializers.ReadOnlyField)):
+                # These fields return the database value as it is.
+                def getter(row, references, user_id, source=field.source):
+                    return row[source]
+            else:
+                def getter(row, references, user_id, source=field.source, to_representation=field.to_representation):
+                    value = row[source]
+                    return None if value is None else to_representation(value)
+            getters.append((name, getter))
+
+        cls._getters = getters
+        return getters
+
+    @classmethod
+    def serialized_references(cls):
+        '''Returns each Type, Color and Rating serialized once for the
+        current reference data version.
+
+            Returns: dict of {field name: {pk: dict}}
+        '''
+        version = reference_cache.version()
+        if cls._references[0] != version:
+            fields = EntrySerializer().fields
+            references = {}
+            for name, field in fields.items():
+                if isinstance(field, ReferenceField):
+                    references[name] = {
+                        row.pk: dict(field.serializer_class(row).data)
+                        for row in reference_cache.all(field.model)
+                    }
+            cls._references = (version, references)
+        return cls._references[1]
+
+    def iter_data(self, rows=None):
+        '''Serializes the rows one at a time, as they're read.
+
+            Parameters:
+            rows (iterable): rows to serialize instead of this serializer's.
+
+            Returns: iterator of dicts
+        '''
+        getters = self.compile_getters()
+        references = self.serialized_references()
+        user_id = self.context['request'].user.id
+        for row in self.rows if rows is None else rows:
+            yield {name: getter(row, references, user_id) for name, getter in getters}
+
+    @property
+    def data(self):
+        if not self.many:
+            return next(self.iter_data([self.rows]))
+        return list(self.iter_data())
 
 
 class UpdateEntrySerializer (serializers.ModelSerializer):
@@ -68,9 +289,93 @@ class UpdateEntrySerializer (serializers.ModelSerializer):
                   'mash_bill', 'maturation_details', 'nose', 'palate', 'finish', 'rating', 'notes']
 
 
-class EntryViewSet(viewsets.ViewSet):
+def entry_list_etag_parts(request, user=None):
+    '''Returns what the ETag of an entry list is built from, for
+    dramapi.versions.make_versioned_etag(): the versions of the entries,
+    or of one user's entries if the list is filtered by `username`, the
+    reference data and the request user's bookmarks. Other users'
+    bookmarks only change the bookmark counts, which may lag by
+    DRAM_BOOKMARK_COUNT_MAX_AGE (see dramapi.versions).
+
+    Parameters:
+    request (obj): the request for the list.
+    user (obj): the User whose entries are listed, or None for everyone's.
+
+    Returns: tuple
+    '''
+    return ('entries', request.get_full_path(), request.user.id, reference_cache.shared_version,
+            user_entries_version(user.id) if user else entries_version,
+            user_bookmarks_version(request.user.id), bookmark_counts_version)
+
+
+def entry_etag_parts(request, pk):
+    '''Returns what the ETag of an entry is built from: the versions of
+    the entry, its bookmarks and the reference data.'''
+    return ('entry', str(pk), request.user.id, reference_cache.shared_version,
+            entry_version(pk), entry_bookmarks_version(pk))
+
+
+class EntryList:
+    '''The entries an entry list shows, read from its query params. Shared
+    by EntryViewSet.list() and its async version, which only differ in how
+    they run the queries.
+
+    Attributes:
+        request (obj): the request for the list.
+        filters (obj): EntryFilters from the query params.
+        unfiltered (obj): QuerySet of the entries before the filters, which
+            the facets are counted over.
+        entries (obj): QuerySet of the filtered entries, with their related
+            data and bookmarks.
+        paginator (obj): KeysetPagination of the list.
+        query (str): the search query, or None.
+    '''
+
+    def __init__(self, request, user=None):
+        '''Raises: InvalidFilter if a filter in the query params is invalid.'''
+        self.request = request
+        self.filters = EntryFilters(request.query_params)
+        # Get all entries ordered in reverse by publication date, newest
+        # first within a day, as the feed indexes and the keyset paginator
+        # do, and only those of a user if one is given.
+        self.unfiltered = Entry.objects.order_by('-publication_date', '-id')
+        if user is not None:
+            self.unfiltered = self.unfiltered.filter(user=user)
+        self.entries = self.filters.apply(self.unfiltered).with_related(request.user)
+        self.paginator = KeysetPagination(ordering=('publication_date', 'id'))
+        self.query = request.query_params.get('q')
+
+    def get_error_response(self):
+        '''Returns a 400 response if the list can't be answered, or None.'''
+        # Ranked results have no keyset to page through.
+        if self.query is not None and 'cursor' in self.request.query_params:
+            return Response({'error': "'cursor' can't be used with 'q'"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return None
+
+    def wants_facets(self):
+        return 'facets' in self.request.query_params
+
+    def get_data(self, data, facets=None):
+        '''Adds the cursor of the next page, if the client asked for a page,
+        and the facet counts, if given, to the serialized entries.'''
+        if self.query is None and self.paginator.is_requested(self.request):
+            data = self.paginator.get_paginated_data(data)
+        if facets is not None:
+            if isinstance(data, list):
+                data = {'results': data}
+            data['facets'] = facets
+        return data
+
+
+class EntryViewSet(ReplicaReadsMixin, viewsets.ViewSet):
     # ViewSet for handling Entry related operations.
 
+    # Serialize lists with FastEntrySerializer rather than EntrySerializer.
+    fast_serialization = True
+    # Rate limit scopes in settings.DRAM_RATE_LIMITS for each action.
+    throttle_scopes = {'create': 'entry_create', 'bulk_import': 'entry_create'}
+
     def list(self, request):
         '''Retrieve a list of entries.
 
@@ -78,28 +383,185 @@ class EntryViewSet(viewsets.ViewSet):
             request (obj): an instance of Django class HttpRequest, 
                 representing the incoming HTTP request.
 
-            Returns: list of objects
+            Returns: list of objects, or a page of them with the cursor for
+                the next page if `cursor` or `page_size` is in the query params.
+                If `q` is in the query params, the best `page_size` matches
+                for it, best first, capped at DRAM_MAX_PAGE_SIZE; search
+                results have a single page, so `cursor` can't be sent with
+                `q`. Filtered by the fields in EntryFilters, and
+                with facet counts alongside the results if `facets` is in the
+                query params.
         '''
         # If a username is included in the query params, get it.
         username = request.query_params.get('username')
-        # Get all entries ordered in reverse by publication date.
-        entries = Entry.objects.all().order_by('-publication_date')
+        user = None
 
         # If a username is included in the query params,
-        # filter entries to include only those by the user with that username.
+        # list only the entries by the user with that username.
         if username:
             # Find the user who matches the username.
             try:
                 user = User.objects.get(username=username)
             except User.DoesNotExist:
                 return Response(status=status.HTTP_404_NOT_FOUND)
-            # Filter entries for that user.
-            entries = entries.filter(
-                user=user)
 
-        serializer = EntrySerializer(
+        # If the client already has this version, don't send it again.
+        etag = make_versioned_etag(*entry_list_etag_parts(request, user))
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        # Filter entries by the fields included in the query params.
+        try:
+            entry_list = EntryList(request, user)
+        except InvalidFilter as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        error_response = entry_list.get_error_response()
+        if error_response:
+            return error_response
+        entries = entry_list.entries
+        paginator = entry_list.paginator
+
+        # Choose how to serialize the entries.
+        serializer_class = EntrySerializer
+        if self.fast_serialization:
+            entries = FastEntrySerializer.values(entries)
+            serializer_class = FastEntrySerializer
+
+        try:
+            # If a search query is included in the query params,
+            # get the best matches for it.
+            if entry_list.query is not None:
+                limit = paginator.get_page_size(request)
+                ids = get_search_backend(entries.db).search(entries, entry_list.query, limit)
+                entries = order_by_rank(entries.filter(id__in=ids), ids)
+            # If the client asked for a page, get only that page.
+            elif paginator.is_requested(request):
+                entries = paginator.paginate_queryset(entries, request)
+        except InvalidCursor:
+            return paginator.get_invalid_cursor_response()
+        serializer = serializer_class(
             entries, many=True, context={'request': request})
-        return Response(serializer.data)
+
+        # If the client asked for facet counts, add them to the response.
+        facets = None
+        if entry_list.wants_facets():
+            facets = entry_list.filters.facet_counts(entry_list.unfiltered)
+
+        return add_validators(Response(entry_list.get_data(serializer.data, facets)), etag)
+
+    @action(detail=False, methods=['get'], url_path='autocomplete')
+    def autocomplete(self, request):
+        '''Suggest whiskey names starting with a prefix, most used first.
+
+            Parameters:
+            request (obj): an instance of Django class HttpRequest, 
+                representing the incoming HTTP request.
+
+            Returns: list of objects with a whiskey name and how many entries
+                use it, plus its most common type and country if `details`
+                is in the query params.
+        '''
+        # Get the prefix, and how many names to suggest.
+        prefix = request.query_params.get('prefix', '')
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+        details = 'details' in request.query_params
+
+        suggestions = []
+        for spelling, name in whiskey_name_index.complete(prefix, limit):
+            suggestion = {'whiskey': spelling, 'count': name.count}
+            if details:
+                suggestion['whiskey_type'] = TypeSerializer(reference_cache.get(
+                    Type, name.types.most_common(1)[0][0])).data
+                suggestion['country'] = name.countries.most_common(1)[0][0]
+            suggestions.append(suggestion)
+
+        return Response(suggestions)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        '''
+            Create many entries for the request user at once.
+
+            Parameters:
+            request (obj): an instance of Django class HttpRequest, 
+                representing the incoming HTTP request. Its body is either
+                JSON with a list of entries under `entries`, or a `file`
+                upload in CSV or JSON Lines (see dramapi.importer). If
+                `partial` is true, valid entries are imported even when
+                others are invalid.
+
+            Returns: number of entries created and errors for each invalid
+                row, with 201 status code; or with 400 status code if
+                nothing was imported because of invalid rows.
+        '''
+        partial = str(request.data.get('partial', '')).lower() in ('1', 'true')
+
+        try:
+            upload = request.FILES.get('file')
+            if upload:
+                # Tell the format from the file name unless it's given.
+                file_format = request.data.get(
+                    'format') or upload.name.rsplit('.', 1)[-1].lower()
+                rows = read_rows(upload, file_format)
+            else:
+                rows = request.data.get('entries')
+                if not isinstance(rows, list):
+                    raise InvalidImportFile(
+                        "Send a file, or a list of entries under 'entries'.")
+            created, errors = import_entries(request.user, rows, partial=partial)
+        except InvalidImportFile as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if errors and not created:
+            return Response({'created': 0, 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'created': created, 'errors': errors}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        '''
+            Stream a user's whole journal as a file download.
+
+            Parameters:
+            request (obj): an instance of Django class HttpRequest, 
+                representing the incoming HTTP request. `file_format` in
+                the query params is 'jsonl' (the default) or 'csv', and
+                `username` picks a journal other than the request user's.
+
+            Returns: StreamingHttpResponse, written as the entries are read,
+                from an async iterator under ASGI
+        '''
+        file_format = request.query_params.get('file_format', 'jsonl')
+        if file_format not in EXPORT_FORMATS:
+            return Response({'error': 'Invalid file_format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Find whose journal to export.
+        user = request.user
+        username = request.query_params.get('username')
+        if username:
+            try:
+                user = User.objects.get(username=username)
+            except User.DoesNotExist:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+
+        # Read the entries in chunks, so memory use doesn't grow with the journal.
+        entries = FastEntrySerializer.values(Entry.objects.with_related(
+            request.user).filter(user=user).order_by('-publication_date', '-id'))
+        rows = entries.iterator(
+            chunk_size=getattr(settings, 'DRAM_EXPORT_CHUNK_SIZE', 2000))
+        serializer = FastEntrySerializer(
+            rows, many=True, context={'request': request})
+
+        content_type, write_lines = EXPORT_FORMATS[file_format]
+        lines = write_lines(serializer.iter_data())
+        # Under ASGI, a sync iterator would be read whole before sending.
+        if isinstance(request._request, ASGIRequest):
+            lines = aiter_lines(lines)
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{user.username}-journal.{file_format}"'
+        return response
 
     def retrieve(self, request, pk=None):
         '''Retrieve a specific entry.
@@ -113,10 +575,15 @@ class EntryViewSet(viewsets.ViewSet):
         '''
         # Find and return the entry with the specified pk.
         try:
-            entry = Entry.objects.get(pk=pk)
+            # If the client already has this version, don't send it again.
+            etag = make_versioned_etag(*entry_etag_parts(request, pk))
+            if is_not_modified(request, etag):
+                return not_modified_response(etag)
+
+            entry = Entry.objects.with_related(request.user).get(pk=pk)
             serializer = EntrySerializer(
                 entry, many=False, context={'request': request})
-            return Response(serializer.data)
+            return add_validators(Response(serializer.data), etag)
         except Entry.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
@@ -132,19 +599,21 @@ class EntryViewSet(viewsets.ViewSet):
         '''
 
         # Get data from request.
+        references = read_references(
+            request.data, type_id=Type, color_id=Color, rating_id=Rating)
         whiskey = request.data.get('whiskey')
-        whiskey_type = Type.objects.get(pk=request.data['type_id'])
+        whiskey_type = references['type_id']
         country = request.data.get('country')
         part_of_country = request.data.get('part_of_country')
         age_in_years = request.data.get('age_in_years')
         proof = request.data.get('proof')
-        color = Color.objects.get(pk=request.data['color_id'])
+        color = references['color_id']
         mash_bill = request.data.get('mash_bill')
         maturation_details = request.data.get('maturation_details')
         nose = request.data.get('nose')
         palate = request.data.get('palate')
         finish = request.data.get('finish')
-        rating = Rating.objects.get(pk=request.data['rating_id'])
+        rating = references['rating_id']
         notes = request.data.get('notes')
 
         # Create new entry.
@@ -193,22 +662,22 @@ class EntryViewSet(viewsets.ViewSet):
             serializer = UpdateEntrySerializer(data=request.data)
 
             if serializer.is_valid():
+                references = read_references(
+                    request.data, whiskey_type=Type, color_id=Color, rating=Rating)
                 # Update entry fields.
                 entry.whiskey = serializer.validated_data['whiskey']
-                entry.whiskey_type = Type.objects.get(
-                    pk=request.data['whiskey_type'])
+                entry.whiskey_type = references['whiskey_type']
                 entry.country = serializer.validated_data['country']
                 entry.part_of_country = serializer.validated_data['part_of_country']
                 entry.age_in_years = serializer.validated_data['age_in_years']
                 entry.proof = serializer.validated_data['proof']
-                entry.color = Color.objects.get(pk=request.data['color_id'])
+                entry.color = references['color_id']
                 entry.mash_bill = serializer.validated_data['mash_bill']
                 entry.maturation_details = serializer.validated_data['maturation_details']
                 entry.nose = serializer.validated_data['nose']
                 entry.palate = serializer.validated_data['palate']
                 entry.finish = serializer.validated_data['finish']
-                entry.rating = Rating.objects.get(
-                    pk=request.data['rating'])
+                entry.rating = references['rating']
                 entry.notes = serializer.validated_data['notes']
                 entry.save()
 
@@ -0,0 +1,37 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from dramapi.authentication import token_cache
+from dramapi.metrics import metrics_registry
+
+
+class MetricsView(APIView):
+    # Only staff may see how the API is performing.
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        '''Gets the metrics recorded by this process since it started or
+        they were last reset.
+
+        Parameters:
+        request (obj): an instance of Django class HttpRequest,
+        representing the incoming HTTP request.
+        *args (tuple): Additional positional arguments passed to the method.
+        **kwargs (dict): Additional keyword arguments passed to the method.
+
+        Returns: dictionary of histograms of each endpoint's duration,
+        database time, serialization time, query count and response size,
+        keyed by method and view name, along with the token cache's stats.
+        '''
+        return Response({
+            'endpoints': metrics_registry.snapshot(),
+            'token_cache': token_cache.stats(),
+        })
+
+    def delete(self, request, *args, **kwargs):
+        '''Resets the recorded metrics.
+
+        Returns: no content with 204 status code.
+        '''
+        metrics_registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,63 @@
+from rest_framework import permissions, status, viewsets
+from rest_framework.response import Response
+from dramapi.profiling import get_profile_store
+
+# Fields of each profile in the list; the rest are only in the detail.
+SUMMARY_FIELDS = ['id', 'created', 'reason', 'method', 'path', 'view_name',
+                  'status_code', 'duration_ms', 'db_ms', 'serialize_ms']
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    # ViewSet for the request profiles saved by dramapi.profiling.ProfilingMiddleware.
+
+    # Profiles hold SQL and code paths, so only staff may see them.
+    permission_classes = [permissions.IsAdminUser]
+
+    def list(self, request):
+        '''
+            Get the saved profiles, slowest first.
+
+            Parameters:
+            request (obj): an instance of Django class HttpRequest,
+                representing the incoming HTTP request.
+
+            Returns: list of each profile's summary and query count
+        '''
+        profiles = [
+            {**{field: profile.get(field) for field in SUMMARY_FIELDS},
+             'query_count': len(profile.get('queries', []))}
+            for profile in get_profile_store().all()
+        ]
+        return Response(profiles)
+
+    def retrieve(self, request, pk=None):
+        '''
+            Get one saved profile, with its SQL statements and either its
+            cProfile output or its sampled stacks.
+
+            Parameters:
+            request (obj): an instance of Django class HttpRequest,
+                representing the incoming HTTP request.
+            pk (str): id of the profile.
+
+            Returns: the profile, or 404 status code
+        '''
+        profile = get_profile_store().get(pk)
+        if profile is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(profile)
+
+    def destroy(self, request, pk=None):
+        '''
+            Delete a saved profile.
+
+            Parameters:
+            request (obj): an instance of Django class HttpRequest,
+                representing the incoming HTTP request.
+            pk (str): id of the profile.
+
+            Returns: no content, or 404 status code
+        '''
+        if not get_profile_store().delete(pk):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
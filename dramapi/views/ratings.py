@@ -2,6 +2,8 @@ from rest_framework import viewsets, status
 from rest_framework import serializers
 from rest_framework.response import Response
 from dramapi.models import Rating
+from dramapi.reference import reference_cache
+from dramapi.replicas import ReplicaReadsMixin
 
 
 class RatingSerializer(serializers.ModelSerializer):
@@ -17,7 +19,7 @@ class RatingSerializer(serializers.ModelSerializer):
         fields = ['id', 'number_rating', 'label']
 
 
-class RatingViewSet(viewsets.ViewSet):
+class RatingViewSet(ReplicaReadsMixin, viewsets.ViewSet):
 
     def list(self, request):
         '''Lists all ratings.
@@ -30,7 +32,7 @@ class RatingViewSet(viewsets.ViewSet):
         '''
 
         # Get all Ratings.
-        ratings = Rating.objects.all()
+        ratings = reference_cache.all(Rating)
         # Serialize the objects.
         serializer = RatingSerializer(ratings, many=True)
         # Return the serialized data with 200 status code.
@@ -49,7 +51,7 @@ class RatingViewSet(viewsets.ViewSet):
 
         try:
             # Get the requested Rating.
-            rating = Rating.objects.get(pk=pk)
+            rating = reference_cache.get(Rating, pk)
             # Serialize the object.
             serializer = RatingSerializer(rating)
             # Return the serialized data with a 200 status code.
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from dramapi.conditional import is_not_modified
+from dramapi.models import Type, Color, Rating
+from dramapi.reference import reference_cache
+from .types import TypeSerializer
+from .colors import ColorSerializer
+from .ratings import RatingSerializer
+
+
+class ReferenceView(APIView):
+    # The lookup tables aren't private, so skip authentication,
+    # which would otherwise cost a query per request.
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        '''Gets every whiskey Type, Color and Rating in one response.
+
+        The response carries an ETag made from the reference data version,
+        so a client holding the current data gets a 304 status code
+        without the database being queried.
+
+        Parameters:
+        request (obj): an instance of Django class HttpRequest,
+        representing the incoming HTTP request.
+        *args (tuple): Additional positional arguments passed to the method.
+        **kwargs (dict): Additional keyword arguments passed to the method.
+
+        Returns: dictionary of serialized Types, Colors and Ratings with
+        200 status code, or no content with 304 status code.
+        '''
+
+        # Build the ETag from the current version of the reference data.
+        etag = quote_etag(str(reference_cache.version()))
+
+        # If the client already has this version, don't send it again.
+        if is_not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                'types': TypeSerializer(reference_cache.all(Type), many=True).data,
+                'colors': ColorSerializer(reference_cache.all(Color), many=True).data,
+                'ratings': RatingSerializer(reference_cache.all(Rating), many=True).data,
+            })
+
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=getattr(settings, 'DRAM_REFERENCE_MAX_AGE', 3600))
+        return response
@@ -2,6 +2,8 @@ from rest_framework import viewsets, status
 from rest_framework import serializers
 from rest_framework.response import Response
 from dramapi.models import Type
+from dramapi.reference import reference_cache
+from dramapi.replicas import ReplicaReadsMixin
 
 
 class TypeSerializer(serializers.ModelSerializer):
@@ -16,7 +18,7 @@ class TypeSerializer(serializers.ModelSerializer):
         fields = ['id', 'label']
 
 
-class TypeViewSet(viewsets.ViewSet):
+class TypeViewSet(ReplicaReadsMixin, viewsets.ViewSet):
 
     def list(self, request):
         '''Lists all whiskey Types.
@@ -29,7 +31,7 @@ class TypeViewSet(viewsets.ViewSet):
         '''
 
         # Get all whiskey Types.
-        types = Type.objects.all()
+        types = reference_cache.all(Type)
         # Serialize the objects.
         serializer = TypeSerializer(types, many=True)
         # Return serialized data with 200 status code.
@@ -48,7 +50,7 @@ class TypeViewSet(viewsets.ViewSet):
 
         try:
             # Get the requested whiskey Type.
-            whiskey_type = Type.objects.get(pk=pk)
+            whiskey_type = reference_cache.get(Type, pk)
             # Serialize the object.
             serializer = TypeSerializer(whiskey_type)
             # Return the serialized data with a 200 status code.
@@ -5,6 +5,7 @@ from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from dramapi.replicas import pin_to_primary
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -18,6 +19,8 @@ class UserSerializer(serializers.ModelSerializer):
 class UserViewSet(viewsets.ViewSet):
     queryset = User.objects.all()
     permission_classes = [permissions.AllowAny]
+    # Rate limit scopes in settings.DRAM_RATE_LIMITS for each action.
+    throttle_scopes = {'register_account': 'register', 'user_login': 'login'}
 
     @action(detail=False, methods=['post'], url_path='register')
     def register_account(self, request):
@@ -32,6 +35,8 @@ class UserViewSet(viewsets.ViewSet):
 
             )
             token, created = Token.objects.get_or_create(user=user)
+            # The request had no user for ReplicaPinMiddleware to pin.
+            pin_to_primary(user)
             return Response({"token": token.key}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -44,7 +49,13 @@ class UserViewSet(viewsets.ViewSet):
             request=request, username=username, password=password)
 
         if user:
-            token = Token.objects.get(user=user)
+            # The authentication backend loads the token along with the user.
+            try:
+                token = user.auth_token
+            except Token.DoesNotExist:
+                token = Token.objects.create(user=user)
+            # The request had no user for ReplicaPinMiddleware to pin.
+            pin_to_primary(user)
             return Response({'token': token.key}, status=status.HTTP_200_OK)
         else:
             return Response({'error': 'Invalid Credentials'}, status=status.HTTP_400_BAD_REQUEST)
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dramproject.settings')
+# Serve the read endpoints with async views; see dramproject/async_urls.py.
+os.environ.setdefault('DRAM_ASYNC_READS', '1')
 
 application = get_asgi_application()
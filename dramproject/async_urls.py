@@ -0,0 +1,11 @@
+"""
+URL configuration used under ASGI.
+
+The read endpoints are served by the async views in
+dramapi/views/async_views.py, which take precedence over the router's
+routes for the same paths. Everything else is the same as in urls.py.
+"""
+from dramapi.views.async_views import async_read_urlpatterns
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = async_read_urlpatterns + sync_urlpatterns
@@ -0,0 +1,38 @@
+"""
+Cache settings built from a URL, e.g. CACHE_URL=redis://localhost:6379/0
+
+Every worker process must share the default cache: it holds the versions
+that tell each process its in-memory copies are stale, and read-your-writes
+pins. locmem:// keeps the cache inside one process, for development.
+"""
+from urllib.parse import urlsplit
+from django.core.exceptions import ImproperlyConfigured
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+}
+
+
+def cache_from_url(url):
+    '''Builds a CACHES entry from a cache URL.
+
+    Parameters:
+    url (str): e.g. 'redis://localhost:6379/0', 'memcached://localhost:11211'
+        or 'locmem://'.
+
+    Returns: dict
+    '''
+    parts = urlsplit(url)
+    try:
+        backend = BACKENDS[parts.scheme]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unsupported cache URL scheme {parts.scheme!r}")
+
+    if parts.scheme == 'locmem':
+        return {'BACKEND': backend}
+    if parts.scheme == 'memcached':
+        return {'BACKEND': backend, 'LOCATION': parts.netloc}
+    return {'BACKEND': backend, 'LOCATION': url}
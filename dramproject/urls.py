@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import include, path
 from rest_framework import routers
-from dramapi.views import CurrentUserView, UserViewSet, TypeViewSet, ColorViewSet, RatingViewSet, EntryViewSet, BookmarkViewSet
+from dramapi.views import CurrentUserView, UserViewSet, TypeViewSet, ColorViewSet, RatingViewSet, EntryViewSet, BookmarkViewSet, ReferenceView, MetricsView, ProfileViewSet
 
 router = routers.DefaultRouter(trailing_slash=False)
 router.register(r'types', TypeViewSet, 'type')
@@ -9,12 +9,15 @@ router.register(r'colors', ColorViewSet, 'color')
 router.register(r'ratings', RatingViewSet, 'rating')
 router.register(r'entries', EntryViewSet, 'entry')
 router.register(r'bookmarks', BookmarkViewSet, 'bookmark')
+router.register(r'profiles', ProfileViewSet, 'profile')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('register', UserViewSet.as_view(
         {'post': 'register_account'}), name='register'),
     path('login', UserViewSet.as_view({'post': 'user_login'}), name='login'),
+    path('reference', ReferenceView.as_view(), name='reference'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     path('admin/', admin.site.urls),
     path('dramapi/token/', include('rest_framework.urls')),
     path('dramapi/current_user/', CurrentUserView.as_view(), name='current_user')
@@ -1 +1,18 @@
 from .entry_tests import EntryTests
+from .index_tests import IndexTests
+from .reference_tests import ReferenceTests
+from .bookmark_tests import BookmarkTests
+from .search_tests import SearchTests
+from .autocomplete_tests import AutocompleteTests
+from .filter_tests import FilterTests
+from .import_tests import ImportTests
+from .export_tests import ExportTests
+from .authentication_tests import AuthenticationTests
+from .login_tests import LoginTests
+from .throttling_tests import ThrottlingTests
+from .async_tests import AsyncTests
+from .database_tests import DatabaseTests
+from .replica_tests import ReplicaRouterTests, ReplicaPinningTests, ReplicaQueryTests
+from .metrics_tests import MetricsTests
+from .synthetic_tests import SyntheticDataTests
+from .profiling_tests import ProfilingTests
@@ -0,0 +1,161 @@
+import asyncio
+import json
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import override_settings
+from dramapi.models import Bookmark, Color, Entry, Rating, Type
+from dramapi.reference import reference_cache
+from rest_framework.authtoken.models import Token
+
+
+class AsyncTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        self.headers = {"Authorization": f"Token {token.key}"}
+        reference_cache.invalidate()
+
+        users = list(User.objects.all())
+        self.entries = Entry.objects.bulk_create([
+            Entry(
+                user=users[i % len(users)],
+                whiskey=f"Test Whiskey {i}",
+                whiskey_type=Type.objects.get(pk=7),
+                country="USA",
+                proof=90 + i,
+                color=Color.objects.get(pk=10),
+                nose="roasted grain, caramel, vanilla",
+                palate="apple pie, vanilla icecream",
+                rating=Rating.objects.get(pk=5)
+            )
+            for i in range(12)
+        ])
+        Bookmark.objects.bulk_create([
+            Bookmark(user=self.user, entry=entry) for entry in self.entries[:5]])
+
+    async def get_async(self, url, **headers):
+        '''Gets a URL through the async views.'''
+        with override_settings(ROOT_URLCONF='dramproject.async_urls'):
+            return await self.async_client.get(url, headers={**self.headers, **headers})
+
+    async def assertSameAsSync(self, url):
+        '''Asserts that the async and sync views give the same response.'''
+        sync_response = await sync_to_async(self.client.get)(url)
+        async_response = await self.get_async(url)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(json.loads(async_response.content),
+                         json.loads(sync_response.content))
+        self.assertEqual(async_response.get("ETag"), sync_response.get("ETag"))
+        return async_response
+
+    async def test_entry_list(self):
+        '''Ensure the async entry list matches the sync one'''
+
+        await self.assertSameAsSync("/entries")
+        await self.assertSameAsSync(f"/entries?username={self.user.username}")
+        await self.assertSameAsSync("/entries?min_proof=95&facets")
+        await self.assertSameAsSync("/entries?q=whiskey&page_size=3")
+        await self.assertSameAsSync("/entries?q=whiskey&cursor=abc")
+        response = await self.assertSameAsSync("/entries?page_size=5")
+        next_cursor = json.loads(response.content)["next"]
+        await self.assertSameAsSync(f"/entries?page_size=5&cursor={next_cursor}")
+
+        response = await self.get_async("/entries?cursor=nonsense")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = await self.get_async("/entries?username=nobody")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_entry_list_not_modified(self):
+        '''Ensure the async entry list answers 304 for a current ETag'''
+
+        response = await self.get_async("/entries")
+        response = await self.get_async("/entries", **{"If-None-Match": response["ETag"]})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_head_requests(self):
+        '''Ensure the async views answer HEAD requests like GETs'''
+
+        with override_settings(ROOT_URLCONF='dramproject.async_urls'):
+            for url in ("/entries", f"/entries/{self.entries[0].id}", "/bookmarks", "/colors"):
+                response = await self.async_client.head(url, headers=self.headers)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.content, b"")
+
+    async def test_cache_reads_leave_event_loop(self):
+        '''Ensure the async views never block the event loop on the cache'''
+
+        backend = type(caches['default'])
+        on_event_loop = []
+
+        def check(method):
+            def checked(cache, *args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    on_event_loop.append((method.__name__, args[0]))
+                except RuntimeError:
+                    # Running in a thread, as the async cache API does.
+                    pass
+                return method(cache, *args, **kwargs)
+            return checked
+
+        with patch.object(backend, 'get', check(backend.get)), \
+                patch.object(backend, 'get_many', check(backend.get_many)):
+            for url in ("/entries?facets", f"/entries/{self.entries[0].id}",
+                        "/bookmarks?expand=entry", "/types"):
+                response = await self.get_async(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(on_event_loop, [])
+
+    async def test_entry_detail(self):
+        '''Ensure the async entry detail matches the sync one'''
+
+        await self.assertSameAsSync(f"/entries/{self.entries[0].id}")
+        response = await self.get_async("/entries/999999")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_bookmark_list(self):
+        '''Ensure the async bookmark list matches the sync one'''
+
+        await self.assertSameAsSync("/bookmarks")
+        await self.assertSameAsSync("/bookmarks?expand=entry")
+        await self.assertSameAsSync("/bookmarks?expand=entry&page_size=2")
+
+    async def test_reference_lists(self):
+        '''Ensure the async type, color and rating lists match the sync ones'''
+
+        for url in ("/types", "/colors", "/ratings"):
+            await self.assertSameAsSync(url)
+
+    async def test_authentication_required(self):
+        '''Ensure the async entry list rejects requests without a valid token'''
+
+        with override_settings(ROOT_URLCONF='dramproject.async_urls'):
+            response = await self.async_client.get("/entries")
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(response["WWW-Authenticate"], "Token")
+
+            response = await self.async_client.get(
+                "/entries", headers={"Authorization": "Token nonsense"})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_writes_use_sync_views(self):
+        '''Ensure other methods on the async routes reach the sync views'''
+
+        entry = [entry for entry in self.entries if entry.user_id == self.user.id][-1]
+        with override_settings(ROOT_URLCONF='dramproject.async_urls'):
+            response = await self.async_client.post(
+                "/bookmarks", {"entryId": entry.id},
+                content_type="application/json", headers=self.headers)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            response = await self.async_client.delete(
+                f"/entries/{entry.id}", headers=self.headers)
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,127 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from dramapi.authentication import token_cache
+from rest_framework.authtoken.models import Token
+
+
+class AuthenticationTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        self.token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        # Drop tokens cached by earlier tests, whose changes were rolled back.
+        token_cache.invalidate()
+
+    def test_cached_token_skips_database(self):
+        '''Ensure a recently used token is authenticated without queries'''
+
+        # The first request looks the token and its user up.
+        with self.assertNumQueries(1):
+            response = self.client.get("/dramapi/current_user/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["username"], self.user.username)
+
+        # Later requests answer from the cache.
+        misses = token_cache.misses
+        hits = token_cache.hits
+        with self.assertNumQueries(0):
+            response = self.client.get("/dramapi/current_user/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["username"], self.user.username)
+        self.assertEqual(token_cache.hits, hits + 1)
+        self.assertEqual(token_cache.misses, misses)
+
+        stats = token_cache.stats()
+        self.assertEqual(stats["size"], 1)
+        self.assertGreater(stats["hit_ratio"], 0)
+
+    def test_deleted_token_is_rejected(self):
+        '''Ensure a token stops working once deleted, e.g. on logout'''
+
+        self.client.get("/dramapi/current_user/")
+        self.token.delete()
+
+        response = self.client.get("/dramapi/current_user/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        '''Ensure a cached token stops working when its user is deactivated'''
+
+        self.client.get("/dramapi/current_user/")
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get("/dramapi/current_user/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_reloads_user(self):
+        '''Ensure changing a password drops the cached user'''
+
+        self.client.get("/dramapi/current_user/")
+        self.user.set_password("a new password")
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/dramapi/current_user/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_other_users_changes_keep_cache(self):
+        '''Ensure another user's logout or password change leaves this
+        user's cached token alone'''
+
+        self.client.get("/dramapi/current_user/")
+        other_user = User.objects.exclude(pk=self.user.pk).first()
+        Token.objects.get(user=other_user).delete()
+        other_user.set_password("a new password")
+        other_user.save()
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/dramapi/current_user/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_login_keeps_cache(self):
+        '''Ensure only updating last_login leaves the cache alone'''
+
+        self.client.get("/dramapi/current_user/")
+        self.user.save(update_fields=["last_login"])
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/dramapi/current_user/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cache_evicts_least_recently_used(self):
+        '''Ensure the cache never holds more tokens than its limit'''
+
+        max_size = token_cache.max_size
+        token_cache.max_size = 2
+        try:
+            tokens = list(Token.objects.select_related('user')[:3])
+            for token in tokens:
+                token_cache.set(token.key, token)
+            self.assertEqual(token_cache.stats()["size"], 2)
+            self.assertIsNone(token_cache.get(tokens[0].key))
+            self.assertEqual(token_cache.get(tokens[2].key), tokens[2])
+        finally:
+            token_cache.max_size = max_size
+
+    def test_profile_change_keeps_cache(self):
+        '''Ensure only changes that affect authentication empty the cache'''
+
+        self.client.get("/dramapi/current_user/")
+        # Registering and editing a profile leave the cache alone.
+        User.objects.create_user(username="newcomer", password="a password")
+        self.user.first_name = "Changed"
+        self.user.save()
+        with self.assertNumQueries(0):
+            response = self.client.get("/dramapi/current_user/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Assert that changing permissions empties it.
+        self.user.is_staff = True
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.client.get("/dramapi/current_user/")
@@ -0,0 +1,118 @@
+import json
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from dramapi.autocomplete import WhiskeyNameIndex, whiskey_name_index
+from dramapi.models import Color, Entry, Rating, Type
+from rest_framework.authtoken.models import Token
+
+
+class AutocompleteTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        # Drop names indexed by earlier tests, whose entries were rolled back.
+        whiskey_name_index.invalidate()
+
+    def create_entry(self, whiskey, type_id=7, country="Scotland"):
+        '''Creates an entry, and runs the callbacks waiting for it to commit.
+
+        Returns: Entry instance
+        '''
+        with self.captureOnCommitCallbacks(execute=True):
+            return Entry.objects.create(
+                user=self.user,
+                whiskey=whiskey,
+                whiskey_type=Type.objects.get(pk=type_id),
+                country=country,
+                proof=92,
+                color=Color.objects.get(pk=10),
+                nose="malt",
+                palate="malt",
+                rating=Rating.objects.get(pk=5)
+            )
+
+    def complete(self, query):
+        response = self.client.get(f"/entries/autocomplete?{query}")
+        return json.loads(response.content)
+
+    def test_autocomplete(self):
+        '''Ensure whiskey names are suggested by prefix, most used first'''
+
+        self.create_entry("Lagavulin 16")
+        self.create_entry("Laphroaig 10")
+        self.create_entry("laphroaig  10")
+        self.create_entry("Glenfiddich 12")
+
+        self.assertEqual(self.complete("prefix=la"), [
+            {"whiskey": "Laphroaig 10", "count": 2},
+            {"whiskey": "Lagavulin 16", "count": 1},
+        ])
+        self.assertEqual(self.complete("prefix=LAG"), [
+            {"whiskey": "Lagavulin 16", "count": 1},
+        ])
+        self.assertEqual(len(self.complete("prefix=&limit=1")), 1)
+        self.assertEqual(self.complete("prefix=x"), [])
+
+    def test_autocomplete_details(self):
+        '''Ensure the most common type and country can be included'''
+
+        self.create_entry("Redbreast 12", type_id=7, country="Ireland")
+        self.create_entry("Redbreast 12", type_id=7, country="Ireland")
+        self.create_entry("Redbreast 12", type_id=1, country="Scotland")
+
+        self.assertEqual(self.complete("prefix=red&details"), [{
+            "whiskey": "Redbreast 12",
+            "count": 3,
+            "whiskey_type": {"id": 7, "label": "Single Malt"},
+            "country": "Ireland",
+        }])
+
+    def test_autocomplete_follows_changes(self):
+        '''Ensure updated and deleted entries update the suggestions'''
+
+        entry = self.create_entry("Talisker 10")
+        self.assertEqual(len(self.complete("prefix=tal")), 1)
+
+        entry.whiskey = "Oban 14"
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.save()
+        self.assertEqual(self.complete("prefix=tal"), [])
+        self.assertEqual(self.complete("prefix=oban"), [
+            {"whiskey": "Oban 14", "count": 1},
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.delete()
+        self.assertEqual(self.complete("prefix=oban"), [])
+
+    def test_autocomplete_follows_other_processes(self):
+        '''Ensure a change made while another process changed the entries rebuilds the index'''
+
+        self.assertEqual(self.complete("prefix=tal"), [])
+        # Another process adds an entry, and bumps the shared version.
+        Entry.objects.bulk_create([Entry(
+            user=self.user, whiskey="Talisker Storm", whiskey_type_id=7, country="Scotland",
+            proof=92, color_id=10, nose="malt", palate="malt", rating_id=5)])
+        whiskey_name_index.shared_version.bump()
+
+        self.create_entry("Talisker 10")
+        self.assertEqual(len(self.complete("prefix=tal")), 2)
+
+    def test_autocomplete_applies_logged_changes(self):
+        '''Ensure changes made by other processes are applied from the change
+        log, without rebuilding the index'''
+
+        self.create_entry("Talisker 10")
+        self.assertEqual(len(whiskey_name_index.complete("tal")), 1)
+
+        # Another process, with its own index, changes entries.
+        other_index = WhiskeyNameIndex()
+        other_index.change(None, ("Talisker Storm", 7, "Scotland"))
+        other_index.change(("Talisker 10", 7, "Scotland"), ("Oban 14", 7, "Scotland"))
+        with self.assertNumQueries(0):
+            names = whiskey_name_index.complete("")
+        self.assertEqual(sorted(spelling for spelling, _ in names), ["Oban 14", "Talisker Storm"])
@@ -0,0 +1,211 @@
+import json
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from dramapi.models import Bookmark, Color, Entry, Rating, Type
+from rest_framework.authtoken.models import Token
+
+
+class BookmarkTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def create_entries(self, count):
+        '''Seeds the database with entries spread across every user.
+
+        Parameters:
+        count (int): number of entries to create.
+
+        Returns: list of Entry instances
+        '''
+        users = list(User.objects.all())
+        whiskey_type = Type.objects.get(pk=7)
+        color = Color.objects.get(pk=10)
+        rating = Rating.objects.get(pk=5)
+        return Entry.objects.bulk_create([
+            Entry(
+                user=users[i % len(users)],
+                whiskey=f"Test Whiskey {i}",
+                whiskey_type=whiskey_type,
+                country="USA",
+                proof=100,
+                color=color,
+                nose="roasted grain, caramel, vanilla",
+                palate="apple pie, vanilla icecream",
+                rating=rating
+            )
+            for i in range(count)
+        ])
+
+    def test_conditional_get_bookmarks(self):
+        '''Ensure an unchanged bookmark list gets a 304 instead of a body'''
+
+        entries = self.create_entries(2)
+        Bookmark.objects.create(user=self.user, entry=entries[0])
+        url = f"/bookmarks?username={self.user.username}&expand=entry"
+
+        response = self.client.get(url)
+        self.assertEqual(len(json.loads(response.content)), 1)
+        etag = response["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Assert that a new bookmark changes the ETag.
+        Bookmark.objects.create(user=self.user, entry=entries[1])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)), 2)
+
+        # Assert that changing a bookmarked entry changes the ETag.
+        etag = response["ETag"]
+        entries[0].notes = "changed"
+        entries[0].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_expanded_bookmarks_query_count(self):
+        '''Ensure expanding 1,000 bookmarks costs a constant number of queries'''
+
+        # Five users each bookmark the same 200 entries.
+        entries = self.create_entries(200)
+        users = list(User.objects.all()[:5])
+        Bookmark.objects.bulk_create([
+            Bookmark(user=user, entry=entry) for user in users for entry in entries])
+
+        # One query for the bookmarks and one for the entries with their
+        # authors. The ETag comes from the cache.
+        # The first request may also fill the reference and token caches,
+        # which its query budget leaves out.
+        response = self.client.get("/bookmarks?expand=entry")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(2):
+            response = self.client.get("/bookmarks?expand=entry")
+        json_response = json.loads(response.content)
+        self.assertEqual(len(json_response), 1000)
+
+        # Assert that each bookmark carries its whole entry.
+        bookmark = json_response[0]
+        entry = Entry.objects.get(pk=bookmark["entry"]["id"])
+        self.assertEqual(bookmark["entry"]["whiskey"], entry.whiskey)
+        self.assertEqual(bookmark["entry"]["whiskey_type"],
+                         {'id': 7, 'label': 'Single Malt'})
+        self.assertEqual(bookmark["is_owner"], bookmark["user"] == self.user.id)
+        self.assertEqual(
+            json.loads(self.client.get(f"/entries/{entry.id}").content),
+            bookmark["entry"])
+
+    def test_list_bookmarks_cursor_pagination(self):
+        '''Ensure we can page through bookmarks with a cursor'''
+
+        for entry in self.create_entries(25):
+            Bookmark.objects.create(user=self.user, entry=entry)
+
+        ids = []
+        base_url = f"/bookmarks?username={self.user.username}&expand=entry&page_size=10"
+        url = base_url
+        while url:
+            response = self.client.get(url)
+            json_response = json.loads(response.content)
+            ids += [bookmark["id"] for bookmark in json_response["results"]]
+            self.assertTrue(all(bookmark["entry"]["id"] for bookmark in json_response["results"]))
+            url = json_response["next"] and f"{base_url}&cursor={json_response['next']}"
+
+        self.assertEqual(ids, list(
+            Bookmark.objects.order_by('-id').values_list('id', flat=True)))
+
+    def test_entries_include_bookmark_state(self):
+        '''Ensure entries show their bookmark count and the user's bookmark'''
+
+        entries = self.create_entries(3)
+        other_user = User.objects.last()
+        Bookmark.objects.create(user=self.user, entry=entries[0])
+        Bookmark.objects.create(user=other_user, entry=entries[0])
+        Bookmark.objects.create(user=other_user, entry=entries[1])
+
+        response = self.client.get("/entries")
+        bookmark_state = {
+            entry["id"]: (entry["bookmark_count"], entry["is_bookmarked_by_me"])
+            for entry in json.loads(response.content)
+        }
+        self.assertEqual(bookmark_state, {
+            entries[0].id: (2, True),
+            entries[1].id: (1, False),
+            entries[2].id: (0, False),
+        })
+
+        # Assert that a single entry agrees, and that bookmarking it
+        # changes its ETag.
+        response = self.client.get(f"/entries/{entries[1].id}")
+        self.assertEqual(json.loads(response.content)["bookmark_count"], 1)
+        etag = response["ETag"]
+        Bookmark.objects.create(user=self.user, entry=entries[1])
+        response = self.client.get(
+            f"/entries/{entries[1].id}", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json_response = json.loads(response.content)
+        self.assertEqual(json_response["bookmark_count"], 2)
+        self.assertTrue(json_response["is_bookmarked_by_me"])
+
+    def test_create_bookmark_is_idempotent(self):
+        '''Ensure bookmarking an entry twice returns the first bookmark'''
+
+        entry = self.create_entries(1)[0]
+        response = self.client.post(
+            "/bookmarks", {"entryId": entry.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        bookmark_id = json.loads(response.content)["id"]
+
+        response = self.client.post(
+            "/bookmarks", {"entryId": entry.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["id"], bookmark_id)
+        self.assertEqual(Bookmark.objects.count(), 1)
+
+        response = self.client.post(
+            "/bookmarks", {"entryId": 999999}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_toggle_bookmarks(self):
+        '''Ensure many entries can be bookmarked and unbookmarked at once'''
+
+        entries = self.create_entries(4)
+        Bookmark.objects.create(user=self.user, entry=entries[0])
+        Bookmark.objects.create(user=self.user, entry=entries[3])
+
+        response = self.client.post("/bookmarks/toggle", {
+            "add": [entries[0].id, entries[1].id, entries[2].id, 999999],
+            "remove": [entries[3].id],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {
+            "added": 2,
+            "removed": 1,
+            "bookmarked": [entries[0].id, entries[1].id, entries[2].id],
+        })
+        self.assertEqual(
+            set(Bookmark.objects.filter(user=self.user).values_list('entry_id', flat=True)),
+            {entries[0].id, entries[1].id, entries[2].id})
+
+        response = self.client.post("/bookmarks/toggle", {
+            "add": [entries[0].id], "remove": [entries[0].id],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Assert that anything but lists of ids is rejected, rather than
+        # e.g. a string being read one digit at a time.
+        for body in [{"add": str(entries[1].id)}, {"remove": entries[1].id},
+                     {"add": [str(entries[1].id)]}, {"add": [True]}, {"add": None},
+                     {"add": [2 ** 63]}, {"remove": list(range(1, 102))}]:
+            response = self.client.post("/bookmarks/toggle", body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.credentials()
+        response = self.client.post(
+            "/bookmarks/toggle", {"add": [entries[0].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
@@ -1,9 +1,13 @@
 import json
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, APITestCase
 from django.contrib.auth.models import User
-from dramapi.models import Color, Entry, Rating, Type
+from django.test import override_settings
+from dramapi.models import Bookmark, Color, Entry, Rating, Type
 from rest_framework.authtoken.models import Token
+from dramapi.versions import entries_changed
+from dramapi.views.entries import EntrySerializer, FastEntrySerializer
 
 
 class EntryTests(APITestCase):
@@ -132,3 +136,240 @@ class EntryTests(APITestCase):
         self.assertEqual(json_response["rating"], {
                          'id': 5, 'number_rating': 4, 'label': 'very good'})
         self.assertEqual(json_response["notes"], "tasty whiskey")
+
+    def create_entries(self, count):
+        '''Seeds the database with entries spread across every user.
+
+        Parameters:
+        count (int): number of entries to create.
+        '''
+        users = list(User.objects.all())
+        whiskey_type = Type.objects.get(pk=7)
+        color = Color.objects.get(pk=10)
+        rating = Rating.objects.get(pk=5)
+        Entry.objects.bulk_create([
+            Entry(
+                user=users[i % len(users)],
+                whiskey=f"Test Whiskey {i}",
+                whiskey_type=whiskey_type,
+                country="USA",
+                proof=100,
+                color=color,
+                nose="roasted grain, caramel, vanilla",
+                palate="apple pie, vanilla icecream",
+                rating=rating
+            )
+            for i in range(count)
+        ])
+
+    def test_list_entries_query_count(self):
+        '''Ensure listing entries costs the same number of queries
+        no matter how many entries there are'''
+
+        # One query to load the entries along with their authors and
+        # bookmark counts. The ETag is built from versions in the cache,
+        # types, colors and ratings come from the reference cache, and the
+        # token from the token cache.
+        self.create_entries(5)
+        # The first request may also fill the reference and token caches,
+        # which its query budget leaves out.
+        response = self.client.get("/entries")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(1):
+            response = self.client.get("/entries")
+        self.assertEqual(len(json.loads(response.content)), 5)
+
+        self.create_entries(45)
+        entries_changed(Entry.objects.values_list('user_id', 'id'))
+        with self.assertNumQueries(1):
+            response = self.client.get("/entries")
+        self.assertEqual(len(json.loads(response.content)), 50)
+
+        # Filtering by username adds only the user lookup.
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                f"/entries?username={self.user.username}")
+        self.assertTrue(
+            all(entry["is_owner"] for entry in json.loads(response.content)))
+
+    def test_list_entries_cursor_pagination(self):
+        '''Ensure we can page through entries with a cursor'''
+
+        self.create_entries(25)
+
+        # Follow the cursors until there are no more pages.
+        ids = []
+        url = "/entries?page_size=10"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            json_response = json.loads(response.content)
+            self.assertLessEqual(len(json_response["results"]), 10)
+            ids += [entry["id"] for entry in json_response["results"]]
+            url = json_response["next"] and f"/entries?page_size=10&cursor={json_response['next']}"
+
+        # Assert that every entry was returned once, newest first.
+        self.assertEqual(ids, list(
+            Entry.objects.order_by('-publication_date', '-id').values_list('id', flat=True)))
+
+        # Assert that the unpaginated list has the same order, so entries
+        # published on the same day don't come back in arbitrary order.
+        response = self.client.get("/entries")
+        self.assertEqual([entry["id"] for entry in json.loads(response.content)], ids)
+
+        # Assert that pagination also works with the username filter.
+        response = self.client.get(
+            f"/entries?username={self.user.username}&page_size=2")
+        json_response = json.loads(response.content)
+        self.assertEqual(len(json_response["results"]), 2)
+        self.assertTrue(
+            all(entry["user"]["username"] == self.user.username for entry in json_response["results"]))
+        self.assertIsNotNone(json_response["next"])
+
+        # Assert that a malformed cursor is rejected.
+        response = self.client.get("/entries?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_conditional_get_entries(self):
+        '''Ensure unchanged entries get a 304 instead of a body'''
+
+        self.create_entries(3)
+        entry = Entry.objects.first()
+
+        # Assert that an unchanged entry isn't sent again.
+        response = self.client.get(f"/entries/{entry.id}")
+        etag = response["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                f"/entries/{entry.id}", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        # Assert that there's no Last-Modified, which would leave out the
+        # bookmarks, author and reference data the ETag covers.
+        self.assertNotIn("Last-Modified", response)
+
+        # Assert that an unchanged list isn't sent again.
+        response = self.client.get("/entries")
+        list_etag = response["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/entries", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Assert that changing an entry changes both ETags.
+        entry.notes = "changed"
+        entry.save()
+        response = self.client.get(
+            f"/entries/{entry.id}", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get("/entries", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Assert that deleting an entry changes the list's ETag.
+        list_etag = response["ETag"]
+        Entry.objects.last().delete()
+        response = self.client.get("/entries", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etags_are_per_entry(self):
+        '''Ensure changing an entry leaves the ETags of other entries, and of
+        other users' entry lists, alone'''
+
+        self.create_entries(3)
+        other_user = User.objects.exclude(pk=self.user.pk).first()
+        entry = Entry.objects.filter(user=self.user).first()
+        other_entry = Entry.objects.filter(user=other_user).first()
+        response = self.client.get(f"/entries/{other_entry.id}")
+        etag = response["ETag"]
+        response = self.client.get(f"/entries?username={other_user.username}")
+        list_etag = response["ETag"]
+
+        entry.notes = "changed"
+        entry.save()
+        response = self.client.get(f"/entries/{other_entry.id}", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(
+            f"/entries?username={other_user.username}", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Assert that renaming the author changes the ETags of their entries.
+        other_user.first_name = "Renamed"
+        other_user.save()
+        response = self.client.get(f"/entries/{other_entry.id}", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(
+            f"/entries?username={other_user.username}", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(DRAM_BOOKMARK_COUNT_MAX_AGE=0)
+    def test_bookmark_counts_lag_only_after_changes(self):
+        '''Ensure an unchanged list keeps its ETag however old it is, and
+        other users' bookmarks change it once the counts may no longer lag'''
+
+        self.create_entries(3)
+        response = self.client.get("/entries")
+        list_etag = response["ETag"]
+        response = self.client.get("/entries", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Bookmark.objects.create(
+            user=User.objects.exclude(pk=self.user.pk).first(), entry=Entry.objects.first())
+        response = self.client.get("/entries", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(DRAM_BOOKMARK_COUNT_MAX_AGE=3600)
+    def test_conditional_get_entries_bookmarks(self):
+        '''Ensure only the request user's bookmarks change the entry list's ETag'''
+
+        self.create_entries(3)
+        entry = Entry.objects.first()
+        response = self.client.get("/entries")
+        list_etag = response["ETag"]
+
+        # Assert that another user's bookmark leaves the list's ETag, whose
+        # bookmark counts may lag, but changes the entry's.
+        response = self.client.get(f"/entries/{entry.id}")
+        etag = response["ETag"]
+        Bookmark.objects.create(user=User.objects.exclude(pk=self.user.pk).first(), entry=entry)
+        response = self.client.get("/entries", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(f"/entries/{entry.id}", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Assert that the request user's bookmark changes the list's ETag.
+        Bookmark.objects.create(user=self.user, entry=entry)
+        response = self.client.get("/entries", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_fast_serializer_matches_entry_serializer(self):
+        '''Ensure FastEntrySerializer renders the same JSON as EntrySerializer'''
+
+        self.create_entries(5)
+        # Vary the optional and decimal fields.
+        entry = Entry.objects.first()
+        entry.color = None
+        entry.age_in_years = None
+        entry.part_of_country = None
+        entry.proof = 92.5
+        entry.save()
+        entry = Entry.objects.last()
+        entry.age_in_years = 8.25
+        entry.notes = "caf\u00e9 \"quoted\""
+        entry.save()
+
+        request = APIRequestFactory().get("/entries")
+        request.user = self.user
+        context = {'request': request}
+        entries = Entry.objects.with_related(self.user).order_by('-publication_date', '-id')
+
+        expected = JSONRenderer().render(
+            EntrySerializer(entries, many=True, context=context).data)
+        actual = JSONRenderer().render(FastEntrySerializer(
+            FastEntrySerializer.values(entries), many=True, context=context).data)
+        self.assertEqual(actual, expected)
+
+        # Assert that a single row serializes the same every time.
+        row = FastEntrySerializer.values(entries).first()
+        serializer = FastEntrySerializer(row, many=False, context=context)
+        self.assertEqual(serializer.data, serializer.data)
+        self.assertEqual(JSONRenderer().render(serializer.data),
+                         JSONRenderer().render(EntrySerializer(entries.first(), context=context).data))
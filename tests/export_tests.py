@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from dramapi.models import Entry
+from rest_framework.authtoken.models import Token
+
+
+class ExportTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        # Import a journal for the request user, and one entry for another user.
+        rows = [{
+            "whiskey": f"Exported Whiskey {i}",
+            "type_id": 7,
+            "country": "Scotland",
+            "proof": "92.00",
+            "color_id": 10 if i % 2 else None,
+            "nose": "honey, \"heather\"",
+            "palate": "malt",
+            "rating_id": 5,
+        } for i in range(25)]
+        self.client.post("/entries/import", {"entries": rows}, format='json')
+        Entry.objects.create(
+            user=User.objects.last(), whiskey="Someone Else's", whiskey_type_id=7,
+            country="USA", proof=100, nose="corn", palate="corn", rating_id=5)
+
+    async def test_export_streams_under_asgi(self):
+        '''Ensure exports under ASGI stream from an async iterator, rather
+        than being read into a list before they're sent'''
+
+        token = await Token.objects.aget(user=self.user)
+        response = await self.async_client.get(
+            "/entries/export", headers={"Authorization": f"Token {token.key}"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(content.decode().splitlines()), 25)
+
+    def test_export_jsonl(self):
+        '''Ensure a journal streams as JSON Lines matching the entries feed'''
+
+        response = self.client.get("/entries/export")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment", response["Content-Disposition"])
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        exported = [json.loads(line) for line in lines]
+        feed = json.loads(self.client.get(
+            f"/entries?username={self.user.username}").content)
+        self.assertEqual(len(exported), 25)
+        self.assertEqual(exported, feed)
+
+    def test_export_csv(self):
+        '''Ensure a journal streams as CSV that can be imported again'''
+
+        response = self.client.get("/entries/export?file_format=csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows[0]["whiskey_type"], "Single Malt")
+        self.assertEqual(rows[0]["nose"], "honey, \"heather\"")
+
+        # Assert that the export imports cleanly for another user.
+        other = User.objects.last()
+        token = Token.objects.get(user=other)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        upload = SimpleUploadedFile("journal.csv", content.encode())
+        response = self.client.post(
+            "/entries/import", {"file": upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Entry.objects.filter(user=other).count(), 26)
+
+    def test_export_invalid_format(self):
+        '''Ensure an unknown format is rejected'''
+
+        response = self.client.get("/entries/export?file_format=xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
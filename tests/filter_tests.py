@@ -0,0 +1,100 @@
+import json
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from dramapi.models import Color, Entry, Rating, Type
+from rest_framework.authtoken.models import Token
+
+
+class FilterTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        # Seed the database with entries to filter.
+        for whiskey, type_id, country, part_of_country, proof, age, rating_id in [
+            ("Laphroaig 10", 7, "Scotland", "Islay", 86, 10, 5),
+            ("Lagavulin 16", 7, "Scotland", "Islay", 86, 16, 6),
+            ("Glenmorangie Original", 7, "Scotland", "Highlands", 80, 10, 4),
+            ("Buffalo Trace", 1, "USA", "Kentucky", 90, None, 4),
+            ("Booker's", 1, "USA", "Kentucky", 125.4, 6.5, 5),
+        ]:
+            Entry.objects.create(
+                user=self.user,
+                whiskey=whiskey,
+                whiskey_type=Type.objects.get(pk=type_id),
+                country=country,
+                part_of_country=part_of_country,
+                proof=proof,
+                age_in_years=age,
+                color=Color.objects.get(pk=10),
+                nose="malt",
+                palate="malt",
+                rating=Rating.objects.get(pk=rating_id)
+            )
+
+    def whiskeys(self, query):
+        '''Returns the sorted whiskey names listed for a query string.'''
+        response = self.client.get(f"/entries?{query}")
+        return sorted(entry["whiskey"] for entry in json.loads(response.content))
+
+    def test_filter_entries(self):
+        '''Ensure entries can be filtered by each field'''
+
+        self.assertEqual(self.whiskeys("country=USA"),
+                         ["Booker's", "Buffalo Trace"])
+        self.assertEqual(self.whiskeys("part_of_country=Islay&rating=6"),
+                         ["Lagavulin 16"])
+        self.assertEqual(len(self.whiskeys("whiskey_type=1&whiskey_type=7")), 5)
+        self.assertEqual(self.whiskeys("min_proof=86&max_proof=90"),
+                         ["Buffalo Trace", "Lagavulin 16", "Laphroaig 10"])
+        self.assertEqual(self.whiskeys("min_age=10&country=Scotland&max_age=12"),
+                         ["Glenmorangie Original", "Laphroaig 10"])
+        self.assertEqual(self.whiskeys("color=1"), [])
+
+        response = self.client.get("/entries?min_proof=strong")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get("/entries?whiskey_type=99999999999999999999999")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_facet_counts(self):
+        '''Ensure facet counts leave out each field's own filter'''
+
+        # One query for the counts of every choice field and one for the
+        # ranges, on top of the entries. The ETag comes from the cache.
+        # The first request may also fill the reference and token caches,
+        # which its query budget leaves out.
+        response = self.client.get("/entries?country=Scotland&facets")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(3):
+            response = self.client.get("/entries?country=Scotland&facets")
+        json_response = json.loads(response.content)
+
+        self.assertEqual(len(json_response["results"]), 3)
+        facets = json_response["facets"]
+        # The country facet ignores the country filter.
+        self.assertEqual(facets["country"], [
+            {"value": "Scotland", "count": 3}, {"value": "USA", "count": 2}])
+        # The other facets apply it.
+        self.assertEqual(facets["part_of_country"], [
+            {"value": "Islay", "count": 2}, {"value": "Highlands", "count": 1}])
+        self.assertEqual(facets["whiskey_type"], [
+            {"id": 7, "label": "Single Malt", "count": 3}])
+        self.assertEqual(facets["rating"], [
+            {"id": 4, "label": Rating.objects.get(pk=4).label, "count": 1},
+            {"id": 5, "label": "very good", "count": 1},
+            {"id": 6, "label": Rating.objects.get(pk=6).label, "count": 1}])
+        self.assertEqual(facets["proof"], {"min": "80.00", "max": "86.00"})
+        self.assertEqual(facets["age_in_years"], {"min": "10.00", "max": "16.00"})
+
+        # Assert that facets are added to a page.
+        response = self.client.get("/entries?page_size=2&facets")
+        json_response = json.loads(response.content)
+        self.assertEqual(len(json_response["results"]), 2)
+        self.assertIsNotNone(json_response["next"])
+        self.assertEqual(json_response["facets"]["proof"],
+                         {"min": "80.00", "max": "125.40"})
@@ -0,0 +1,138 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from dramapi.models import Entry
+from rest_framework.authtoken.models import Token
+
+
+class ImportTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def row(self, i, **fields):
+        '''Returns an importable entry, with any fields overridden.'''
+        row = {
+            "whiskey": f"Imported Whiskey {i}",
+            "type_id": 7,
+            "country": "Scotland",
+            "proof": "92.00",
+            "color": "Amontillado Sherry",
+            "nose": "honey",
+            "palate": "malt",
+            "rating": "very good",
+        }
+        row.update(fields)
+        return row
+
+    def test_import_entries(self):
+        '''Ensure many entries can be imported in a constant number of queries'''
+
+        rows = [self.row(i) for i in range(200)]
+        # Assert that rows are inserted in batches, with no lookups per row.
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/entries/import", {"entries": rows}, format='json')
+        self.assertLess(len(queries), 10)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(json.loads(response.content),
+                         {"created": 200, "errors": []})
+
+        entry = Entry.objects.get(whiskey="Imported Whiskey 0")
+        self.assertEqual(entry.user, self.user)
+        self.assertEqual(entry.whiskey_type_id, 7)
+        self.assertEqual(entry.color_id, 10)
+        self.assertEqual(entry.rating_id, 5)
+
+    def test_import_reports_invalid_rows(self):
+        '''Ensure invalid rows are reported, and stop the import unless partial'''
+
+        rows = [self.row(1), self.row(2, proof="strong"),
+                self.row(3, type_id=9999), self.row(4, rating=None)]
+
+        response = self.client.post(
+            "/entries/import", {"entries": rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = json.loads(response.content)["errors"]
+        self.assertEqual([error["row"] for error in errors], [2, 3, 4])
+        self.assertIn("proof", errors[0]["errors"])
+        self.assertIn("whiskey_type", errors[1]["errors"])
+        self.assertIn("rating", errors[2]["errors"])
+        self.assertFalse(Entry.objects.exists())
+
+        response = self.client.post(
+            "/entries/import", {"entries": rows, "partial": True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(json.loads(response.content)["created"], 1)
+        self.assertEqual(Entry.objects.count(), 1)
+
+    def test_import_csv_upload(self):
+        '''Ensure a CSV spreadsheet can be uploaded'''
+
+        csv = ("whiskey,whiskey_type,country,part_of_country,age_in_years,proof,color,nose,palate,rating,notes\n"
+               "Redbreast 12,Single Malt,Ireland,,12,80,,sherry,spice,very good,\n"
+               "Talisker 10,single malt,Scotland,Skye,,91.6,,smoke,pepper,Very Good,\n")
+        upload = SimpleUploadedFile("journal.csv", csv.encode())
+        response = self.client.post(
+            "/entries/import", {"file": upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        entry = Entry.objects.get(whiskey="Redbreast 12")
+        self.assertIsNone(entry.part_of_country)
+        self.assertIsNone(entry.color)
+        self.assertEqual(entry.age_in_years, 12)
+        self.assertEqual(Entry.objects.get(whiskey="Talisker 10").rating_id, 5)
+
+    def test_import_reports_non_object_rows(self):
+        '''Ensure rows that aren't objects are reported as invalid rows'''
+
+        response = self.client.post(
+            "/entries/import", {"entries": [self.row(1), "123", [1, 2], None]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = json.loads(response.content)["errors"]
+        self.assertEqual([error["row"] for error in errors], [2, 3, 4])
+        self.assertIn("non_field_errors", errors[0]["errors"])
+
+    def test_import_unreadable_file(self):
+        '''Ensure files that aren't UTF-8 or valid CSV are rejected'''
+
+        for name, content in [
+            ("journal.csv", "whiskey\nCaol Ila\n".encode("utf-16")),
+            ("journal.jsonl", b'{"whiskey": "\xff"}\n'),
+            ("journal.csv", b"whiskey,notes\nCaol Ila," + b"x" * 200000 + b"\n"),
+        ]:
+            upload = SimpleUploadedFile(name, content)
+            response = self.client.post(
+                "/entries/import", {"file": upload}, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("error", json.loads(response.content))
+        self.assertFalse(Entry.objects.exists())
+
+    def test_import_command(self):
+        '''Ensure a JSON Lines file can be imported from the command line'''
+
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as file:
+            for i in range(3):
+                file.write(json.dumps(self.row(i)) + "\n")
+        self.addCleanup(os.remove, file.name)
+
+        out = StringIO()
+        call_command('import_entries', self.user.username, file.name, stdout=out)
+        self.assertIn("Imported 3 entries", out.getvalue())
+        self.assertEqual(Entry.objects.filter(user=self.user).count(), 3)
+
+        with self.assertRaises(CommandError):
+            call_command('import_entries', 'nobody', file.name)
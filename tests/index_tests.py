@@ -0,0 +1,50 @@
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from dramapi.models import Bookmark, Entry
+
+
+# The assertions read SQLite's query plans.
+@skipUnless(connection.vendor == 'sqlite', "SQLite only")
+class IndexTests(TestCase):
+    '''Ensure the database uses the indexes on the feed's hot queries.'''
+
+    def assertUsesIndex(self, queryset, index_name):
+        '''Asserts that the query plan for a queryset uses an index.
+
+        Parameters:
+        queryset (obj): the QuerySet to explain.
+        index_name (str): name of the index that should be used.
+        '''
+        plan = queryset.explain()
+        self.assertIn(f"USING INDEX {index_name}", plan)
+        # Assert that the rows don't need to be sorted after being read.
+        self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_feed_uses_publication_date_index(self):
+        '''Ensure all entries are read newest first from an index'''
+        self.assertUsesIndex(
+            Entry.objects.order_by('-publication_date', '-id'),
+            'entry_pub_date_idx')
+
+    def test_user_feed_uses_user_publication_date_index(self):
+        '''Ensure a user's entries are read newest first from an index'''
+        self.assertUsesIndex(
+            Entry.objects.with_related().filter(user_id=1).order_by(
+                '-publication_date', '-id'),
+            'entry_user_pub_date_idx')
+
+    def test_published_feed_uses_partial_index(self):
+        '''Ensure published entries are read from the partial index'''
+        self.assertUsesIndex(
+            Entry.objects.filter(published=True).order_by(
+                '-publication_date', '-id'),
+            'entry_published_idx')
+
+    def test_user_bookmarks_use_unique_index(self):
+        '''Ensure a user's bookmarks are looked up through the unique index'''
+        # SQLite builds the unique constraint into the table definition,
+        # so its index gets an automatic name.
+        plan = Bookmark.objects.filter(user_id=1).explain()
+        self.assertRegex(
+            plan, r"SEARCH dramapi_bookmark USING (COVERING )?INDEX sqlite_autoindex_dramapi_bookmark_\d+ \(user_id=\?\)")
@@ -0,0 +1,63 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+
+@override_settings(DRAM_PASSWORD_ITERATIONS=1000)
+class LoginTests(APITestCase):
+
+    fixtures = ['users', 'tokens']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        self.user.set_password("dram password")
+        self.user.save()
+        self.credentials = {"username": self.user.username, "password": "dram password"}
+
+    def test_login_single_query(self):
+        '''Ensure logging in loads the user and token in one query'''
+
+        with self.assertNumQueries(1):
+            response = self.client.post("/login", self.credentials, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["token"], Token.objects.get(user=self.user).key)
+
+    def test_login_wrong_password(self):
+        '''Ensure a wrong password is rejected'''
+
+        response = self.client.post(
+            "/login", {**self.credentials, "password": "wrong"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            "/login", {**self.credentials, "username": "nobody"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_login_creates_missing_token(self):
+        '''Ensure a user without a token gets one on login'''
+
+        Token.objects.filter(user=self.user).delete()
+        response = self.client.post("/login", self.credentials, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["token"], Token.objects.get(user=self.user).key)
+
+    def test_password_iterations_setting(self):
+        '''Ensure new passwords are hashed with the configured iterations'''
+
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+
+    def test_login_rehashes_password(self):
+        '''Ensure a password hashed with other iterations is upgraded on login'''
+
+        with override_settings(DRAM_PASSWORD_ITERATIONS=2000):
+            User.objects.filter(pk=self.user.pk).update(
+                password=make_password("dram password"))
+        response = self.client.post("/login", self.credentials, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(self.user.check_password("dram password"))
@@ -0,0 +1,98 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from django.test import override_settings
+from dramapi.authentication import token_cache
+from dramapi.metrics import QueryBudgetExceeded, metrics_registry
+from dramapi.reference import reference_cache
+from rest_framework.authtoken.models import Token
+
+
+class MetricsTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        metrics_registry.reset()
+        # Drop users cached by earlier tests, whose changes were rolled back.
+        token_cache.invalidate()
+
+    def test_server_timing_header(self):
+        '''Ensure responses report their queries and timings'''
+
+        response = self.client.get("/entries")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response["Server-Timing"]
+        self.assertIn("db;dur=", timing)
+        self.assertIn("queries", timing)
+        self.assertIn("serialize;dur=", timing)
+        self.assertIn("total;dur=", timing)
+
+    @override_settings(DRAM_SERVER_TIMING=False)
+    def test_server_timing_can_be_turned_off(self):
+        '''Ensure no Server-Timing header is sent when it's turned off'''
+
+        response = self.client.get("/entries")
+        self.assertNotIn("Server-Timing", response)
+
+    def test_metrics_are_aggregated_per_endpoint(self):
+        '''Ensure requests are counted in their endpoint's histograms'''
+
+        for _ in range(3):
+            self.client.get("/entries")
+        self.client.get("/types")
+
+        endpoints = metrics_registry.snapshot()
+        entries = endpoints["GET entry-list"]
+        self.assertEqual(entries["count"], 3)
+        self.assertEqual(sum(entries["queries"]["buckets"].values()), 3)
+        self.assertGreater(entries["queries"]["max"], 0)
+        self.assertGreater(entries["response_bytes"]["sum"], 0)
+        self.assertEqual(endpoints["GET type-list"]["count"], 1)
+
+    @override_settings(DRAM_QUERY_BUDGETS={'entry-list': 0}, DRAM_QUERY_BUDGET_STRICT=True)
+    def test_budget_fails_in_strict_mode(self):
+        '''Ensure going over a query budget raises in strict mode'''
+
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get("/entries")
+
+    @override_settings(DRAM_QUERY_BUDGETS={'entry-list': 3}, DRAM_QUERY_BUDGET_STRICT=True)
+    def test_budget_leaves_out_cache_fills(self):
+        '''Ensure queries filling cold caches don't count against the budget'''
+
+        reference_cache.invalidate()
+        token_cache.invalidate()
+        response = self.client.get("/entries?facets")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(DRAM_QUERY_BUDGETS={'entry-list': 0}, DRAM_QUERY_BUDGET_STRICT=False)
+    def test_budget_warns_otherwise(self):
+        '''Ensure going over a query budget logs a warning outside strict mode'''
+
+        with self.assertLogs("dramapi.metrics", level="WARNING") as logs:
+            response = self.client.get("/entries")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("over the budget of 0 for entry-list", logs.output[0])
+
+    def test_metrics_endpoint_is_admin_only(self):
+        '''Ensure only staff can read and reset the metrics'''
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get("/entries")
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("GET entry-list", response.data["endpoints"])
+        self.assertIn("hit_ratio", response.data["token_cache"])
+
+        response = self.client.delete("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        # Only the reset itself is left.
+        self.assertEqual(list(metrics_registry.snapshot()), ["DELETE metrics"])
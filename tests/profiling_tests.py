@@ -0,0 +1,132 @@
+import os
+import tempfile
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from django.test import override_settings
+from dramapi.authentication import token_cache
+from dramapi.profiling import ProfileStore, get_profile_store
+from rest_framework.authtoken.models import Token
+
+
+class ProfilingTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        self.headers = {"Authorization": f"Token {token.key}"}
+        # Drop users cached by earlier tests, whose changes were rolled back.
+        token_cache.invalidate()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(DRAM_PROFILE_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_profiling_is_off_by_default(self):
+        '''Ensure no profiles are saved unless profiling is turned on'''
+
+        self.client.get("/entries")
+        self.assertEqual(get_profile_store().all(), [])
+
+    @override_settings(DRAM_PROFILE_SAMPLE_RATE=1.0)
+    def test_sampled_requests_are_profiled(self):
+        '''Ensure sampled requests are saved with their SQL and cProfile output'''
+
+        response = self.client.get("/entries")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        profiles = get_profile_store().all()
+        self.assertEqual(len(profiles), 1)
+        profile = profiles[0]
+        self.assertEqual(profile["reason"], "sampled")
+        self.assertEqual(profile["path"], "/entries")
+        self.assertEqual(profile["view_name"], "entry-list")
+        self.assertGreater(len(profile["queries"]), 0)
+        self.assertIn("SELECT", profile["queries"][0]["sql"])
+        self.assertIn("cumulative", profile["profile"])
+        self.assertIsNotNone(profile["serialize_ms"])
+
+    @override_settings(DRAM_PROFILE_SLOW_MS=0, DRAM_PROFILE_INTERVAL_MS=1)
+    def test_slow_requests_are_profiled(self):
+        '''Ensure requests over the threshold are saved with sampled stacks'''
+
+        self.client.get("/entries")
+        profile = get_profile_store().all()[0]
+        self.assertEqual(profile["reason"], "slow")
+        self.assertIn("stacks", profile)
+        self.assertNotIn("profile", profile)
+
+    @override_settings(DRAM_PROFILE_SAMPLE_RATE=1.0, DRAM_PROFILE_INTERVAL_MS=1)
+    async def test_async_requests_are_profiled(self):
+        '''Ensure requests through the async middleware chain are saved with
+        their SQL and sampled stacks'''
+
+        for urls in ('dramproject.urls', 'dramproject.async_urls'):
+            with override_settings(ROOT_URLCONF=urls):
+                response = await self.async_client.get("/entries", headers=self.headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        profiles = get_profile_store().all()
+        self.assertEqual(len(profiles), 2)
+        for profile in profiles:
+            self.assertEqual(profile["reason"], "sampled")
+            self.assertEqual(profile["path"], "/entries")
+            self.assertGreater(len(profile["queries"]), 0)
+            self.assertIn("stacks", profile)
+            self.assertNotIn("profile", profile)
+
+    @override_settings(DRAM_PROFILE_SLOW_MS=60000)
+    def test_fast_requests_are_not_kept(self):
+        '''Ensure requests under the threshold aren't saved'''
+
+        self.client.get("/entries")
+        self.assertEqual(get_profile_store().all(), [])
+
+    def test_store_keeps_the_slowest(self):
+        '''Ensure the store drops the fastest profiles once it's full'''
+
+        store = ProfileStore(self.directory, keep=3)
+        for i, duration in enumerate([50, 10, 30, 40, 5, 60]):
+            store.save({"id": f"{i:032x}", "duration_ms": duration})
+
+        self.assertEqual([profile["duration_ms"] for profile in store.all()], [60, 50, 40])
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+
+    def test_store_rejects_bad_ids(self):
+        '''Ensure ids that aren't profile ids don't reach the filesystem'''
+
+        store = ProfileStore(self.directory, keep=3)
+        self.assertIsNone(store.get("../../etc/passwd"))
+        self.assertFalse(store.delete("../settings"))
+
+    def test_profiles_endpoint_is_admin_only(self):
+        '''Ensure only staff can list, read and delete profiles'''
+
+        with override_settings(DRAM_PROFILE_SAMPLE_RATE=1.0):
+            self.client.get("/entries")
+        response = self.client.get("/profiles")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get("/profiles")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        summary = response.data[0]
+        self.assertEqual(summary["view_name"], "entry-list")
+        self.assertNotIn("queries", summary)
+        self.assertGreater(summary["query_count"], 0)
+
+        response = self.client.get(f"/profiles/{summary['id']}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("queries", response.data)
+
+        response = self.client.delete(f"/profiles/{summary['id']}")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get(f"/profiles/{summary['id']}")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,103 @@
+import json
+from unittest.mock import patch
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+from django.contrib.auth.models import User
+from dramapi.models import Entry, Type
+from dramapi.reference import reference_cache
+from dramapi.views.entries import EntrySerializer
+from rest_framework.authtoken.models import Token
+
+
+class ReferenceTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        # Drop rows cached by earlier tests, whose changes were rolled back.
+        reference_cache.invalidate()
+
+    def test_lookups_skip_database(self):
+        '''Ensure cached lookups don't query the database'''
+
+        type_count = Type.objects.count()
+        reference_cache.tables()
+        with self.assertNumQueries(0):
+            self.assertEqual(reference_cache.get(Type, 7).label, 'Single Malt')
+            self.assertEqual(reference_cache.get(Type, '7').label, 'Single Malt')
+            self.assertEqual(len(reference_cache.all(Type)), type_count)
+        with self.assertRaises(Type.DoesNotExist):
+            reference_cache.get(Type, 9999)
+
+    def test_changes_invalidate_cache(self):
+        '''Ensure creating and deleting a Type is reflected in the cache'''
+
+        reference_cache.tables()
+
+        # Create a new Type through the API.
+        response = self.client.post("/types", {"label": "Rye"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        type_id = json.loads(response.content)["id"]
+
+        # Assert that the new Type is listed.
+        response = self.client.get("/types")
+        self.assertIn({"id": type_id, "label": "Rye"},
+                      json.loads(response.content))
+
+        # Delete the Type, and assert that it is gone.
+        self.client.delete(f"/types/{type_id}")
+        response = self.client.get(f"/types/{type_id}")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_reference(self):
+        '''Ensure we can get every Type, Color and Rating in one request,
+        and revalidate it without querying the database'''
+
+        response = self.client.get("/reference")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json_response = json.loads(response.content)
+        self.assertIn({'id': 7, 'label': 'Single Malt'}, json_response["types"])
+        self.assertIn({'id': 5, 'number_rating': 4, 'label': 'very good'},
+                      json_response["ratings"])
+        self.assertEqual(json_response["colors"][9]["tailwind_name"],
+                         "amontillado-sherry")
+        self.assertIn("max-age", response["Cache-Control"])
+
+        # Assert that sending back the ETag gets a 304 with no queries.
+        etag = response["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/reference", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        # Assert that changing a Type changes the ETag.
+        Type.objects.create(label="Rye")
+        response = self.client.get("/reference", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_serializer_reads_tables_once(self):
+        '''Ensure EntrySerializer reads the reference tables once for a
+        whole list, not once per field of each row'''
+
+        entries = [Entry(id=i, user=self.user, whiskey_type_id=7, color_id=10, rating_id=5)
+                   for i in range(1, 4)]
+        request = APIRequestFactory().get("/entries")
+        request.user = self.user
+        with patch.object(reference_cache, 'tables', wraps=reference_cache.tables) as tables:
+            data = EntrySerializer(entries, many=True, context={'request': request}).data
+        self.assertEqual(tables.call_count, 1)
+        self.assertEqual(data[2]["whiskey_type"], {'id': 7, 'label': 'Single Malt'})
+
+    def test_invalid_reference_ids(self):
+        '''Ensure malformed or unknown lookup ids are rejected with a 400'''
+
+        data = {"whiskey": "Test Whiskey", "country": "USA", "proof": 100,
+                "nose": "grain", "palate": "vanilla", "color_id": 10, "rating_id": 5}
+        for type_id in ("x", {}, True, 9999, None):
+            response = self.client.post("/entries", {**data, "type_id": type_id}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("type_id", json.loads(response.content))
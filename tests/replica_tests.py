@@ -0,0 +1,195 @@
+from unittest import skipUnless
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from dramapi.models import Color, Entry, Rating, Type
+from dramapi.replicas import ReplicaRouter, is_pinned, replica_reads
+from rest_framework.authtoken.models import Token
+
+
+class FakeReplicaRouter(ReplicaRouter):
+    '''ReplicaRouter whose replicas are reachable unless listed in `down`.'''
+
+    def __init__(self):
+        super().__init__()
+        self.down = set()
+
+    def check_connection(self, alias):
+        if alias in self.down:
+            raise DatabaseError(f"{alias} is down")
+
+
+class RecordingRouter(FakeReplicaRouter):
+    '''Records the replica each read was given, but reads from the test
+    database.'''
+
+    reads = []
+
+    def db_for_read(self, model, **hints):
+        self.reads.append(replica_reads.get())
+
+
+@override_settings(DRAM_READ_REPLICAS=['replica1', 'replica2'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = FakeReplicaRouter()
+
+    def test_round_robin(self):
+        '''Ensure requests get each replica in turn, and writes the primary'''
+
+        self.assertEqual([self.router.choose() for _ in range(4)],
+                         ['replica1', 'replica2', 'replica1', 'replica2'])
+        self.assertEqual(self.router.db_for_write(Entry), 'default')
+        self.assertFalse(self.router.allow_migrate('replica1', 'dramapi'))
+        self.assertIsNone(self.router.allow_migrate('default', 'dramapi'))
+
+    def test_reads_use_the_request_replica(self):
+        '''Ensure every read of a request goes to the replica chosen for it,
+        and reads stay on the primary when none was'''
+
+        self.assertIsNone(self.router.db_for_read(Entry))
+        token = replica_reads.set(self.router.choose())
+        try:
+            self.assertEqual({self.router.db_for_read(model) for model in (Entry, Type, Color)},
+                             {'replica1'})
+        finally:
+            replica_reads.reset(token)
+
+    def test_unavailable_replica_ejected(self):
+        '''Ensure a replica that can't be reached is skipped until retried'''
+
+        self.router.down.add('replica1')
+        self.assertEqual([self.router.choose() for _ in range(3)],
+                         ['replica2', 'replica2', 'replica2'])
+
+        # Assert that it isn't checked again before its retry time.
+        self.router.down.clear()
+        self.assertEqual(self.router.choose(), 'replica2')
+        self.assertEqual(self.router.choose(), 'replica2')
+
+        # Once its retry time has passed, it's used again.
+        self.router._ejected['replica1'] = 0
+        self.assertEqual({self.router.choose() for _ in range(2)},
+                         {'replica1', 'replica2'})
+
+    def test_all_replicas_unavailable(self):
+        '''Ensure reads fall back to the primary when no replica is reachable'''
+
+        self.router.down.update(['replica1', 'replica2'])
+        self.assertIsNone(self.router.choose())
+
+
+# Keep the requests on the test database even if replicas are configured.
+@override_settings(DRAM_READ_REPLICAS=[])
+class ReplicaPinningTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        cache.clear()
+        self.entry = Entry.objects.create(
+            user=self.user,
+            whiskey="Test Whiskey",
+            whiskey_type=Type.objects.get(pk=7),
+            country="USA",
+            proof=100,
+            color=Color.objects.get(pk=10),
+            rating=Rating.objects.get(pk=5)
+        )
+        RecordingRouter.reads = []
+
+    @override_settings(DATABASE_ROUTERS=['tests.replica_tests.RecordingRouter'],
+                       DRAM_READ_REPLICAS=['replica1'])
+    def test_reads_use_replicas_until_user_writes(self):
+        '''Ensure list reads use one replica, except right after a write'''
+
+        response = self.client.get("/entries")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('replica1', RecordingRouter.reads)
+
+        response = self.client.post("/bookmarks", {"entryId": self.entry.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(is_pinned(self.user))
+
+        RecordingRouter.reads = []
+        response = self.client.get("/entries")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(RecordingRouter.reads)
+        self.assertNotIn('replica1', RecordingRouter.reads)
+
+    def test_failed_write_does_not_pin(self):
+        '''Ensure only successful writes pin the user to the primary'''
+
+        response = self.client.post("/bookmarks", {"entryId": 999999}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(is_pinned(self.user))
+
+        self.client.get("/entries")
+        self.assertFalse(is_pinned(self.user))
+
+
+    @override_settings(DRAM_PASSWORD_ITERATIONS=1000)
+    def test_writes_outside_viewsets_pin(self):
+        '''Ensure registering, logging in and other writes pin the user too'''
+
+        response = self.client.post("/register", {
+            "username": "newcomer", "password": "a password", "email": "newcomer@example.com",
+            "first_name": "New", "last_name": "Comer"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(is_pinned(User.objects.get(username="newcomer")))
+
+        cache.clear()
+        self.user.set_password("dram password")
+        self.user.save()
+        self.client.credentials()
+        response = self.client.post(
+            "/login", {"username": self.user.username, "password": "dram password"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(is_pinned(self.user))
+
+        cache.clear()
+        self.user.is_staff = True
+        self.user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+        response = self.client.delete("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(is_pinned(self.user))
+
+
+# Run on their own with e.g. DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3
+# python manage.py test tests.replica_tests, which points the replica at the
+# test database.
+@skipUnless('replica1' in settings.DATABASES, "no replica configured")
+class ReplicaQueryTests(APITransactionTestCase):
+
+    databases = {'default', *settings.DRAM_READ_REPLICAS}
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        cache.clear()
+
+    def test_list_reads_from_replica(self):
+        '''Ensure the entry list queries the replica, and the primary after a write'''
+
+        with CaptureQueriesContext(connections['replica1']) as replica_queries:
+            response = self.client.get("/entries")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(replica_queries.captured_queries)
+
+        self.client.post("/types", {"label": "Test Type"}, format='json')
+        with CaptureQueriesContext(connections['replica1']) as replica_queries:
+            response = self.client.get("/entries")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(replica_queries.captured_queries)
@@ -0,0 +1,102 @@
+import json
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from dramapi.models import Color, Entry, Rating, Type
+from dramapi.search import LikeSearchBackend
+from rest_framework.authtoken.models import Token
+
+
+class SearchTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        # Seed the database with entries to search.
+        users = list(User.objects.all())
+        for i, (whiskey, nose, notes) in enumerate([
+            ("Laphroaig 10", "smoky peat, iodine", "peat peat peat"),
+            ("Lagavulin 16", "smoke, sherry", None),
+            ("Glenmorangie Original", "citrus, vanilla", "not smoky at all, no peat"),
+            ("Redbreast 12", "sherry, spice", "pot still"),
+        ]):
+            Entry.objects.create(
+                user=users[i % 2],
+                whiskey=whiskey,
+                whiskey_type=Type.objects.get(pk=7),
+                country="Scotland",
+                proof=92,
+                color=Color.objects.get(pk=10),
+                nose=nose,
+                palate="malt",
+                rating=Rating.objects.get(pk=5),
+                notes=notes
+            )
+
+    def search(self, query):
+        '''Searches entries through the API.
+
+        Parameters:
+        query (str): the url-encoded search query and any other query params.
+
+        Returns: list of whiskey names, in the order returned
+        '''
+        response = self.client.get(f"/entries?q={query}")
+        return [entry["whiskey"] for entry in json.loads(response.content)]
+
+    def test_search_entries(self):
+        '''Ensure we can search entries, best match first'''
+
+        self.assertEqual(set(self.search("sherry")),
+                         {"Lagavulin 16", "Redbreast 12"})
+        # Assert that every word must match.
+        self.assertEqual(self.search("sherry+smoke"), ["Lagavulin 16"])
+        # Assert that the most relevant entry comes first.
+        self.assertEqual(self.search("peat"),
+                         ["Laphroaig 10", "Glenmorangie Original"])
+        self.assertEqual(self.search(""), [])
+
+    def test_search_prefix(self):
+        '''Ensure a word ending in * matches words starting with it'''
+
+        self.assertEqual(self.search("lagav"), [])
+        self.assertEqual(self.search("lagav*"), ["Lagavulin 16"])
+
+    def test_search_by_user(self):
+        '''Ensure search can be combined with the username filter'''
+
+        username = User.objects.get(pk=2).username
+        self.assertEqual(set(self.search(f"sherry&username={username}")),
+                         {"Lagavulin 16", "Redbreast 12"})
+        self.assertEqual(self.search(f"peat&username={username}"), [])
+
+    def test_search_page_size(self):
+        '''Ensure search returns one page of the best matches, without a cursor'''
+
+        self.assertEqual(self.search("peat&page_size=1"), ["Laphroaig 10"])
+        # Assert that a cursor is rejected, as ranked results have one page.
+        response = self.client.get("/entries?q=peat&cursor=abc")
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_index_stays_in_sync(self):
+        '''Ensure the index follows entries being updated and deleted'''
+
+        entry = Entry.objects.get(whiskey="Redbreast 12")
+        entry.notes = "christmas cake"
+        entry.save()
+        self.assertEqual(self.search("christmas"), ["Redbreast 12"])
+        self.assertEqual(self.search("pot"), [])
+
+        entry.delete()
+        self.assertEqual(self.search("christmas"), [])
+
+    def test_like_backend(self):
+        '''Ensure the LIKE backend finds the same entries'''
+
+        ids = LikeSearchBackend().search(Entry.objects.all(), "smok", 10)
+        self.assertEqual(
+            {Entry.objects.get(pk=pk).whiskey for pk in ids},
+            {"Laphroaig 10", "Lagavulin 16", "Glenmorangie Original"})
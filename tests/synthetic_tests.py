@@ -0,0 +1,100 @@
+import json
+import os
+import random
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from dramapi.models import Bookmark, Entry
+from dramapi.synthetic import generate, power_law_counts
+
+
+class SyntheticDataTests(TestCase):
+
+    fixtures = ['types', 'colors', 'ratings']
+
+    def test_power_law_counts(self):
+        '''Ensure a total is split exactly, with a few parts getting most of it'''
+
+        counts = power_law_counts(10000, 100, random.Random(0))
+        self.assertEqual(sum(counts), 10000)
+        top_tenth = sum(sorted(counts, reverse=True)[:10])
+        self.assertGreater(top_tenth, 10000 * 0.3)
+
+    def test_generate(self):
+        '''Ensure the requested users, entries and bookmarks are created, skewed'''
+
+        users = generate(20, 300, 500, seed=1, prefix='test')
+        self.assertEqual(len(users), 20)
+        self.assertEqual(User.objects.filter(username__startswith='test_').count(), 20)
+        self.assertTrue(all(hasattr(user, 'auth_token') for user in User.objects.filter(
+            username__startswith='test_').select_related('auth_token')))
+        self.assertEqual(Entry.objects.count(), 300)
+        self.assertEqual(Bookmark.objects.count(), 500)
+
+        # The most bookmarked entry has far more than its share.
+        counts = Bookmark.objects.values('entry').annotate(count=Count('id')).order_by('-count')
+        self.assertGreater(counts[0]['count'], 500 / 300 * 5)
+
+    def test_generate_rejects_invalid_counts(self):
+        '''Ensure generating without users or with negative counts fails before writing'''
+
+        for users, entries, bookmarks in [(0, 10, 10), (-1, 0, 0), (5, -1, 0), (5, 10, -1)]:
+            with self.assertRaises(ValueError):
+                generate(users, entries, bookmarks)
+        self.assertFalse(User.objects.exists())
+        with self.assertRaises(CommandError):
+            call_command('benchmark_api', users=0, stdout=StringIO())
+
+    def test_generate_is_reproducible(self):
+        '''Ensure the same seed creates the same data'''
+
+        def snapshot():
+            return (list(Entry.objects.order_by('id').values_list('user__username', 'whiskey', 'proof')),
+                    sorted(Bookmark.objects.values_list('user__username', 'entry__whiskey')))
+
+        generate(10, 50, 80, seed=3, prefix='first')
+        first = snapshot()
+        User.objects.filter(username__startswith='first_').delete()
+        generate(10, 50, 80, seed=3, prefix='first')
+        self.assertEqual(snapshot(), first)
+
+    def test_generate_data_command(self):
+        '''Ensure the command creates data, and won't duplicate it without --clear'''
+
+        out = StringIO()
+        call_command('generate_data', users=5, entries=40, bookmarks=30, stdout=out)
+        self.assertIn("Created 5 users, 40 entries and 30 bookmarks", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('generate_data', users=5, entries=40, bookmarks=30)
+
+        call_command('generate_data', users=3, entries=10, bookmarks=5, clear=True, stdout=out)
+        self.assertEqual(User.objects.filter(username__startswith='synthetic_').count(), 3)
+        self.assertEqual(Entry.objects.count(), 10)
+
+    @override_settings(DRAM_PASSWORD_ITERATIONS=1000)
+    def test_benchmark_api_command(self):
+        '''Ensure the benchmark saves its results as JSON, and rolls back its data'''
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command('benchmark_api', users=5, entries=30, bookmarks=20, requests=3, warmup=1,
+                         output=path, stdout=StringIO())
+            with open(path, encoding='utf-8') as file:
+                results = json.load(file)
+            out = StringIO()
+            call_command('benchmark_api', users=5, entries=30, bookmarks=20, requests=3, warmup=1,
+                         scenarios=['entries'], compare=path, stdout=out)
+
+        self.assertEqual(set(results['scenarios']),
+                         {'entries', 'bookmarks', 'login', 'create_entry', 'update_entry'})
+        for result in results['scenarios'].values():
+            self.assertEqual(result['requests'], 3)
+            self.assertEqual(result['errors'], 0)
+            self.assertGreater(result['queries_per_request'], 0)
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+        self.assertIn("req/s", out.getvalue())
+        self.assertFalse(User.objects.filter(username__startswith='benchmark_api_').exists())
@@ -0,0 +1,104 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from dramapi.throttling import CacheBucketStore, MemoryBucketStore, get_bucket_store
+from rest_framework.authtoken.models import Token
+
+
+@override_settings(DRAM_RATE_LIMITS={'login': '2/min', 'bookmark_create': '3/h'})
+class ThrottlingTests(APITestCase):
+
+    fixtures = ['users', 'tokens', 'types', 'colors', 'ratings']
+
+    def setUp(self):
+        self.user = User.objects.first()
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        # Refill buckets emptied by earlier tests.
+        get_bucket_store().clear()
+
+    def tearDown(self):
+        get_bucket_store().clear()
+
+    def test_login_rate_limit(self):
+        '''Ensure logging in too often gets a 429 with Retry-After'''
+
+        credentials = {"username": self.user.username, "password": "wrong"}
+        for _ in range(2):
+            response = self.client.post("/login", credentials, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post("/login", credentials, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # One token refills every 30 seconds.
+        self.assertEqual(response["Retry-After"], "30")
+
+    def test_forwarded_for_is_not_trusted(self):
+        '''Ensure anonymous clients can't get a fresh bucket by changing
+        X-Forwarded-For'''
+
+        self.client.credentials()
+        credentials = {"username": self.user.username, "password": "wrong"}
+        statuses = [self.client.post("/login", credentials, format='json',
+                                     HTTP_X_FORWARDED_FOR=f"10.0.0.{i}").status_code
+                    for i in range(3)]
+        self.assertEqual(statuses[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_limits_are_per_user(self):
+        '''Ensure one user's requests don't use up another's limit'''
+
+        for entry_id in range(1, 4):
+            self.client.post("/bookmarks", {"entryId": entry_id}, format='json')
+        response = self.client.post("/bookmarks", {"entryId": 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        other = User.objects.exclude(pk=self.user.pk).first()
+        token = Token.objects.get(user=other)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        response = self.client.post("/bookmarks", {"entryId": 1}, format='json')
+        self.assertNotEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_reads_are_not_limited(self):
+        '''Ensure actions without a scope are never throttled'''
+
+        for _ in range(5):
+            response = self.client.get("/bookmarks")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bucket_refills(self):
+        '''Ensure a bucket allows bursts up to its size and then refills'''
+
+        store = MemoryBucketStore()
+        self.assertEqual(store.take("key", 2, 1), (True, 0))
+        self.assertEqual(store.take("key", 2, 1), (True, 0))
+        allowed, wait = store.take("key", 2, 1)
+        self.assertFalse(allowed)
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 1)
+        # Other buckets start full.
+        self.assertTrue(store.take("other", 2, 1)[0])
+
+    def test_memory_store_evicts_least_recently_used(self):
+        '''Ensure the memory store never holds more buckets than its limit'''
+
+        store = MemoryBucketStore()
+        store.max_buckets = 2
+        store.take("first", 1, 1)
+        store.take("second", 1, 1)
+        self.assertFalse(store.take("first", 1, 1)[0])
+        store.take("third", 1, 1)
+        # Assert that the least recently used bucket, "second", was dropped.
+        self.assertEqual(list(store._buckets), ["first", "third"])
+
+    def test_cache_store_clear_keeps_other_keys(self):
+        '''Ensure clearing the cache store only refills its own buckets'''
+
+        store = CacheBucketStore()
+        cache.set("unrelated", "kept")
+        self.assertTrue(store.take("key", 1, 0.001)[0])
+        self.assertFalse(store.take("key", 1, 0.001)[0])
+        store.clear()
+        self.assertTrue(store.take("key", 1, 0.001)[0])
+        self.assertEqual(cache.get("unrelated"), "kept")